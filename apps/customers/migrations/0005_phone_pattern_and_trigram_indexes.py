@@ -0,0 +1,43 @@
+# Generated by Django 5.2 on 2026-10-19 06:11
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+# Índices GIN (pg_trgm) para buscas por substring em campos só com dígitos.
+# Existem apenas no PostgreSQL; em outros bancos as operações não fazem nada.
+TRIGRAM_INDEXES = [
+    ('customer_tax_id_trgm_idx', 'tax_id'),
+    ('customer_phone_trgm_idx', 'phone'),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for index_name, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {index_name} ON customers_customer USING gin ({column} gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for index_name, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {index_name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0004_alter_customer_phone'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['phone'], name='customer_phone_pattern_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
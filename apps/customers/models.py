@@ -82,7 +82,20 @@ class Customer(models.Model):
         indexes = [
             models.Index(fields=["full_name"]),
             models.Index(fields=["tax_id"]),
+            # Buscas por prefixo (termos curtos) do CPF/CNPJ; ver `core.lookups.digits_lookup`
+            models.Index(
+                fields=["tax_id"],
+                name="customer_tax_id_pattern_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
             models.Index(fields=["is_active"]),
+            # Buscas por prefixo (termos curtos, ex: DDD) do telefone; as buscas
+            # por substring usam índices trigram criados na migração 0005.
+            models.Index(
+                fields=["phone"],
+                name="customer_phone_pattern_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
         ]
 
     def __str__(self) -> str:
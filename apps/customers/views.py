@@ -7,6 +7,7 @@ from django.http import HttpResponseRedirect
 
 from .models import Customer
 from .forms import CustomerForm
+from core.lookups import digits_lookup
 import logging
 
 logger = logging.getLogger(__name__)
@@ -67,7 +68,9 @@ class CustomerListView(ListView):
                 | Q(preferred_name__icontains=search_query)
             )
             if cleaned_search_query_for_tax_id:
-                query_conditions |= Q(tax_id__icontains=cleaned_search_query_for_tax_id)
+                query_conditions |= digits_lookup(
+                    "tax_id", cleaned_search_query_for_tax_id, full_length=14
+                )
             queryset = queryset.filter(query_conditions)
 
         return queryset.prefetch_related("addresses")
@@ -1,13 +1,22 @@
 # employees/models.py
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.core.validators import RegexValidator
 from django.contrib.contenttypes.fields import GenericRelation
 from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
+# Cache por processo do ID do usuário sistema (ver `Employee.get_system_user_id`)
+_system_user_cache = {}
+_system_user_lock = threading.Lock()
+
 
 class Employee(AbstractUser):
     """
@@ -89,6 +98,73 @@ class Employee(AbstractUser):
         verbose_name_plural = "Funcionários"
         ordering = ["last_name", "first_name"]
 
+    @classmethod
+    def get_system_user_id(cls):
+        """
+        Retorna o ID da conta de serviço usada como responsável pelas operações
+        automáticas (baixas e estornos de estoque, cancelamentos em lote, etc.).
+
+        A conta (`settings.SYSTEM_USERNAME`, padrão "sistema") é criada na
+        primeira chamada, inativa e sem senha utilizável, portanto não permite
+        login. Só o ID fica em cache no processo, então as chamadas seguintes
+        não consultam o banco. O cache só é preenchido depois do commit da
+        transação que leu/criou a conta (um rollback não deixa um ID
+        inexistente em memória) e é invalidado quando a conta é alterada ou
+        excluída (`clear_system_user_cache`).
+
+        Returns:
+            int: ID do usuário sistema.
+        """
+        user_id = _system_user_cache.get("id")
+        if user_id is not None:
+            return user_id
+        return cls._load_system_user().pk
+
+    @classmethod
+    def get_system_user(cls):
+        """
+        Retorna o usuário sistema (ver `get_system_user_id`).
+
+        Cada chamada recebe uma instância própria, nunca compartilhada entre
+        threads: com o ID em cache ela traz só `id` e `username`, e os demais
+        campos são lidos do banco quando acessados.
+
+        Returns:
+            Employee: O usuário sistema.
+        """
+        user_id = _system_user_cache.get("id")
+        if user_id is None:
+            return cls._load_system_user()
+        return cls.from_db(None, ["id", "username"], (user_id, getattr(settings, "SYSTEM_USERNAME", "sistema")))
+
+    @classmethod
+    def _load_system_user(cls):
+        """Lê ou cria a conta de serviço e agenda o cache do ID para depois do commit."""
+        with _system_user_lock:
+            user, created = cls.objects.get_or_create(
+                username=getattr(settings, "SYSTEM_USERNAME", "sistema"),
+                defaults={
+                    "first_name": "Sistema",
+                    "is_active": False,
+                    "password": make_password(None),
+                },
+            )
+            if created:
+                logger.info(f"Usuário sistema '{user.username}' criado (ID {user.pk}).")
+            transaction.on_commit(lambda: _system_user_cache.setdefault("id", user.pk))
+            return user
+
+    @classmethod
+    def clear_system_user_cache(cls):
+        """Descarta o usuário sistema em cache neste processo."""
+        with _system_user_lock:
+            _system_user_cache.clear()
+
+    @property
+    def is_system_user(self):
+        """Indica se esta é a conta de serviço das operações automáticas."""
+        return self.username == getattr(settings, "SYSTEM_USERNAME", "sistema")
+
     @property
     def address(self):
         """
@@ -147,3 +223,10 @@ class Employee(AbstractUser):
                 f"Erro ao tentar completar dados do endereço para o funcionário ID {self.pk} "
                 f"(Endereço ID {address.pk if address else 'N/A'}): {str(e)}"
             )
+
+
+@receiver([post_save, post_delete], sender=Employee)
+def invalidate_system_user_cache(sender, instance, **kwargs):
+    """Invalida o cache do usuário sistema quando a conta em cache muda ou é excluída."""
+    if _system_user_cache.get("id") == instance.pk:
+        Employee.clear_system_user_cache()
@@ -1,3 +1,52 @@
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase
 
-# Create your tests here.
+from apps.employees.models import Employee
+
+
+class SystemUserTests(TestCase):
+    """Testa a conta de serviço usada pelas operações automáticas."""
+
+    def tearDown(self):
+        Employee.clear_system_user_cache()
+
+    def test_creates_a_single_account_without_login(self):
+        user = Employee.get_system_user()
+        self.assertEqual(Employee.get_system_user().pk, user.pk)
+        self.assertEqual(Employee.objects.filter(username="sistema").count(), 1)
+        self.assertFalse(user.is_active)
+        self.assertFalse(user.has_usable_password())
+        self.assertTrue(user.is_system_user)
+
+    def test_cache_is_filled_only_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            user = Employee.get_system_user()
+        with self.assertNumQueries(0):
+            self.assertEqual(Employee.get_system_user(), user)
+            self.assertEqual(Employee.get_system_user_id(), user.pk)
+
+    def test_each_call_gets_its_own_instance(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Employee.get_system_user()
+        first = Employee.get_system_user()
+        first.first_name = "Alterado"
+        second = Employee.get_system_user()
+        self.assertIsNot(first, second)
+        self.assertEqual(second.first_name, "Sistema")
+        self.assertFalse(second.is_active)
+
+
+class SystemUserInvalidationTests(TransactionTestCase):
+    """O cache é descartado quando a conta em cache é excluída."""
+
+    def tearDown(self):
+        Employee.clear_system_user_cache()
+
+    def test_deleting_the_account_invalidates_the_cache(self):
+        user = Employee.get_system_user()
+        with self.assertNumQueries(0):
+            Employee.get_system_user()
+
+        user.delete()
+        recreated = Employee.get_system_user()
+        self.assertNotEqual(recreated.pk, user.pk)
+        self.assertTrue(Employee.objects.filter(pk=recreated.pk).exists())
@@ -0,0 +1,105 @@
+from django.contrib import admin, messages
+from django.core.exceptions import ValidationError
+from django.forms.models import BaseInlineFormSet
+from django.http import FileResponse
+from django.utils import timezone
+
+from .models import Order, OrderItem, OrderStatusTransition
+from apps.stock.services import aggregate_quantities, check_reservations
+from .services import CONFIRM_ALL_OR_NOTHING, CONFIRM_PARTIAL, confirm_orders
+
+
+class OrderItemInlineFormSet(BaseInlineFormSet):
+    """
+    Confere as reservas de um pedido em rascunho antes de salvar os itens,
+    para que a falta de estoque apareça como erro do formulário.
+    """
+
+    def clean(self):
+        super().clean()
+        if any(self.errors) or self.instance.status != 'draft':
+            return
+        quantities = aggregate_quantities(
+            (form.cleaned_data['product'].pk, form.cleaned_data['quantity'])
+            for form in self.forms
+            if form.cleaned_data.get('product') and not form.cleaned_data.get('DELETE')
+        )
+        errors = check_reservations(self.instance.pk, quantities)
+        if errors:
+            raise ValidationError(errors)
+
+
+class OrderItemInline(admin.TabularInline):
+    model = OrderItem
+    formset = OrderItemInlineFormSet
+    extra = 0
+    raw_id_fields = ('product',)
+
+
+class OrderStatusTransitionInline(admin.TabularInline):
+    model = OrderStatusTransition
+    extra = 0
+    can_delete = False
+    readonly_fields = ('from_status', 'to_status', 'user', 'reason', 'created_at')
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Order)
+class OrderAdmin(admin.ModelAdmin):
+    list_display = ('number', 'customer', 'status', 'total', 'created_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('number', 'customer__full_name')
+    raw_id_fields = ('customer',)
+    readonly_fields = ('number', 'subtotal', 'total', 'created_at', 'updated_at')
+    inlines = (OrderItemInline, OrderStatusTransitionInline)
+    actions = ('confirm_selected_all_or_nothing', 'confirm_selected_partial', 'print_pick_list')
+
+    def _confirm_selected(self, request, queryset, policy):
+        try:
+            result = confirm_orders(queryset, user=request.user, policy=policy)
+        except ValidationError as e:
+            self.message_user(
+                request,
+                "Nenhum pedido foi confirmado: " + "; ".join(e.messages),
+                messages.ERROR,
+            )
+            return
+
+        if result['confirmed']:
+            self.message_user(
+                request, f"{len(result['confirmed'])} pedido(s) confirmado(s).", messages.SUCCESS
+            )
+        for order_id, errors in result['rejected'].items():
+            self.message_user(
+                request, f"Pedido #{order_id} não confirmado: " + "; ".join(errors), messages.WARNING
+            )
+        if not result['confirmed'] and not result['rejected']:
+            self.message_user(request, "Nenhum rascunho pendente entre os pedidos selecionados.", messages.INFO)
+
+    @admin.action(description="Confirmar pedidos selecionados (todos ou nenhum)")
+    def confirm_selected_all_or_nothing(self, request, queryset):
+        self._confirm_selected(request, queryset, CONFIRM_ALL_OR_NOTHING)
+
+    @admin.action(description="Confirmar pedidos selecionados (os que tiverem estoque)")
+    def confirm_selected_partial(self, request, queryset):
+        self._confirm_selected(request, queryset, CONFIRM_PARTIAL)
+
+    @admin.action(description="Gerar lista de separação (PDF)")
+    def print_pick_list(self, request, queryset):
+        # reportlab só é carregado quando a lista é gerada
+        from .picking import generate_pick_list
+
+        pdf_file, count = generate_pick_list(queryset)
+        if pdf_file is None:
+            self.message_user(
+                request, "Nenhum pedido confirmado ou em processamento entre os selecionados.", messages.INFO
+            )
+            return None
+        return FileResponse(
+            pdf_file,
+            as_attachment=True,
+            filename=f'lista_separacao_{timezone.localtime():%Y%m%d_%H%M%S}.pdf',
+            content_type='application/pdf',
+        )
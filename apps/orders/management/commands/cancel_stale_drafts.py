@@ -0,0 +1,40 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.orders.models import Order
+from apps.orders.services import ORDER_BATCH_SIZE, cancel_orders
+
+
+class Command(BaseCommand):
+    """
+    Cancela em massa os pedidos em rascunho sem alteração há mais de N dias,
+    liberando suas reservas de estoque. Pensado para rodar periodicamente (cron).
+    """
+
+    help = "Cancela rascunhos de pedido parados há mais de N dias."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=30,
+            help="Dias sem alteração para considerar o rascunho abandonado (padrão: 30).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=ORDER_BATCH_SIZE,
+            help=f"Pedidos por transação (padrão: {ORDER_BATCH_SIZE}).",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        drafts = Order.objects.filter(status="draft", updated_at__lt=cutoff)
+        cancelled = cancel_orders(
+            drafts,
+            reason=f"Rascunho sem alteração há mais de {options['days']} dias",
+            batch_size=options["batch_size"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"{cancelled} rascunho(s) cancelado(s)."))
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Max, Min
+
+from apps.orders.models import Order
+from apps.orders.services import recalculate_totals
+
+
+class Command(BaseCommand):
+    """
+    Recalcula subtotal e total de pedidos históricos.
+
+    Os pedidos são processados por faixas de ID, com um UPDATE por faixa
+    (agregação dos itens feita no banco), sem carregar nem salvar pedidos
+    individualmente.
+    """
+
+    help = "Recalcula subtotal/total dos pedidos a partir dos itens, em lotes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Quantidade de IDs de pedido por UPDATE (padrão: 5000).",
+        )
+        parser.add_argument(
+            "--status",
+            action="append",
+            choices=[value for value, _ in Order.STATUS_CHOICES],
+            help="Limita aos pedidos com o status informado (pode repetir).",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        orders = Order.objects.all()
+        if options["status"]:
+            orders = orders.filter(status__in=options["status"])
+
+        bounds = orders.aggregate(first=Min("pk"), last=Max("pk"))
+        if bounds["first"] is None:
+            self.stdout.write("Nenhum pedido para recalcular.")
+            return
+
+        updated = 0
+        for start in range(bounds["first"], bounds["last"] + 1, batch_size):
+            updated += recalculate_totals(orders.filter(pk__gte=start, pk__lt=start + batch_size))
+
+        self.stdout.write(self.style.SUCCESS(f"{updated} pedido(s) recalculado(s)."))
@@ -0,0 +1,34 @@
+# Generated by Django 5.2 on 2026-10-19 06:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderStatusTransition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(choices=[('draft', 'Rascunho'), ('confirmed', 'Confirmado'), ('processing', 'Processando'), ('shipped', 'Enviado'), ('delivered', 'Entregue'), ('cancelled', 'Cancelado'), ('returned', 'Devolvido')], max_length=10, verbose_name='Status Anterior')),
+                ('to_status', models.CharField(choices=[('draft', 'Rascunho'), ('confirmed', 'Confirmado'), ('processing', 'Processando'), ('shipped', 'Enviado'), ('delivered', 'Entregue'), ('cancelled', 'Cancelado'), ('returned', 'Devolvido')], max_length=10, verbose_name='Novo Status')),
+                ('reason', models.TextField(blank=True, verbose_name='Motivo')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Data')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_history', to='orders.order', verbose_name='Pedido')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Responsável')),
+            ],
+            options={
+                'verbose_name': 'Transição de Status',
+                'verbose_name_plural': 'Histórico de Status',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['order', 'created_at'], name='order_transition_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2 on 2026-10-19 06:23
+
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def number_existing_orders(apps, schema_editor):
+    """Numera os pedidos existentes por ordem de criação e inicia a série `order` no último número."""
+    Order = apps.get_model('orders', 'Order')
+    Sequence = apps.get_model('sequences', 'Sequence')
+
+    number = 0
+    batch = []
+    for order in Order.objects.order_by('created_at', 'pk').only('pk').iterator(chunk_size=BATCH_SIZE):
+        number += 1
+        order.number = number
+        batch.append(order)
+        if len(batch) == BATCH_SIZE:
+            Order.objects.bulk_update(batch, ['number'])
+            batch = []
+    if batch:
+        Order.objects.bulk_update(batch, ['number'])
+
+    Sequence.objects.update_or_create(name='order', defaults={'last_value': number})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0002_orderstatustransition'),
+        ('sequences', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='number',
+            field=models.PositiveBigIntegerField(editable=False, help_text='Número sequencial do pedido (gerado automaticamente)', null=True, unique=True, verbose_name='Número'),
+        ),
+        migrations.RunPython(number_existing_orders, migrations.RunPython.noop),
+    ]
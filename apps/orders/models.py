@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.db import models, transaction
 from django.core.validators import MinValueValidator
 from django.core.exceptions import ValidationError
@@ -8,6 +9,7 @@ from apps.customers.models import Customer
 from apps.products.models import Product
 from apps.stock.models import StockMovement, Stock
 from decimal import Decimal, InvalidOperation
+from apps.sequences.services import next_value
 
 User = get_user_model()
 
@@ -26,6 +28,14 @@ class Order(models.Model):
         ('returned', 'Devolvido'),
     ]
 
+    number = models.PositiveBigIntegerField(
+        unique=True,
+        null=True,
+        editable=False,
+        verbose_name='Número',
+        help_text="Número sequencial do pedido (gerado automaticamente)"
+    )
+
     # Relacionamentos
     customer = models.ForeignKey(
         Customer,
@@ -91,7 +101,97 @@ class Order(models.Model):
         ]
 
     def __str__(self):
-        return f"Pedido #{self.id} - {self.get_status_display()}"
+        return f"Pedido {self.formatted_number} - {self.get_status_display()}"
+
+    def save(self, *args, **kwargs):
+        """Atribui o número sequencial (série `order` em apps.sequences) na criação."""
+        if self.number is None:
+            self.number = next_value(
+                'order',
+                initial=lambda: Order.objects.aggregate(last=models.Max('number'))['last'] or 0,
+                block_size=settings.SEQUENCE_BLOCK_SIZE,
+            )
+        super().save(*args, **kwargs)
+
+    @property
+    def formatted_number(self):
+        """Número do pedido para exibição (ex: 000123)."""
+        return f"{self.number:06d}" if self.number else f"#{self.pk}"
+
+    # --- Transições de status (ver apps.orders.services.transition_order) ---
+    def confirm(self, user=None):
+        """Confirma o pedido e dá baixa no estoque."""
+        from .services import transition_order
+        return transition_order(self, 'confirmed', user=user)
+
+    def start_processing(self, user=None):
+        """Coloca o pedido confirmado em separação/processamento."""
+        from .services import transition_order
+        return transition_order(self, 'processing', user=user)
+
+    def ship(self, user=None):
+        """Marca o pedido como enviado."""
+        from .services import transition_order
+        return transition_order(self, 'shipped', user=user)
+
+    def deliver(self, user=None):
+        """Marca o pedido como entregue."""
+        from .services import transition_order
+        return transition_order(self, 'delivered', user=user)
+
+    def cancel(self, reason='', user=None):
+        """Cancela o pedido, registrando o motivo."""
+        from .services import transition_order
+        return transition_order(self, 'cancelled', user=user, reason=reason)
+
+    def return_order(self, reason='', user=None):
+        """Registra a devolução do pedido, com o motivo."""
+        from .services import transition_order
+        return transition_order(self, 'returned', user=user, reason=reason)
+
+
+class OrderStatusTransition(models.Model):
+    """
+    Histórico de mudanças de status de um pedido.
+    Cada transição bem-sucedida grava uma linha na mesma transação da mudança.
+    """
+
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.CASCADE,
+        related_name='status_history',
+        verbose_name='Pedido'
+    )
+    from_status = models.CharField(
+        max_length=10,
+        choices=Order.STATUS_CHOICES,
+        verbose_name='Status Anterior'
+    )
+    to_status = models.CharField(
+        max_length=10,
+        choices=Order.STATUS_CHOICES,
+        verbose_name='Novo Status'
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name='Responsável'
+    )
+    reason = models.TextField(blank=True, verbose_name='Motivo')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Data')
+
+    class Meta:
+        verbose_name = 'Transição de Status'
+        verbose_name_plural = 'Histórico de Status'
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['order', 'created_at'], name='order_transition_idx'),
+        ]
+
+    def __str__(self):
+        return f"Pedido #{self.order_id}: {self.get_from_status_display()} → {self.get_to_status_display()}"
 
 
 class OrderItem(models.Model):
@@ -151,6 +251,16 @@ class OrderItem(models.Model):
         return f"{self.quantity}x {self.product.name} (Pedido #{self.order.id})"
 
     def save(self, *args, **kwargs):
+        """
+        Salva o item e, em pedidos em rascunho, ajusta as reservas de estoque
+        na mesma transação: se a reserva falhar (`ValidationError`), o item
+        também não é gravado.
+        """
+        from .services import sync_order_reservations
+
         if not self.historical_price:  # Se não tiver preço histórico
             self.historical_price = self.unit_price or self.product.sale_price
-        super().save(*args, **kwargs)
\ No newline at end of file
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if Order.objects.filter(pk=self.order_id, status='draft').exists():
+                sync_order_reservations(self.order_id)
\ No newline at end of file
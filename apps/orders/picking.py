@@ -0,0 +1,167 @@
+## lista de separação (picking) consolidada de vários pedidos, em PDF ordenado pelo endereço no depósito
+import re
+import tempfile
+from datetime import datetime
+from xml.sax.saxutils import escape
+
+from django.db.models import Count, Sum
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import cm
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+from .models import OrderItem
+
+# Pedidos que já baixaram o estoque e ainda não saíram do depósito
+PICKABLE_STATUSES = ('confirmed', 'processing')
+
+# Colunas do PDF: (chave, cabeçalho, largura em pontos)
+PICK_LIST_COLUMNS = [
+    ('location', 'Localização', 90),
+    ('internal_code', 'Código', 70),
+    ('description', 'Produto', 215),
+    ('quantity', 'Qtde', 40),
+    ('orders', 'Pedidos', 45),
+    ('picked', 'Separado', 50),
+]
+
+_LOCATION_TOKEN = re.compile(r'\d+|[^\W\d_]+')
+
+
+def location_sort_key(location):
+    """
+    Chave de ordenação natural de `Stock.location` (corredor/prateleira/posição).
+
+    O texto é quebrado em partes numéricas e alfabéticas, comparadas por valor
+    ("A-2-10" vem antes de "A-10-1" e "Corredor 3 / Prat. 12" antes de
+    "Corredor 12 / Prat. 1"), independentemente dos separadores usados.
+    Produtos sem localização vão para o fim da lista.
+    """
+    tokens = _LOCATION_TOKEN.findall(location or '')
+    if not tokens:
+        return (1, ())
+    return (0, tuple((0, int(token), '') if token.isdigit() else (1, 0, token.upper()) for token in tokens))
+
+
+def pick_list_lines(order_ids):
+    """
+    Itens dos pedidos somados por produto, com a localização do estoque.
+
+    Uma única consulta agrupada (itens + produto + estoque); a ordenação pelo
+    endereço é feita em memória com `location_sort_key`, pois o texto livre
+    da localização não ordena corretamente no banco.
+
+    Returns:
+        list[dict]: `product_id`, `internal_code`, `description`, `location`,
+        `quantity` e `orders` (pedidos que pedem o produto), na ordem de coleta.
+    """
+    rows = (
+        OrderItem.objects.filter(order_id__in=order_ids)
+        .order_by()
+        .values('product_id', 'product__internal_code', 'product__description', 'product__stock__location')
+        .annotate(quantity=Sum('quantity'), orders=Count('order_id', distinct=True))
+    )
+    lines = [
+        {
+            'product_id': row['product_id'],
+            'internal_code': row['product__internal_code'],
+            'description': row['product__description'],
+            'location': row['product__stock__location'],
+            'quantity': row['quantity'],
+            'orders': row['orders'],
+        }
+        for row in rows
+    ]
+    lines.sort(key=lambda line: (location_sort_key(line['location']), line['internal_code'] or ''))
+    return lines
+
+
+def build_pick_list_pdf(order_numbers, lines, output):
+    """
+    Monta o PDF da lista de separação em `output` (arquivo binário), em uma
+    única tabela que repete o cabeçalho em cada página.
+
+    Args:
+        order_numbers: Números dos pedidos incluídos (exibidos no cabeçalho).
+        lines: Linhas de `pick_list_lines`, já na ordem de coleta.
+    """
+    styles = getSampleStyleSheet()
+    generated_at = datetime.now()
+    margin = 1.5 * cm
+
+    def draw_footer(canvas, doc):
+        canvas.saveState()
+        canvas.setFont('Helvetica', 8)
+        canvas.drawString(margin, margin / 2, f'Gerada em: {generated_at.strftime("%d/%m/%Y %H:%M:%S")}')
+        canvas.drawRightString(A4[0] - margin, margin / 2, f'Página {doc.page}')
+        canvas.restoreState()
+
+    rows = [[label for _, label, _ in PICK_LIST_COLUMNS]]
+    for line in lines:
+        rows.append([
+            line['location'] or '-',
+            line['internal_code'] or '-',
+            # A descrição é texto livre: escapada para não ser lida como marcação do reportlab
+            Paragraph(escape(line['description']), styles['BodyText']),
+            line['quantity'],
+            line['orders'],
+            '[   ]',
+        ])
+    table = Table(rows, colWidths=[width for _, _, width in PICK_LIST_COLUMNS], repeatRows=1, hAlign='LEFT')
+    table.setStyle(TableStyle([
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 8),
+        ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+        ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('ALIGN', (3, 1), (-1, -1), 'CENTER'),
+    ]))
+
+    doc = SimpleDocTemplate(
+        output,
+        pagesize=A4,
+        leftMargin=margin,
+        rightMargin=margin,
+        topMargin=margin,
+        bottomMargin=margin,
+        title='Lista de Separação',
+    )
+    doc.build(
+        [
+            Paragraph('Lista de Separação', styles['Title']),
+            Paragraph(f'<b>Pedidos ({len(order_numbers)}):</b> ' + ', '.join(order_numbers), styles['Normal']),
+            Paragraph(
+                f'<b>Produtos:</b> {len(lines)} | <b>Unidades:</b> {sum(line["quantity"] for line in lines)}',
+                styles['Normal'],
+            ),
+            Spacer(1, 0.4 * cm),
+            table,
+        ],
+        onFirstPage=draw_footer,
+        onLaterPages=draw_footer,
+    )
+
+
+def generate_pick_list(orders):
+    """
+    Gera a lista de separação dos pedidos confirmados/em processamento de `orders`.
+
+    São duas consultas no total (pedidos e itens agrupados), qualquer que
+    seja o número de pedidos ou itens.
+
+    Returns:
+        tuple: `(arquivo temporário com o PDF posicionado no início, quantidade de pedidos)`,
+        ou `(None, 0)` se nenhum pedido puder ser separado.
+    """
+    pickable = list(
+        orders.filter(status__in=PICKABLE_STATUSES).order_by('number', 'pk').values_list('pk', 'number')
+    )
+    if not pickable:
+        return None, 0
+
+    order_numbers = [f"{number:06d}" if number else f"#{pk}" for pk, number in pickable]
+    pdf_file = tempfile.TemporaryFile()
+    build_pick_list_pdf(order_numbers, pick_list_lines([pk for pk, _ in pickable]), pdf_file)
+    pdf_file.seek(0)
+    return pdf_file, len(pickable)
@@ -0,0 +1,409 @@
+## regras de negócio de pedidos que operam em conjunto (cálculo de totais, etc.)
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.employees.models import Employee
+from apps.stock.models import StockMovement
+from apps.stock.services import (
+    aggregate_quantities,
+    apply_movements,
+    convert_reservations,
+    deduct_stock,
+    lock_stocks,
+    release_orders_reservations,
+    release_reservations,
+    reservation_expiry,
+    reserved_quantities,
+    restock,
+    shortage_messages,
+    sync_reservations,
+)
+from .models import Order, OrderItem, OrderStatusTransition
+
+MONEY_FIELD = DecimalField(max_digits=12, decimal_places=2)
+
+
+def line_total_expression():
+    """Valor líquido de um item: preço congelado × quantidade − desconto do item."""
+    return ExpressionWrapper(
+        F('historical_price') * F('quantity') - F('discount'),
+        output_field=MONEY_FIELD,
+    )
+
+
+def subtotal_subquery():
+    """
+    Subconsulta correlacionada com a soma dos itens do pedido externo (`OuterRef('pk')`).
+    Pedidos sem itens ficam com subtotal zero.
+    """
+    subtotal = (
+        OrderItem.objects.filter(order=OuterRef('pk'))
+        .order_by()
+        .values('order')
+        .annotate(subtotal=Sum(line_total_expression()))
+        .values('subtotal')
+    )
+    return Coalesce(Subquery(subtotal, output_field=MONEY_FIELD), Value(Decimal('0')), output_field=MONEY_FIELD)
+
+
+def recalculate_totals(orders):
+    """
+    Recalcula `subtotal` e `total` de todos os pedidos do QuerySet em um único UPDATE.
+
+    O subtotal é agregado no banco a partir dos itens
+    (`Sum(historical_price * quantity - discount)`) e o total é
+    `subtotal - desconto global + taxas`, sem carregar pedidos ou itens em memória.
+
+    Args:
+        orders: QuerySet de `Order` (ex: `Order.objects.filter(pk=10)`).
+
+    Returns:
+        int: Quantidade de pedidos atualizados.
+    """
+    return orders.update(
+        subtotal=subtotal_subquery(),
+        total=subtotal_subquery() - F('discount') + F('tax'),
+        updated_at=timezone.now(),
+    )
+
+
+def recalculate_order_totals(order_id):
+    """Recalcula os totais de um único pedido (usado quando seus itens mudam)."""
+    return recalculate_totals(Order.objects.filter(pk=order_id))
+
+
+# Transições permitidas: status de destino -> status de origem aceitos
+ALLOWED_TRANSITIONS = {
+    'confirmed': ('draft',),
+    'processing': ('confirmed',),
+    'shipped': ('confirmed', 'processing'),
+    'delivered': ('shipped',),
+    'cancelled': ('draft', 'confirmed', 'processing'),
+    'returned': ('shipped', 'delivered'),
+}
+
+# Quantidade de pedidos processados por transação nas operações em massa
+ORDER_BATCH_SIZE = 500
+
+
+def sync_order_reservations(order_id):
+    """
+    Recalcula as reservas de um pedido em rascunho a partir dos seus itens,
+    renovando a validade (TTL) das reservas a cada alteração.
+    """
+    quantities = aggregate_quantities(
+        OrderItem.objects.filter(order_id=order_id).values_list('product_id', 'quantity')
+    )
+    sync_reservations(order_id, quantities, expires_at=reservation_expiry())
+
+
+def deduct_order_stock(order_id, user):
+    """
+    Dá baixa no estoque de todos os itens do pedido (produtos repetidos são somados).
+    Deve ser chamada dentro de `transaction.atomic()`.
+    """
+    quantities = aggregate_quantities(
+        OrderItem.objects.filter(order_id=order_id).values_list('product_id', 'quantity')
+    )
+    return deduct_stock(
+        quantities,
+        user=user,
+        reference_id=f"ORDER-{order_id}",
+        notes=f"Baixa automática para pedido #{order_id}",
+        order_id=order_id,
+    )
+
+
+
+# Políticas da confirmação em lote
+CONFIRM_ALL_OR_NOTHING = 'all_or_nothing'
+CONFIRM_PARTIAL = 'partial'
+
+
+def _find_shortages(quantities, available):
+    """`{product_id: (disponível ou None, necessário)}` dos produtos que não cabem no disponível."""
+    return {
+        product_id: (max(available[product_id], 0) if product_id in available else None, required)
+        for product_id, required in quantities.items()
+        if required > available.get(product_id, 0)
+    }
+
+
+def confirm_orders(orders, user=None, policy=CONFIRM_ALL_OR_NOTHING):
+    """
+    Confirma vários pedidos em rascunho de uma vez, dando baixa no estoque.
+
+    Em vez de confirmar pedido a pedido, as quantidades são somadas por
+    produto entre todos os pedidos (uma consulta agrupada), cada `Stock` é
+    bloqueado uma única vez e o resultado é gravado em lote: um de reservas,
+    um de pedidos, as movimentações por `apps.stock.services.apply_movements`
+    e `bulk_create` do histórico. O custo não cresce com o número de pedidos.
+
+    Políticas quando falta estoque:
+        - `CONFIRM_ALL_OR_NOTHING`: nenhum pedido é confirmado
+          (`ValidationError` com os produtos em falta).
+        - `CONFIRM_PARTIAL`: confirma, por ordem de ID, os pedidos que cabem
+          no estoque disponível; os demais continuam em rascunho.
+
+    Args:
+        orders: QuerySet de `Order` (só os rascunhos não baixados são considerados).
+        user: Responsável; sem usuário, usa o usuário sistema.
+        policy: Política de falta de estoque.
+
+    Returns:
+        dict: `{'confirmed': [ids], 'rejected': {id: [mensagens]}}`.
+    """
+    user = user or Employee.get_system_user()
+    result = {'confirmed': [], 'rejected': {}}
+
+    with transaction.atomic():
+        order_ids = list(
+            Order.objects.select_for_update()
+            .filter(pk__in=orders.values('pk'), status='draft', _stock_updated=False)
+            .order_by('pk')
+            .values_list('pk', flat=True)
+        )
+        if not order_ids:
+            return result
+
+        lines = {}
+        for order_id, product_id, quantity in (
+            OrderItem.objects.filter(order_id__in=order_ids)
+            .order_by('order_id', 'product_id')
+            .values('order_id', 'product_id')
+            .annotate(total=Sum('quantity'))
+            .values_list('order_id', 'product_id', 'total')
+        ):
+            lines.setdefault(order_id, {})[product_id] = quantity
+
+        totals = aggregate_quantities(
+            (product_id, quantity) for items in lines.values() for product_id, quantity in items.items()
+        )
+        stocks = lock_stocks(totals.keys())
+        reserved_by_others = reserved_quantities(totals.keys(), exclude_order_ids=order_ids)
+        available = {
+            product_id: stock.quantity - reserved_by_others.get(product_id, 0)
+            for product_id, stock in stocks.items()
+        }
+
+        if policy == CONFIRM_ALL_OR_NOTHING:
+            shortages = _find_shortages(totals, available)
+            if shortages:
+                raise ValidationError(shortage_messages(shortages))
+            accepted = order_ids
+        else:
+            accepted = []
+            for order_id in order_ids:
+                items = lines.get(order_id, {})
+                shortages = _find_shortages(items, available)
+                if shortages:
+                    result['rejected'][order_id] = shortage_messages(shortages)
+                    continue
+                for product_id, required in items.items():
+                    available[product_id] -= required
+                accepted.append(order_id)
+            if not accepted:
+                return result
+
+        convert_reservations(accepted)
+        Order.objects.filter(pk__in=accepted).update(
+            status='confirmed', _stock_updated=True, updated_at=timezone.now()
+        )
+        apply_movements(
+            StockMovement(
+                product_id=product_id,
+                movement_type='OUT',
+                quantity=quantity,
+                reference_id=f"ORDER-{order_id}",
+                user=user,
+                notes=f"Baixa automática para pedido #{order_id} (confirmação em lote)",
+            )
+            for order_id in accepted
+            for product_id, quantity in lines.get(order_id, {}).items()
+        )
+        OrderStatusTransition.objects.bulk_create([
+            OrderStatusTransition(order_id=order_id, from_status='draft', to_status='confirmed', user=user)
+            for order_id in accepted
+        ])
+
+    result['confirmed'] = accepted
+    return result
+
+
+def restock_orders(order_ids, movement_type, user):
+    """
+    Devolve ao estoque os itens de vários pedidos, com uma movimentação
+    compensatória (`CANCELLATION` ou `RETURN`) por pedido e produto.
+
+    As quantidades são somadas no banco (uma consulta agrupada por pedido e
+    produto) e aplicadas em lote por `apps.stock.services.restock`. Deve ser
+    chamada dentro de `transaction.atomic()`, só para pedidos já baixados.
+    """
+    rows = (
+        OrderItem.objects.filter(order_id__in=order_ids)
+        .order_by('order_id', 'product_id')
+        .values('order_id', 'product_id')
+        .annotate(total=Sum('quantity'))
+        .values_list('order_id', 'product_id', 'total')
+    )
+    return restock(
+        [(product_id, quantity, f"ORDER-{order_id}") for order_id, product_id, quantity in rows],
+        user=user,
+        movement_type=movement_type,
+        notes="Estorno automático de estoque do pedido",
+    )
+
+
+def _on_confirmed(order, from_status, stock_updated, user):
+    deduct_order_stock(order.pk, user)
+
+
+def _on_cancelled(order, from_status, stock_updated, user):
+    if stock_updated:
+        restock_orders([order.pk], 'CANCELLATION', user)
+    elif from_status == 'draft':
+        release_reservations(order.pk)
+
+
+def _on_returned(order, from_status, stock_updated, user):
+    if stock_updated:
+        restock_orders([order.pk], 'RETURN', user)
+
+
+# Efeitos colaterais de estoque de cada status de destino:
+# (pedido, status anterior, se o estoque estava baixado, usuário)
+TRANSITION_EFFECTS = {
+    'confirmed': _on_confirmed,
+    'cancelled': _on_cancelled,
+    'returned': _on_returned,
+}
+
+
+def transition_order(order, to_status, user=None, reason=''):
+    """
+    Muda o status do pedido usando compare-and-swap.
+
+    A mudança é um `UPDATE ... WHERE id = <pedido> AND status = <status lido>
+    AND _stock_updated = <valor lido>`: se outra operação alterou o pedido
+    nesse meio tempo, nenhuma linha é afetada e a transição é recusada, então
+    os efeitos de estoque de cada transição rodam no máximo uma vez, mesmo com
+    requisições concorrentes. O pedido não fica bloqueado durante a
+    requisição: a linha só fica presa entre o `UPDATE` e o fim desta
+    transação, que também aplica os efeitos de estoque (`TRANSITION_EFFECTS`)
+    e grava o histórico.
+
+    Args:
+        order: Pedido (o `status` da instância é o status esperado no banco).
+        to_status: Status de destino.
+        user: Responsável; sem usuário, usa o usuário sistema.
+        reason: Motivo (gravado no histórico e, para cancelamento/devolução,
+            em `cancellation_reason`/`return_reason`).
+
+    Returns:
+        OrderStatusTransition: Registro do histórico criado.
+
+    Raises:
+        ValidationError: Transição não permitida, pedido alterado por outra
+            operação ou falha nos efeitos de estoque (nada é gravado).
+    """
+    from_status = order.status
+    stock_updated = order._stock_updated
+    if from_status not in ALLOWED_TRANSITIONS.get(to_status, ()):
+        raise ValidationError(
+            f"Não é possível mudar o pedido #{order.pk} de "
+            f"'{order.get_status_display()}' para '{dict(Order.STATUS_CHOICES).get(to_status, to_status)}'."
+        )
+
+    user = user or Employee.get_system_user()
+    changes = {'status': to_status, 'updated_at': timezone.now()}
+    if to_status == 'confirmed':
+        changes['_stock_updated'] = True
+    elif to_status == 'cancelled':
+        changes.update(cancellation_reason=reason, _stock_updated=False)
+    elif to_status == 'returned':
+        changes.update(return_reason=reason, _stock_updated=False)
+
+    with transaction.atomic():
+        updated = Order.objects.filter(
+            pk=order.pk, status=from_status, _stock_updated=stock_updated
+        ).update(**changes)
+        if not updated:
+            raise ValidationError(
+                f"O pedido #{order.pk} foi alterado por outra operação. Recarregue e tente novamente."
+            )
+
+        effect = TRANSITION_EFFECTS.get(to_status)
+        if effect:
+            effect(order, from_status, stock_updated, user)
+
+        history = OrderStatusTransition.objects.create(
+            order_id=order.pk,
+            from_status=from_status,
+            to_status=to_status,
+            user=user,
+            reason=reason,
+        )
+
+    for field, value in changes.items():
+        setattr(order, field, value)
+    return history
+
+
+def cancel_orders(orders, reason='', user=None, batch_size=ORDER_BATCH_SIZE):
+    """
+    Cancela vários pedidos de uma vez (ex: fechamento de rascunhos antigos).
+
+    Os pedidos são processados em lotes de `batch_size`, cada lote em uma
+    transação: os pedidos ainda canceláveis são bloqueados em uma consulta,
+    o status muda com um único `UPDATE`, os pedidos já baixados têm o estoque
+    devolvido em lote (`restock_orders`), as reservas dos rascunhos são
+    liberadas e o histórico é gravado com `bulk_create`. Pedidos que já
+    saíram de um status cancelável são ignorados.
+
+    Args:
+        orders: QuerySet de `Order` a cancelar.
+        reason: Motivo do cancelamento.
+        user: Responsável; sem usuário, usa o usuário sistema.
+        batch_size: Pedidos por transação.
+
+    Returns:
+        int: Quantidade de pedidos cancelados.
+    """
+    user = user or Employee.get_system_user()
+    order_ids = list(
+        orders.filter(status__in=ALLOWED_TRANSITIONS['cancelled']).order_by('pk').values_list('pk', flat=True)
+    )
+
+    cancelled = 0
+    for start in range(0, len(order_ids), batch_size):
+        with transaction.atomic():
+            locked = list(
+                Order.objects.select_for_update()
+                .filter(pk__in=order_ids[start:start + batch_size], status__in=ALLOWED_TRANSITIONS['cancelled'])
+                .order_by('pk')
+                .values_list('pk', 'status', '_stock_updated')
+            )
+            if not locked:
+                continue
+
+            Order.objects.filter(pk__in=[pk for pk, _, _ in locked]).update(
+                status='cancelled',
+                cancellation_reason=reason,
+                _stock_updated=False,
+                updated_at=timezone.now(),
+            )
+            restock_orders([pk for pk, _, stock_updated in locked if stock_updated], 'CANCELLATION', user)
+            release_orders_reservations([pk for pk, status, _ in locked if status == 'draft'])
+            OrderStatusTransition.objects.bulk_create([
+                OrderStatusTransition(
+                    order_id=pk, from_status=status, to_status='cancelled', user=user, reason=reason
+                )
+                for pk, status, _ in locked
+            ])
+        cancelled += len(locked)
+    return cancelled
@@ -1,63 +1,102 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.db import transaction
 from django.core.exceptions import ValidationError
 import logging
-from .models import Order
-from apps.stock.models import Stock, StockMovement
-from apps.employees.models import Employee 
+from .models import Order, OrderItem
+from .services import deduct_order_stock, recalculate_order_totals, restock_orders, sync_order_reservations
+from apps.stock.services import release_reservations
+from apps.employees.models import Employee
 
 logger = logging.getLogger(__name__)
 
 @receiver(post_save, sender=Order)
 def update_stock_on_order_confirmation(sender, instance, created, **kwargs):
     """
-    Signal atualizado para funcionar melhor no admin
+    Dá baixa no estoque quando o pedido é confirmado.
+
+    Todos os itens são processados em lote por `apps.stock.services.deduct_stock`:
+    os estoques são bloqueados em uma única consulta (ordenada por produto, para
+    evitar deadlocks entre pedidos concorrentes), todas as quantidades são
+    validadas antes de qualquer alteração e as baixas/movimentações são gravadas
+    com um `UPDATE` e um `bulk_create`. As reservas do pedido são convertidas
+    em saída; as de outros pedidos não podem ser consumidas.
+
+    Cobre quem altera o status via `save()` (ex: admin); o caminho preferido é
+    `Order.confirm()`, que valida a transição e grava o histórico.
     """
     # Verifica se é um pedido confirmado e se o estoque ainda não foi atualizado
     if instance.status == 'confirmed' and not instance._stock_updated:
         try:
             with transaction.atomic():
                 # Obtém o usuário sistema
-                system_user = Employee.get_system_user()  
+                system_user = Employee.get_system_user()
                 if not system_user:
                     logger.error("Usuário sistema não configurado")
                     return
-                
-                # Processa cada item do pedido
-                for item in instance.items.all():
-                    try:
-                        stock = Stock.objects.select_for_update().get(product=item.product)
-                        
-                        if stock.quantity < item.quantity:
-                            logger.error(f"Estoque insuficiente para {item.product.name}")
-                            raise ValidationError(
-                                f"Estoque insuficiente: {item.product.name}. "
-                                f"Disponível: {stock.quantity}, Necessário: {item.quantity}"
-                            )
-                        
-                        # Atualiza o estoque
-                        stock.quantity -= item.quantity
-                        stock.save()
-                        
-                        # Registra a movimentação
-                        StockMovement.objects.create(
-                            product=item.product,
-                            movement_type='OUT',
-                            quantity=item.quantity,
-                            reference_id=f"ORDER-{instance.id}",
-                            user=system_user,  
-                            notes=f"Baixa automática para pedido #{instance.id}"
-                        )
-                    
-                    except Stock.DoesNotExist:
-                        logger.error(f"Produto {item.product.name} sem registro de estoque")
-                        raise ValidationError(f"Produto {item.product.name} não encontrado no estoque")
-                
-                # Marca o pedido como processado
+
+                # Reivindica a baixa com compare-and-swap: entre saves concorrentes
+                # do mesmo pedido, só um encontra `_stock_updated=False`
+                claimed = Order.objects.filter(pk=instance.pk, _stock_updated=False).update(_stock_updated=True)
                 instance._stock_updated = True
-                instance.save(update_fields=['_stock_updated'])
-                
+                if claimed:
+                    deduct_order_stock(instance.pk, system_user)
+
+        except ValidationError as e:
+            instance._stock_updated = False
+            logger.error(f"Erro ao atualizar estoque: {'; '.join(e.messages)}")
+            raise
         except Exception as e:
+            instance._stock_updated = False
             logger.error(f"Erro ao atualizar estoque: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+
+@receiver(post_save, sender=Order)
+def restock_on_order_cancellation_or_return(sender, instance, created, **kwargs):
+    """
+    Desfaz os efeitos de estoque de um pedido cancelado ou devolvido via `save()`.
+
+    Se a baixa já havia ocorrido, os itens voltam ao estoque com movimentações
+    `CANCELLATION`/`RETURN` (reivindicadas por compare-and-swap em
+    `_stock_updated`, para nunca estornar duas vezes); rascunhos cancelados
+    apenas liberam as reservas.
+    """
+    if instance.status not in ('cancelled', 'returned'):
+        return
+    movement_type = 'CANCELLATION' if instance.status == 'cancelled' else 'RETURN'
+    with transaction.atomic():
+        claimed = Order.objects.filter(pk=instance.pk, _stock_updated=True).update(_stock_updated=False)
+        instance._stock_updated = False
+        if claimed:
+            restock_orders([instance.pk], movement_type, Employee.get_system_user())
+        else:
+            release_reservations(instance.pk)
+
+
+@receiver(post_delete, sender=OrderItem)
+def update_reservations_on_item_delete(sender, instance, **kwargs):
+    """
+    Libera a reserva do item removido de um pedido em rascunho. Inclusões e
+    alterações reservam em `OrderItem.save()`, na mesma transação do item.
+    """
+    if Order.objects.filter(pk=instance.order_id, status='draft').exists():
+        sync_order_reservations(instance.order_id)
+
+
+@receiver(post_save, sender=Order)
+def update_totals_on_order_change(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Recalcula os totais quando o desconto global ou as taxas do pedido podem ter mudado.
+    Saves parciais que não tocam esses campos (ex: status) são ignorados.
+    """
+    if update_fields is not None and not {'discount', 'tax'} & set(update_fields):
+        return
+    recalculate_order_totals(instance.pk)
+
+
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+def update_totals_on_item_change(sender, instance, **kwargs):
+    """Recalcula subtotal e total do pedido sempre que um item é incluído, alterado ou removido."""
+    recalculate_order_totals(instance.order_id)
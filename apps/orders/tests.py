@@ -1,3 +1,390 @@
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.forms import inlineformset_factory
 from django.test import TestCase
+from reportlab.platypus import Paragraph
+
+from apps.orders.admin import OrderItemInlineFormSet
+from apps.orders.models import Order, OrderItem, OrderStatusTransition
+from apps.orders.picking import generate_pick_list, location_sort_key, pick_list_lines
+from apps.orders.services import CONFIRM_PARTIAL, cancel_orders, confirm_orders
+from apps.products.models import Product
+from apps.stock.models import Stock, StockMovement, StockReservation
+from apps.stock.tests import StockTestMixin
+
+
+class OrderStockDeductionTests(StockTestMixin, TestCase):
+    """Testa a baixa de estoque disparada pela confirmação do pedido."""
+
+    def setUp(self):
+        patcher = patch(
+            "apps.employees.models.Employee.get_system_user", return_value=self.user
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def create_order(self, *lines):
+        order = Order.objects.create()
+        for product, quantity in lines:
+            OrderItem.objects.create(order=order, product=product, quantity=quantity, unit_price=150)
+        return order
+
+    def test_confirmation_deducts_stock_once(self):
+        order = self.create_order((self.sofa, 1), (self.chair, 2), (self.sofa, 1))
+        order.status = "confirmed"
+        order.save()
+        order.save()  # Salvar de novo não pode baixar o estoque outra vez
+
+        self.assertEqual(Stock.objects.get(product=self.sofa).quantity, 3)
+        self.assertEqual(Stock.objects.get(product=self.chair).quantity, 8)
+        self.assertEqual(StockMovement.objects.filter(reference_id=f"ORDER-{order.pk}").count(), 2)
+        self.assertTrue(Order.objects.get(pk=order.pk)._stock_updated)
+
+    def test_confirmation_with_insufficient_stock_fails(self):
+        order = self.create_order((self.sofa, 3))
+        Stock.objects.filter(product=self.sofa).update(quantity=2)  # ex: avaria após a reserva
+        order.status = "confirmed"
+        with self.assertRaises(ValidationError):
+            order.save()
+        self.assertEqual(Stock.objects.get(product=self.sofa).quantity, 2)
+
+
+class OrderReservationTests(StockTestMixin, TestCase):
+    """Testa as reservas feitas pelos itens de pedidos em rascunho."""
+
+    def test_draft_items_reserve_stock(self):
+        order = Order.objects.create()
+        item = OrderItem.objects.create(order=order, product=self.sofa, quantity=2, unit_price=150)
+        self.assertEqual(StockReservation.objects.get(order=order, status="active").quantity, 2)
+
+        item.quantity = 4
+        item.save()
+        reservation = StockReservation.objects.get(order=order, status="active")
+        self.assertEqual(reservation.quantity, 4)
+        self.assertIsNotNone(reservation.expires_at)
+
+        other = Order.objects.create()
+        with self.assertRaises(ValidationError):
+            OrderItem.objects.create(order=other, product=self.sofa, quantity=2, unit_price=150)
+        # A reserva falhou: o item também não foi gravado
+        self.assertFalse(OrderItem.objects.filter(order=other).exists())
+        self.assertFalse(StockReservation.objects.filter(order=other).exists())
+
+        item.delete()
+        self.assertFalse(StockReservation.objects.filter(order=order, status="active").exists())
+
+    def test_admin_inline_reports_shortage_as_form_error(self):
+        OrderItem.objects.create(order=Order.objects.create(), product=self.sofa, quantity=4, unit_price=150)
+        order = Order.objects.create()
+        ItemFormSet = inlineformset_factory(
+            Order, OrderItem, formset=OrderItemInlineFormSet, fields=("product", "quantity", "unit_price", "discount")
+        )
+        data = {
+            "items-TOTAL_FORMS": "2",
+            "items-INITIAL_FORMS": "0",
+            "items-0-product": self.sofa.pk,
+            "items-0-quantity": "1",
+            "items-0-unit_price": "150",
+            "items-0-discount": "0",
+            "items-1-product": self.sofa.pk,
+            "items-1-quantity": "1",
+            "items-1-unit_price": "150",
+            "items-1-discount": "0",
+        }
+
+        formset = ItemFormSet(data, instance=order, prefix="items")
+        self.assertFalse(formset.is_valid())
+        self.assertIn("Disponível: 1, Necessário: 2", formset.non_form_errors()[0])
+
+        data["items-TOTAL_FORMS"] = "1"
+        self.assertTrue(ItemFormSet(data, instance=order, prefix="items").is_valid())
+
+    def test_cancelling_a_draft_releases_its_reservations(self):
+        order = Order.objects.create()
+        OrderItem.objects.create(order=order, product=self.sofa, quantity=2, unit_price=150)
+        order.status = "cancelled"
+        order.save()
+        self.assertEqual(StockReservation.objects.get(order=order).status, "released")
+
+
+class OrderTotalsTests(StockTestMixin, TestCase):
+    """Testa o recálculo de subtotal/total feito no banco a partir dos itens."""
+
+    def assertTotals(self, order, subtotal, total):
+        order.refresh_from_db(fields=["subtotal", "total"])
+        self.assertEqual(order.subtotal, Decimal(subtotal))
+        self.assertEqual(order.total, Decimal(total))
+
+    def test_item_changes_update_totals(self):
+        order = Order.objects.create(discount=Decimal("10.00"), tax=Decimal("5.00"))
+        item = OrderItem.objects.create(order=order, product=self.sofa, quantity=2, unit_price=100)
+        OrderItem.objects.create(
+            order=order, product=self.chair, quantity=1, unit_price=50, discount=Decimal("5.00")
+        )
+        self.assertTotals(order, "245.00", "240.00")
+
+        item.delete()
+        self.assertTotals(order, "45.00", "40.00")
+
+    def test_order_discount_change_updates_total(self):
+        order = Order.objects.create()
+        OrderItem.objects.create(order=order, product=self.sofa, quantity=1, unit_price=100)
+        order.refresh_from_db()
+        order.discount = Decimal("20.00")
+        order.save()
+        self.assertTotals(order, "100.00", "80.00")
+
+    def test_recalculate_command_fixes_historical_orders(self):
+        order = Order.objects.create()
+        OrderItem.objects.create(order=order, product=self.sofa, quantity=3, unit_price=100)
+        empty = Order.objects.create()
+        Order.objects.filter(pk__in=[order.pk, empty.pk]).update(subtotal=1, total=1)
+
+        call_command("recalculate_order_totals", batch_size=1, stdout=StringIO())
+
+        self.assertTotals(order, "300.00", "300.00")
+        self.assertTotals(empty, "0.00", "0.00")
+
+
+class OrderTransitionTests(StockTestMixin, TestCase):
+    """Testa as transições de status com compare-and-swap."""
+
+    def setUp(self):
+        patcher = patch(
+            "apps.employees.models.Employee.get_system_user", return_value=self.user
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.order = Order.objects.create()
+        OrderItem.objects.create(order=self.order, product=self.sofa, quantity=2, unit_price=150)
+
+    def test_confirm_deducts_stock_and_records_history(self):
+        self.order.confirm(user=self.user)
+
+        self.assertEqual(self.order.status, "confirmed")
+        self.assertEqual(Stock.objects.get(product=self.sofa).quantity, 3)
+        history = self.order.status_history.get()
+        self.assertEqual((history.from_status, history.to_status), ("draft", "confirmed"))
+        self.assertEqual(history.user, self.user)
+
+    def test_stale_instance_cannot_repeat_transition(self):
+        stale = Order.objects.get(pk=self.order.pk)
+        self.order.confirm()
+
+        with self.assertRaises(ValidationError):
+            stale.confirm()
+        self.assertEqual(Stock.objects.get(product=self.sofa).quantity, 3)
+        self.assertEqual(StockMovement.objects.filter(reference_id=f"ORDER-{self.order.pk}").count(), 1)
+        self.assertEqual(self.order.status_history.count(), 1)
+
+    def test_invalid_transition_is_rejected(self):
+        with self.assertRaises(ValidationError):
+            self.order.ship()
+        self.assertEqual(Order.objects.get(pk=self.order.pk).status, "draft")
+
+    def test_failed_side_effect_rolls_back_status(self):
+        Stock.objects.filter(product=self.sofa).update(quantity=1)
+        with self.assertRaises(ValidationError):
+            Order.objects.get(pk=self.order.pk).confirm()
+        order = Order.objects.get(pk=self.order.pk)
+        self.assertEqual(order.status, "draft")
+        self.assertFalse(order._stock_updated)
+        self.assertFalse(order.status_history.exists())
+
+    def test_full_lifecycle_and_draft_cancellation(self):
+        self.order.confirm()
+        self.order.ship()
+        self.order.deliver()
+        self.order.return_order(reason="Defeito")
+        self.assertEqual(
+            list(self.order.status_history.values_list("to_status", flat=True)),
+            ["confirmed", "shipped", "delivered", "returned"],
+        )
+        self.assertEqual(Order.objects.get(pk=self.order.pk).return_reason, "Defeito")
+
+        draft = Order.objects.create()
+        OrderItem.objects.create(order=draft, product=self.chair, quantity=1, unit_price=50)
+        draft.cancel(reason="Desistência")
+        self.assertFalse(StockReservation.objects.filter(order=draft, status="active").exists())
+
+
+class OrderRestockTests(StockTestMixin, TestCase):
+    """Testa o estorno de estoque em cancelamentos e devoluções."""
+
+    def setUp(self):
+        patcher = patch(
+            "apps.employees.models.Employee.get_system_user", return_value=self.user
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def create_confirmed_order(self, quantity=2):
+        order = Order.objects.create()
+        OrderItem.objects.create(order=order, product=self.sofa, quantity=quantity, unit_price=150)
+        OrderItem.objects.create(order=order, product=self.chair, quantity=1, unit_price=50)
+        order.confirm()
+        return order
+
+    def test_cancel_confirmed_order_restocks_once(self):
+        order = self.create_confirmed_order()
+        order.cancel(reason="Cliente desistiu")
+
+        self.assertEqual(Stock.objects.get(product=self.sofa).quantity, 5)
+        self.assertEqual(Stock.objects.get(product=self.chair).quantity, 10)
+        self.assertEqual(
+            StockMovement.objects.filter(reference_id=f"ORDER-{order.pk}", movement_type="CANCELLATION").count(), 2
+        )
+        self.assertFalse(Order.objects.get(pk=order.pk)._stock_updated)
+
+    def test_return_restocks_with_return_movements(self):
+        order = self.create_confirmed_order()
+        order.ship()
+        order.return_order(reason="Avaria no transporte")
+
+        self.assertEqual(Stock.objects.get(product=self.sofa).quantity, 5)
+        self.assertEqual(StockMovement.objects.filter(movement_type="RETURN").count(), 2)
+
+    def test_cancellation_through_save_restocks_once(self):
+        order = self.create_confirmed_order()
+        order.status = "cancelled"
+        order.save()
+        order.save()
+
+        self.assertEqual(Stock.objects.get(product=self.sofa).quantity, 5)
+        self.assertEqual(StockMovement.objects.filter(movement_type="CANCELLATION").count(), 2)
+
+    def test_mass_cancellation(self):
+        confirmed = [self.create_confirmed_order(quantity=1) for _ in range(2)]
+        draft = Order.objects.create()
+        OrderItem.objects.create(order=draft, product=self.sofa, quantity=1, unit_price=150)
+        shipped = self.create_confirmed_order(quantity=1)
+        shipped.ship()
+
+        cancelled = cancel_orders(Order.objects.all(), reason="Fechamento", batch_size=2)
+
+        self.assertEqual(cancelled, 3)
+        self.assertEqual(Order.objects.get(pk=shipped.pk).status, "shipped")
+        self.assertEqual(Stock.objects.get(product=self.sofa).quantity, 4)
+        self.assertEqual(Stock.objects.get(product=self.chair).quantity, 9)
+        self.assertFalse(StockReservation.objects.filter(order=draft, status="active").exists())
+        self.assertEqual(
+            OrderStatusTransition.objects.filter(to_status="cancelled").count(), 3
+        )
+        for order in confirmed:
+            self.assertEqual(Order.objects.get(pk=order.pk).status, "cancelled")
+
+
+class BulkConfirmationTests(StockTestMixin, TestCase):
+    """Testa a confirmação de vários pedidos em lote."""
+
+    def create_draft(self, *lines):
+        order = Order.objects.create()
+        for product, quantity in lines:
+            OrderItem.objects.create(order=order, product=product, quantity=quantity, unit_price=150)
+        return order
+
+    def test_confirms_all_orders_with_fixed_queries(self):
+        orders = [self.create_draft((self.sofa, 1), (self.chair, 2)) for _ in range(4)]
+        queryset = Order.objects.filter(pk__in=[order.pk for order in orders])
+
+        # pedidos + itens + estoques + reservas + 5 gravações em lote (+ savepoint)
+        # + 2 dos locais de estoque + 3 da valorização (situação, camadas, entradas), para qualquer N
+        with self.assertNumQueries(16):
+            result = confirm_orders(queryset, user=self.user)
+
+        self.assertEqual(result["confirmed"], [order.pk for order in orders])
+        self.assertEqual(Stock.objects.get(product=self.sofa).quantity, 1)
+        self.assertEqual(Stock.objects.get(product=self.chair).quantity, 2)
+        self.assertEqual(StockMovement.objects.filter(movement_type="OUT").count(), 8)
+        self.assertEqual(queryset.filter(status="confirmed", _stock_updated=True).count(), 4)
+        self.assertFalse(StockReservation.objects.filter(status="active").exists())
+        self.assertEqual(OrderStatusTransition.objects.count(), 4)
+
+    def test_all_or_nothing_rejects_the_batch(self):
+        first = self.create_draft((self.sofa, 3))
+        second = self.create_draft((self.sofa, 2))
+        Stock.objects.filter(product=self.sofa).update(quantity=4)
+
+        with self.assertRaises(ValidationError):
+            confirm_orders(Order.objects.all(), user=self.user)
+        self.assertEqual(Order.objects.filter(status="draft").count(), 2)
+        self.assertEqual(Stock.objects.get(product=self.sofa).quantity, 4)
+
+        result = confirm_orders(Order.objects.all(), user=self.user, policy=CONFIRM_PARTIAL)
+        self.assertEqual(result["confirmed"], [first.pk])
+        self.assertIn(second.pk, result["rejected"])
+        self.assertEqual(Stock.objects.get(product=self.sofa).quantity, 1)
+        self.assertEqual(Order.objects.get(pk=second.pk).status, "draft")
+
+
+class OrderNumberTests(TestCase):
+    """Testa a numeração sequencial dos pedidos."""
+
+    def test_orders_get_sequential_numbers(self):
+        first, second = Order.objects.create(), Order.objects.create()
+        self.assertEqual(second.number, first.number + 1)
+        self.assertEqual(first.formatted_number, f"{first.number:06d}")
+
+
+class OrderSystemUserTests(StockTestMixin, TestCase):
+    """Movimentações automáticas ficam registradas em nome do usuário sistema."""
+
+    def test_confirmation_without_user_uses_system_account(self):
+        order = Order.objects.create()
+        OrderItem.objects.create(order=order, product=self.sofa, quantity=1, unit_price=150)
+        order.status = "confirmed"
+        order.save()
+
+        movement = StockMovement.objects.get(reference_id=f"ORDER-{order.pk}")
+        self.assertTrue(movement.user.is_system_user)
+
+
+class PickListTests(StockTestMixin, TestCase):
+    """Testa a lista de separação consolidada."""
+
+    def setUp(self):
+        Stock.objects.filter(product=self.sofa).update(location="B-10-1")
+        Stock.objects.filter(product=self.chair).update(location="B-2-3")
+        self.lamp = self.create_product("Luminária", stock=4)
+        self.first = Order.objects.create()
+        OrderItem.objects.create(order=self.first, product=self.sofa, quantity=1, unit_price=150)
+        OrderItem.objects.create(order=self.first, product=self.lamp, quantity=1, unit_price=150)
+        self.second = Order.objects.create()
+        OrderItem.objects.create(order=self.second, product=self.sofa, quantity=2, unit_price=150)
+        OrderItem.objects.create(order=self.second, product=self.chair, quantity=3, unit_price=150)
+
+    def test_lines_are_aggregated_and_sorted_by_location(self):
+        with self.assertNumQueries(1):
+            lines = pick_list_lines([self.first.pk, self.second.pk])
+        self.assertEqual(
+            [(line["product_id"], line["quantity"], line["orders"]) for line in lines],
+            [(self.chair.pk, 3, 1), (self.sofa.pk, 3, 2), (self.lamp.pk, 1, 1)],
+        )
+
+    def test_location_key_is_natural(self):
+        self.assertLess(location_sort_key("Corredor 3 / Prat. 12"), location_sort_key("corredor 12 / prat. 1"))
+        self.assertLess(location_sort_key("A-9"), location_sort_key(""))
+
+    def test_only_confirmed_orders_are_printed(self):
+        self.assertEqual(generate_pick_list(Order.objects.all()), (None, 0))
+        Order.objects.filter(pk=self.second.pk).update(status="confirmed")
+        with self.assertNumQueries(2):
+            pdf_file, count = generate_pick_list(Order.objects.all())
+        self.assertEqual(count, 1)
+        self.assertTrue(pdf_file.read().startswith(b"%PDF"))
 
-# Create your tests here.
+    def test_markup_characters_in_description_are_escaped(self):
+        Product.objects.filter(pk=self.lamp.pk).update(description="Rack 1,80m c/ 2 portas <b & Cadeira <Gamer>")
+        Order.objects.filter(pk=self.first.pk).update(status="confirmed")
+        with patch("apps.orders.picking.Paragraph", wraps=Paragraph) as paragraph:
+            pdf_file, count = generate_pick_list(Order.objects.all())
+        self.assertEqual(count, 1)
+        self.assertTrue(pdf_file.read().startswith(b"%PDF"))
+        self.assertIn(
+            "Rack 1,80m c/ 2 portas &lt;b &amp; Cadeira &lt;Gamer&gt;",
+            [call.args[0] for call in paragraph.call_args_list],
+        )
@@ -1,9 +1,11 @@
+from django.conf import settings
 from django.db import models
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, RegexValidator
 from decimal import Decimal
 from django.db import transaction
 from django.db.models import ImageField
+from apps.sequences.services import next_value
 
 
 class Category(models.Model):
@@ -450,7 +452,6 @@ class Product(models.Model):
         Validações:
         1. Subcategoria pertence à categoria
         2. Combinação description+model+brand+color é única na categoria
-        3. Geração segura de internal_code
         """
         super().clean()
         
@@ -476,32 +477,39 @@ class Product(models.Model):
             raise ValidationError(
                 {'description': 'Já existe um produto com esta combinação de descrição, modelo, marca e cor nesta categoria.'}
             )
-        
-        # 3. Geração do código interno
-        if not self.internal_code:
-            self._generate_internal_code()
 
     def _generate_internal_code(self):
-        """Gera um código interno único no formato CCC[SSS]NNNN."""
-        with transaction.atomic():
-            prefix = self.category.abbreviation
-            if self.subcategory:
-                prefix += self.subcategory.abbreviation
-            
-            last_code = (
-                Product.objects.filter(internal_code__startswith=prefix)
-                .order_by('internal_code')
-                .values_list('internal_code', flat=True)
-                .last()
-            )
-            
-            last_num = int(last_code[len(prefix):]) if last_code else 0
-            self.internal_code = f"{prefix}{last_num + 1:04d}"
+        """
+        Gera um código interno único no formato CCC[SSS]NNNN.
+
+        O número vem da série `product:<prefixo>` (apps.sequences), alocada de
+        forma atômica no banco, em vez de ler o último código existente.
+        Na primeira alocação de um prefixo, a série parte do maior número já usado.
+        """
+        prefix = self.category.abbreviation
+        if self.subcategory:
+            prefix += self.subcategory.abbreviation
+
+        number = next_value(
+            f"product:{prefix}",
+            initial=lambda: self._last_code_number(prefix),
+            block_size=settings.SEQUENCE_BLOCK_SIZE,
+        )
+        self.internal_code = f"{prefix}{number:04d}"
+
+    @staticmethod
+    def _last_code_number(prefix):
+        """Maior número já usado com o prefixo (ignora prefixos mais longos, ex: MOV x MOVSOF)."""
+        codes = Product.objects.filter(internal_code__regex=rf'^{prefix}[0-9]+$').values_list('internal_code', flat=True)
+        return max((int(code[len(prefix):]) for code in codes), default=0)
 
     def save(self, *args, **kwargs):
-        """Garante validação completa antes de salvar."""
-        self.full_clean()
-        super().save(*args, **kwargs)
+        """Garante validação completa antes de salvar (o código interno só é gerado aqui)."""
+        with transaction.atomic():
+            self.full_clean()
+            if not self.internal_code:
+                self._generate_internal_code()
+            super().save(*args, **kwargs)
 
     @property
     def profit_margin(self):
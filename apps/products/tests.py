@@ -1,3 +1,36 @@
+from decimal import Decimal
+
 from django.test import TestCase
 
-# Create your tests here.
+from apps.products.models import Category, Product, Subcategory
+from apps.sequences.models import Sequence
+
+
+class InternalCodeTests(TestCase):
+    """Testa a geração do código interno pelas séries de numeração."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(abbreviation="MOV", name="Móveis")
+        cls.subcategory = Subcategory.objects.create(category=cls.category, abbreviation="SOF", name="Sofás")
+
+    def create_product(self, description, subcategory=None):
+        return Product.objects.create(
+            category=self.category,
+            subcategory=subcategory,
+            description=description,
+            cost_price=Decimal("100.00"),
+            sale_price=Decimal("150.00"),
+        )
+
+    def test_codes_are_sequential_per_prefix(self):
+        self.assertEqual(self.create_product("Mesa").internal_code, "MOV0001")
+        self.assertEqual(self.create_product("Sofá 2L", self.subcategory).internal_code, "MOVSOF0001")
+        self.assertEqual(self.create_product("Cadeira").internal_code, "MOV0002")
+
+    def test_new_series_continues_after_existing_codes(self):
+        product = self.create_product("Mesa")
+        Product.objects.filter(pk=product.pk).update(internal_code="MOV9999")
+        Sequence.objects.all().delete()  # ex: base anterior à tabela de séries
+
+        self.assertEqual(self.create_product("Cadeira").internal_code, "MOV10000")
@@ -0,0 +1,31 @@
+# reports/backends/__init__.py
+"""
+Registro dos geradores de relatório por formato de saída.
+
+Cada formato aponta para o caminho de uma função `gerador(report, queryset, form)`
+que devolve a `HttpResponse` do arquivo. Os módulos só são importados no primeiro
+uso: bibliotecas pesadas (pandas/numpy, openpyxl, reportlab) não são carregadas
+na inicialização dos workers, apenas quando alguém exporta naquele formato.
+"""
+from functools import lru_cache
+from django.utils.module_loading import import_string
+
+REPORT_BACKENDS = {
+    'excel': 'apps.reports.backends.spreadsheet.generate_excel',
+    'csv': 'apps.reports.backends.spreadsheet.generate_csv',
+    'json': 'apps.reports.backends.json_stream.generate_json',
+    'ndjson': 'apps.reports.backends.json_stream.generate_ndjson',
+    'pdf': 'apps.reports.backends.pdf.generate_pdf',
+}
+
+
+@lru_cache(maxsize=None)
+def get_backend(output_format):
+    """
+    Retorna o gerador registrado para `output_format`, importando seu módulo
+    na primeira chamada. Retorna None para formatos desconhecidos.
+    """
+    backend_path = REPORT_BACKENDS.get(output_format)
+    if backend_path is None:
+        return None
+    return import_string(backend_path)
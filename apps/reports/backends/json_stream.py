@@ -0,0 +1,32 @@
+# reports/backends/json_stream.py
+from django.http import StreamingHttpResponse
+
+from apps.reports.streaming import iter_json_array, iter_ndjson
+
+
+def generate_json(report, queryset, form):
+    """
+    Gera o relatório em formato JSON (array) usando dados intermediários (chaves técnicas).
+
+    O array é serializado e enviado em blocos (`StreamingHttpResponse`)
+    enquanto o QuerySet é percorrido, sem carregar todos os registros.
+    """
+    response = StreamingHttpResponse(
+        iter_json_array(report.iter_data_intermediate(queryset)),
+        content_type='application/json',
+    )
+    response['Content-Disposition'] = f'attachment; filename="{report.get_filename("json")}"'
+    return response
+
+
+def generate_ndjson(report, queryset, form):
+    """
+    Gera o relatório em formato NDJSON (um registro por linha), em streaming.
+    Indicado para scripts de BI que processam o arquivo linha a linha.
+    """
+    response = StreamingHttpResponse(
+        iter_ndjson(report.iter_data_intermediate(queryset)),
+        content_type='application/x-ndjson',
+    )
+    response['Content-Disposition'] = f'attachment; filename="{report.get_filename("ndjson")}"'
+    return response
@@ -0,0 +1,150 @@
+# reports/backends/pdf.py
+import tempfile
+from datetime import datetime
+from xml.sax.saxutils import escape
+from django.http import FileResponse
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import cm
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+# Quantidade de linhas por tabela (flowable) entregue ao reportlab a cada passo
+PDF_TABLE_CHUNK_ROWS = 200
+
+
+class _LazyStory(list):
+    """
+    Lista de flowables do reportlab alimentada sob demanda.
+
+    O `BaseDocTemplate.build` consome a story pela frente (`del flowables[0]`)
+    e verifica `len(flowables)` a cada passo. Esta lista só busca o próximo
+    bloco de flowables no gerador quando fica vazia, de modo que apenas o
+    bloco corrente (e o restante de uma tabela quebrada entre páginas)
+    permanece em memória durante a montagem do documento.
+    """
+
+    def __init__(self, chunks):
+        super().__init__()
+        self._chunks = iter(chunks)
+
+    def __len__(self):
+        if not super().__len__():
+            self.extend(next(self._chunks, ()))
+        return super().__len__()
+
+
+def generate_pdf(report, queryset, form):
+    """
+    Gera o relatório em formato PDF com o reportlab (platypus), página a página.
+
+    Os registros são lidos do banco em blocos (`report.iter_data_intermediate`)
+    e convertidos em tabelas de até `PDF_TABLE_CHUNK_ROWS` linhas somente
+    quando o reportlab precisa delas (`_LazyStory`), então a story completa
+    nunca existe em memória. Cada página recebe o cabeçalho do relatório e o
+    cabeçalho das colunas; a primeira traz também o bloco de filtros
+    aplicados. O documento é gravado em um arquivo temporário e enviado
+    via `FileResponse`, que o lê em blocos e o remove ao final.
+    """
+    generated_at = datetime.now()
+    page_size = landscape(A4)
+    margin = 1.5 * cm
+    header_height = 1.6 * cm
+    column_widths = [width for _, _, width in report.pdf_columns]
+    header_table = _build_table([[label for _, label, _ in report.pdf_columns]], column_widths, header=True)
+
+    def draw_page_header(canvas, doc):
+        canvas.saveState()
+        top = page_size[1] - margin
+        canvas.setFont('Helvetica-Bold', 12)
+        canvas.drawString(margin, top - 12, report.report_title)
+        canvas.setFont('Helvetica', 8)
+        canvas.drawString(margin, top - 24, f'Gerado em: {generated_at.strftime("%d/%m/%Y %H:%M:%S")}')
+        canvas.drawRightString(page_size[0] - margin, top - 24, f'Página {doc.page}')
+        if doc.page > 1:
+            # Nas páginas seguintes o cabeçalho das colunas fica fora do frame
+            header_table.wrapOn(canvas, doc.width, header_height)
+            header_table.drawOn(canvas, doc.leftMargin, doc.bottomMargin + doc.height)
+        canvas.restoreState()
+
+    pdf_file = tempfile.TemporaryFile()
+    doc = SimpleDocTemplate(
+        pdf_file,
+        pagesize=page_size,
+        leftMargin=margin,
+        rightMargin=margin,
+        topMargin=margin + header_height,
+        bottomMargin=margin,
+        title=report.report_title,
+    )
+    story = _LazyStory(_iter_flowables(report, queryset, form, header_table, column_widths))
+    doc.build(story, onFirstPage=draw_page_header, onLaterPages=draw_page_header)
+    pdf_file.seek(0)
+
+    return FileResponse(
+        pdf_file,
+        as_attachment=True,
+        filename=report.get_filename('pdf'),
+        content_type='application/pdf',
+    )
+
+
+def _iter_flowables(report, queryset, form, header_table, column_widths):
+    """
+    Gera os blocos de flowables do PDF: primeiro o bloco de filtros e o
+    cabeçalho das colunas, depois uma tabela para cada bloco de registros.
+    """
+    styles = getSampleStyleSheet()
+    intro = []
+    applied_filters_info = report.get_applied_filters_info(form)
+    if applied_filters_info:
+        intro.append(Paragraph('<b>Filtros Aplicados:</b>', styles['Normal']))
+        # Os valores dos filtros são digitados pelo usuário: escapados para não virarem marcação do reportlab
+        intro.extend(Paragraph(escape(filter_info), styles['Normal']) for filter_info in applied_filters_info)
+    else:
+        intro.append(Paragraph('Nenhum filtro aplicado explicitamente.', styles['Normal']))
+    intro.append(Spacer(1, 0.4 * cm))
+    intro.append(header_table)
+    yield intro
+
+    rows = []
+    has_rows = False
+    for row in report.iter_data_intermediate(queryset):
+        rows.append(_build_row(report.get_pdf_row(row), report.pdf_columns))
+        if len(rows) == PDF_TABLE_CHUNK_ROWS:
+            yield [_build_table(rows, column_widths)]
+            rows = []
+            has_rows = True
+    if rows:
+        yield [_build_table(rows, column_widths)]
+    elif not has_rows:
+        yield [Paragraph('Nenhum registro encontrado com os filtros informados.', styles['Normal'])]
+
+
+def _build_row(row, pdf_columns):
+    """Monta uma linha da tabela do PDF, truncando textos maiores que a coluna."""
+    cells = []
+    for tech_key, _, width in pdf_columns:
+        value = row.get(tech_key)
+        text = str(value) if value not in (None, '') else '-'
+        max_chars = int(width / 3.6)
+        if len(text) > max_chars:
+            text = text[:max_chars - 1] + '…'
+        cells.append(text)
+    return cells
+
+
+def _build_table(rows, column_widths, header=False):
+    """Cria uma tabela do PDF com larguras fixas (cabeçalho ou bloco de linhas)."""
+    table = Table(rows, colWidths=column_widths, hAlign='LEFT')
+    style = [
+        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold' if header else 'Helvetica'),
+        ('FONTSIZE', (0, 0), (-1, -1), 7),
+        ('TOPPADDING', (0, 0), (-1, -1), 2),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+        ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
+    ]
+    if header:
+        style.append(('BACKGROUND', (0, 0), (-1, -1), colors.lightgrey))
+    table.setStyle(TableStyle(style))
+    return table
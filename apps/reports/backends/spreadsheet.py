@@ -0,0 +1,90 @@
+# reports/backends/spreadsheet.py
+import pandas as pd
+from io import BytesIO, StringIO
+from datetime import datetime
+from django.http import HttpResponse
+
+
+def _build_rows(report, intermediate_data):
+    """
+    Converte os dados intermediários para linhas com cabeçalhos em português,
+    seguindo o mapeamento `report.column_map` (chave técnica -> cabeçalho).
+    """
+    rows = []
+    for row in intermediate_data:
+        formatted_row = {}
+        for tech_key, pt_header in report.column_map.items():
+             # Acessa o valor usando a chave técnica
+             value = row.get(tech_key)
+             formatted_row[pt_header] = value if value is not None else '-' # Usa '-' para None/vazio
+        rows.append(formatted_row)
+    return rows
+
+
+def generate_excel(report, queryset, form):
+    """
+    Gera o relatório em formato Excel (xlsx) com filtros e data,
+    formatando chaves para português.
+    """
+    intermediate_data = report.prepare_data_intermediate(queryset)
+    df = pd.DataFrame(_build_rows(report, intermediate_data)) # Cria o DataFrame a partir dos dados formatados para Excel
+
+    buffer = BytesIO()
+
+    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+        excel_content = []
+
+        excel_content.append([report.report_title])
+        excel_content.append([f'Gerado em: {datetime.now().strftime("%d/%m/%Y %H:%M:%S")}'])
+        excel_content.append([])
+
+        applied_filters_info = report.get_applied_filters_info(form)
+
+        if applied_filters_info:
+            excel_content.append(['Filtros Aplicados:'])
+            for filter_info in applied_filters_info:
+                 excel_content.append([filter_info])
+        else:
+             excel_content.append(['Nenhum filtro aplicado explicitamente.'])
+
+
+        excel_content.append([])
+
+        # Adiciona o cabeçalho das colunas dos dados (nomes das colunas do DataFrame)
+        excel_content.append(df.columns.tolist())
+
+        # Adiciona as linhas de dados do DataFrame
+        excel_content.extend(df.values.tolist())
+
+        # Criar um único DataFrame a partir do conteúdo completo
+        combined_df = pd.DataFrame(excel_content)
+
+        # Escrever o DataFrame combinado para o Excel
+        combined_df.to_excel(writer, index=False, header=False, sheet_name=report.sheet_name, startrow=0)
+
+
+    excel_value = buffer.getvalue()
+    buffer.close()
+
+    response = HttpResponse(excel_value, content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+    response['Content-Disposition'] = f'attachment; filename="{report.get_filename("xlsx")}"'
+    return response
+
+
+def generate_csv(report, queryset, form):
+    """
+    Gera o relatório em formato CSV usando dados intermediários,
+    formatando chaves para português.
+    """
+    intermediate_data = report.prepare_data_intermediate(queryset)
+    df = pd.DataFrame(_build_rows(report, intermediate_data)) # Cria o DataFrame a partir dos dados formatados para CSV
+
+    buffer = StringIO()
+    df.to_csv(buffer, index=False, encoding='utf-8-sig', sep=';', decimal='.')
+
+    csv_value = buffer.getvalue()
+    buffer.close()
+
+    response = HttpResponse(csv_value, content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{report.get_filename("csv")}"'
+    return response
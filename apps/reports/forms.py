@@ -2,6 +2,7 @@
 from django import forms
 from django.db.models import Q
 from apps.customers.models import Customer
+from core.lookups import digits_lookup
 from django.core.validators import RegexValidator
 import re
 
@@ -13,6 +14,8 @@ class CustomerReportForm(forms.Form):
         ('excel', 'Excel (xlsx)'),
         ('csv', 'CSV'),
         ('json', 'JSON'), # <-- CORRIGIDO: Opção JSON adicionada de volta aqui
+        ('ndjson', 'NDJSON (um registro por linha)'),
+        ('pdf', 'PDF'),
     ]
 
     # Campos de Filtro (mantidos os mesmos)
@@ -108,10 +111,11 @@ class CustomerReportForm(forms.Form):
         if customer_type != '' and customer_type is not None:
             queryset = queryset.filter(customer_type=customer_type)
 
+        # CPF/CNPJ e telefone são armazenados só com dígitos: usa lookups indexáveis
         if data.get('tax_id'):
-            queryset = queryset.filter(tax_id__icontains=data['tax_id'])
+            queryset = queryset.filter(digits_lookup('tax_id', data['tax_id'], full_length=14))
         if data.get('phone'):
-            queryset = queryset.filter(phone__icontains=data['phone'])
+            queryset = queryset.filter(digits_lookup('phone', data['phone'], full_length=11))
         if data.get('email'):
             queryset = queryset.filter(email__icontains=data['email'])
 
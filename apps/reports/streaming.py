@@ -0,0 +1,60 @@
+# reports/streaming.py
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+
+# Quantidade de registros serializados antes de entregar um bloco ao servidor
+STREAM_ROWS_PER_CHUNK = 500
+
+
+def _dumps(row):
+    return json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False)
+
+
+def iter_ndjson(rows, rows_per_chunk=STREAM_ROWS_PER_CHUNK):
+    """
+    Serializa `rows` como NDJSON (um objeto JSON por linha), em blocos.
+
+    Args:
+        rows: Iterável de dicionários (ex: gerador sobre `QuerySet.iterator()`).
+        rows_per_chunk: Quantidade de registros agrupados em cada bloco emitido.
+
+    Yields:
+        str: Blocos de texto contendo `rows_per_chunk` linhas completas.
+    """
+    buffer = []
+    for row in rows:
+        buffer.append(_dumps(row))
+        if len(buffer) == rows_per_chunk:
+            yield '\n'.join(buffer) + '\n'
+            buffer = []
+    if buffer:
+        yield '\n'.join(buffer) + '\n'
+
+
+def iter_json_array(rows, rows_per_chunk=STREAM_ROWS_PER_CHUNK):
+    """
+    Serializa `rows` como um array JSON bem formado, emitido em blocos.
+
+    O colchete de abertura é enviado imediatamente (primeiro byte rápido) e
+    os separadores são controlados aqui, de modo que a concatenação de todos
+    os blocos é sempre um JSON válido, inclusive quando `rows` está vazio.
+
+    Args:
+        rows: Iterável de dicionários (ex: gerador sobre `QuerySet.iterator()`).
+        rows_per_chunk: Quantidade de registros agrupados em cada bloco emitido.
+
+    Yields:
+        str: Blocos de texto do array JSON.
+    """
+    yield '['
+    buffer = []
+    separator = ''
+    for row in rows:
+        buffer.append(_dumps(row))
+        if len(buffer) == rows_per_chunk:
+            yield separator + ','.join(buffer)
+            separator = ','
+            buffer = []
+    if buffer:
+        yield separator + ','.join(buffer)
+    yield ']'
@@ -1,3 +1,98 @@
-from django.test import TestCase
+import json
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory, TestCase
+from validate_docbr import CPF
+
+from apps.customers.models import Customer
+from apps.reports.backends import REPORT_BACKENDS, get_backend
+from apps.reports.streaming import iter_json_array, iter_ndjson
+from apps.reports.views import CustomerReportView
+
+
+class CustomerReportPdfTests(TestCase):
+    """Testa a geração do relatório de clientes em PDF."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="relatorios", password="senha-teste")
+        cpfs = set()
+        cpf_generator = CPF()
+        while len(cpfs) < 450:
+            cpfs.add(cpf_generator.generate())
+        Customer.objects.bulk_create(
+            Customer(customer_type="IND", full_name=f"Cliente {index:04d}", tax_id=tax_id)
+            for index, tax_id in enumerate(sorted(cpfs))
+        )
+
+    def _post(self, data):
+        request = RequestFactory().post("/reports/customers/", data)
+        request.user = self.user
+        return CustomerReportView.as_view()(request)
+
+    def test_pdf_report_is_streamed_as_attachment(self):
+        """O PDF é enviado como anexo, lido de um arquivo temporário."""
+        response = self._post({"output_format": "pdf", "is_active": "True", "is_vip": ""})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        self.assertIn("attachment;", response["Content-Disposition"])
+        content = b"".join(response.streaming_content)
+        self.assertTrue(content.startswith(b"%PDF"))
+        # 450 linhas não cabem em uma página: o documento deve ter várias páginas
+        self.assertGreater(content.count(b"/Type /Page\n"), 1)
+
+    def test_pdf_report_without_results(self):
+        """Um filtro sem resultados ainda gera um PDF válido."""
+        response = self._post({"output_format": "pdf", "full_name": "inexistente", "is_vip": ""})
+        content = b"".join(response.streaming_content)
+        self.assertTrue(content.startswith(b"%PDF"))
+
+    def test_pdf_report_escapes_filter_values(self):
+        """Valores de filtro com `<` e `&` não são lidos como marcação do reportlab."""
+        for name in ("Ana <x", "M&M <Ltda>"):
+            response = self._post({"output_format": "pdf", "full_name": name, "is_vip": ""})
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(b"".join(response.streaming_content).startswith(b"%PDF"))
+
+
+class StreamingJsonTests(TestCase):
+    """Testa a serialização em blocos (JSON array e NDJSON) dos relatórios."""
+
+    def test_json_array_chunks_form_valid_json(self):
+        rows = [{"id": index, "nome": "Sofá Retrátil"} for index in range(7)]
+        chunks = list(iter_json_array(iter(rows), rows_per_chunk=3))
+        self.assertEqual(chunks[0], "[")
+        self.assertEqual(json.loads("".join(chunks)), rows)
+
+    def test_json_array_without_rows(self):
+        self.assertEqual(json.loads("".join(iter_json_array(iter([])))), [])
+
+    def test_ndjson_emits_one_object_per_line(self):
+        rows = [{"id": index} for index in range(5)]
+        lines = "".join(iter_ndjson(iter(rows), rows_per_chunk=2)).splitlines()
+        self.assertEqual([json.loads(line) for line in lines], rows)
+
+    def test_customer_report_json_is_streamed(self):
+        user = get_user_model().objects.create_user(username="bi", password="senha-teste")
+        Customer.objects.create(customer_type="IND", full_name="Ana Souza", tax_id=CPF().generate())
+        request = RequestFactory().post("/reports/customers/", {"output_format": "ndjson", "is_vip": ""})
+        request.user = user
+        response = CustomerReportView.as_view()(request)
+        self.assertTrue(response.streaming)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0])["full_name"], "Ana Souza")
+
+
+class ReportBackendRegistryTests(TestCase):
+    """Testa o registro de geradores carregados sob demanda."""
+
+    def test_every_output_format_has_a_backend(self):
+        from apps.reports.forms import CustomerReportForm
+
+        for output_format, _ in CustomerReportForm.OUTPUT_FORMAT_CHOICES:
+            self.assertIn(output_format, REPORT_BACKENDS)
+            self.assertTrue(callable(get_backend(output_format)))
+
+    def test_unknown_format_returns_none(self):
+        self.assertIsNone(get_backend("xml"))
@@ -1,24 +1,69 @@
 # reports/views.py
-import os
-import pandas as pd
-from io import BytesIO, StringIO
-from datetime import datetime, date
+from datetime import datetime
 from django import forms
 from django.views import View
-from django.http import HttpResponse, JsonResponse
+from django.http import HttpResponse
 from django.contrib.auth.mixins import LoginRequiredMixin
 # --- Importando render ---
 from django.shortcuts import render
 # --- Fim Importação ---
 
+from .backends import get_backend
 from .forms import CustomerReportForm
 from apps.customers.models import Customer
 
 
+# Quantidade de clientes lidos do banco por vez nos formatos em streaming (QuerySet.iterator)
+QUERY_CHUNK_SIZE = 2000
+
+
 class CustomerReportView(LoginRequiredMixin, View):
     template_name = 'reports/customer_report_form.html'
     form_class = CustomerReportForm
 
+    # Metadados usados pelos geradores de arquivo (apps/reports/backends)
+    report_title = 'Relatório de Clientes'
+    sheet_name = 'Clientes'
+    filename_prefix = 'relatorio_clientes'
+
+    # Colunas do Excel/CSV: chave técnica -> cabeçalho em português
+    column_map = {
+        'id': 'ID',
+        'customer_type_display': 'Tipo', # Usar o valor formatado
+        'full_name': 'Nome Completo / Razão Social',
+        'preferred_name': 'Apelido / Nome Fantasia',
+        'tax_id_formatted': 'CPF/CNPJ', # Usar o valor formatado
+        'phone_formatted': 'Telefone', # Usar o valor formatado
+        'email': 'E-mail',
+        'is_active_display': 'Ativo', # Usar o valor formatado "Sim"/"Não"
+        'is_vip_display': 'VIP',     # Usar o valor formatado "Sim"/"Não"
+        'profession': 'Profissão',
+        'interests': 'Interesses',
+        'notes': 'Observações',
+        'registration_date_formatted': 'Data Cadastro', # Usar o valor formatado
+        'address_zip_code_formatted': 'CEP', # Usar o valor formatado
+        'address_street': 'Logradouro',
+        'address_number': 'Número',
+        'address_complement': 'Complemento',
+        'address_neighborhood': 'Bairro',
+        'address_city': 'Cidade',
+        'address_state': 'UF',
+        'address_full_formatted': 'Endereço Completo', # Incluir a string completa também
+    }
+
+    # Colunas do PDF: (chave técnica, cabeçalho, largura em pontos)
+    pdf_columns = [
+        ('id', 'ID', 35),
+        ('customer_type_display', 'Tipo', 75),
+        ('full_name', 'Nome Completo / Razão Social', 170),
+        ('tax_id_formatted', 'CPF/CNPJ', 90),
+        ('phone_formatted', 'Telefone', 72),
+        ('email', 'E-mail', 135),
+        ('address_city_state', 'Cidade/UF', 110),
+        ('is_active_display', 'Ativo', 30),
+        ('is_vip_display', 'VIP', 30),
+    ]
+
     def get(self, request, *args, **kwargs):
         # CORRIGIDO: render está importado agora
         form = self.form_class(request.GET)
@@ -32,16 +77,11 @@ class CustomerReportView(LoginRequiredMixin, View):
             queryset = form.get_queryset()
             output_format = form.cleaned_data['output_format']
 
-            intermediate_data = self.prepare_data_intermediate(queryset)
-
-            if output_format == 'excel':
-                return self.generate_excel(intermediate_data, form)
-            elif output_format == 'csv':
-                return self.generate_csv(intermediate_data)
-            elif output_format == 'json':
-                return self.generate_json(intermediate_data)
-            else:
+            # O gerador (e suas bibliotecas) só é importado no primeiro uso do formato
+            backend = get_backend(output_format)
+            if backend is None:
                 return HttpResponse("Formato de relatório inválido.", status=400)
+            return backend(self, queryset, form)
         else:
             return render(request, self.template_name, {'form': form, 'title': 'Gerar Relatório de Clientes'})
 
@@ -52,212 +92,105 @@ class CustomerReportView(LoginRequiredMixin, View):
         com chaves técnicas (inglês/snake_case) para fácil processamento.
         Inclui dados raw e formatados.
         """
-        data = []
-        for customer in queryset:
-            address_info = customer.address
-            address_full_formatted = "-"
-            if address_info:
-                 address_full_formatted = f"{address_info.street}, {address_info.number or 'SN'}"
-                 if address_info.complement:
-                     address_full_formatted += f" - {address_info.complement}"
-                 address_full_formatted += f", {address_info.neighborhood or '-'}, {address_info.city or '-'} - {address_info.state or '-'} / CEP: {address_info.formatted_zip_code or '-'}"
-
+        return [self.serialize_customer(customer) for customer in queryset]
 
-            data.append({
-                'id': customer.pk,
-                'customer_type': customer.customer_type, # Valor raw ('IND' ou 'CORP')
-                'customer_type_display': customer.get_customer_type_display(), # Valor formatado ("Pessoa Física"/"Pessoa Jurídica")
-                'full_name': customer.full_name,
-                'preferred_name': customer.preferred_name,
-                'tax_id': customer.tax_id, # Valor raw (apenas dígitos)
-                'tax_id_formatted': customer.formatted_tax_id, # Valor formatado
-                'phone': customer.phone, # Valor raw (apenas dígitos)
-                'phone_formatted': customer.formatted_phone, # Valor formatado
-                'email': customer.email,
-                'is_active': customer.is_active, # Booleano True/False
-                'is_active_display': 'Sim' if customer.is_active else 'Não', # Valor formatado
-                'is_vip': customer.is_vip, # Booleano True/False
-                'is_vip_display': 'Sim' if customer.is_vip else 'Não', # Valor formatado
-                'profession': customer.profession,
-                'interests': customer.interests,
-                'notes': customer.notes,
-                'registration_date': customer.registration_date.isoformat() if customer.registration_date else None, # Data/Hora raw (ISO)
-                'registration_date_formatted': customer.registration_date.strftime('%d/%m/%Y %H:%M') if customer.registration_date else None, # Data/Hora formatada
-
-                'address_id': address_info.pk if address_info else None,
-                'address_zip_code': address_info.zip_code if address_info else None,
-                'address_zip_code_formatted': address_info.formatted_zip_code if address_info else None,
-                'address_street': address_info.street if address_info else None,
-                'address_number': address_info.number if address_info else None,
-                'address_complement': address_info.complement if address_info else None,
-                'address_neighborhood': address_info.neighborhood if address_info else None,
-                'address_city': address_info.city if address_info else None,
-                'address_state': address_info.state if address_info else None,
-                'address_full_formatted': address_full_formatted,
-            })
-        return data
-
-
-    def generate_json(self, intermediate_data):
-        """Gera o relatório em formato JSON usando dados intermediários (chaves técnicas)."""
-        response = JsonResponse(intermediate_data, safe=False, json_dumps_params={'ensure_ascii': False})
-        response['Content-Disposition'] = f'attachment; filename="relatorio_clientes_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json"'
-        return response
-
-    def generate_excel(self, intermediate_data, form):
+    def iter_data_intermediate(self, queryset):
         """
-        Gera o relatório em formato Excel (xlsx) com filtros e data,
-        formatando chaves para português.
+        Versão em gerador de `prepare_data_intermediate`: lê os clientes do banco
+        em blocos de `QUERY_CHUNK_SIZE` (com os endereços pré-carregados por bloco)
+        e entrega um dicionário por vez, mantendo a memória constante.
         """
-        # Definir o mapeamento de chaves técnicas para cabeçalhos em português para o Excel
-        excel_column_map = {
-            'id': 'ID',
-            'customer_type_display': 'Tipo', # Usar o valor formatado
-            'full_name': 'Nome Completo / Razão Social',
-            'preferred_name': 'Apelido / Nome Fantasia',
-            'tax_id_formatted': 'CPF/CNPJ', # Usar o valor formatado
-            'phone_formatted': 'Telefone', # Usar o valor formatado
-            'email': 'E-mail',
-            'is_active_display': 'Ativo', # Usar o valor formatado "Sim"/"Não"
-            'is_vip_display': 'VIP',     # Usar o valor formatado "Sim"/"Não"
-            'profession': 'Profissão',
-            'interests': 'Interesses',
-            'notes': 'Observações',
-            'registration_date_formatted': 'Data Cadastro', # Usar o valor formatado
-            'address_zip_code_formatted': 'CEP', # Usar o valor formatado
-            'address_street': 'Logradouro',
-            'address_number': 'Número',
-            'address_complement': 'Complemento',
-            'address_neighborhood': 'Bairro',
-            'address_city': 'Cidade',
-            'address_state': 'UF',
-            'address_full_formatted': 'Endereço Completo', # Incluir a string completa também
-        }
-
-        # Criar uma nova lista de dicionários para o Excel com chaves e valores formatados
-        excel_data = []
-        for row in intermediate_data:
-            excel_row = {}
-            for tech_key, pt_header in excel_column_map.items():
-                 # Acessa o valor usando a chave técnica
-                 value = row.get(tech_key)
-                 # Não precisamos mais converter True/False para Sim/Não aqui,
-                 # pois prepare_data_intermediate já fornece is_active_display e is_vip_display
-                 excel_row[pt_header] = value if value is not None else '-' # Usa '-' para None/vazio
-
-            excel_data.append(excel_row)
-
-        df = pd.DataFrame(excel_data) # Cria o DataFrame a partir dos dados formatados para Excel
-
-        buffer = BytesIO()
-
-        with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-            sheet_name = 'Clientes'
-
-            excel_content = []
-
-            excel_content.append(['Relatório de Clientes'])
-            excel_content.append([f'Gerado em: {datetime.now().strftime("%d/%m/%Y %H:%M:%S")}'])
-            excel_content.append([])
-
-            applied_filters_info = []
-            for field_name, field in form.fields.items():
-                if field_name != 'output_format':
-                     value = form.cleaned_data.get(field_name)
-                     display_value = None
-
-                     if isinstance(field, forms.ChoiceField): # Para RadioSelect (ChoiceField)
-                         if value is not None:
-                              choices_dict = dict(field.choices)
-                              display_value = choices_dict.get(value, value) # Obtém o label ("Todos", "Sim", "Não", etc.)
+        customers = queryset.prefetch_related('addresses').iterator(chunk_size=QUERY_CHUNK_SIZE)
+        for customer in customers:
+            yield self.serialize_customer(customer)
 
-                     elif isinstance(field, (forms.CharField, forms.EmailField)):
-                         if value: # Check if string is not empty
-                              display_value = str(value)
-
-                     if display_value is not None:
-                          applied_filters_info.append(f'{field.label}: {display_value}')
-
-            if applied_filters_info:
-                excel_content.append(['Filtros Aplicados:'])
-                for filter_info in applied_filters_info:
-                     excel_content.append([filter_info])
-            else:
-                 excel_content.append(['Nenhum filtro aplicado explicitamente.'])
-
-
-            excel_content.append([])
-
-            # Adiciona o cabeçalho das colunas dos dados (nomes das colunas do DataFrame excel_data)
-            excel_content.append(df.columns.tolist())
-
-            # Adiciona as linhas de dados do DataFrame
-            excel_content.extend(df.values.tolist())
-
-            # Criar um único DataFrame a partir do conteúdo completo
-            combined_df = pd.DataFrame(excel_content)
-
-            # Escrever o DataFrame combinado para o Excel
-            combined_df.to_excel(writer, index=False, header=False, sheet_name=sheet_name, startrow=0)
-
-
-        excel_value = buffer.getvalue()
-        buffer.close()
-
-        response = HttpResponse(excel_value, content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-        response['Content-Disposition'] = f'attachment; filename="relatorio_clientes_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx"'
-        return response
-
-    def generate_csv(self, intermediate_data):
+    def serialize_customer(self, customer):
         """
-        Gera o relatório em formato CSV usando dados intermediários,
-        formatando chaves para português.
+        Converte um único cliente para o formato intermediário (dicionário com
+        chaves técnicas) usado por todos os formatos de saída.
         """
-         # O mapeamento para CSV pode ser o mesmo do Excel
-        csv_column_map = {
-            'id': 'ID',
-            'customer_type_display': 'Tipo',
-            'full_name': 'Nome Completo / Razão Social',
-            'preferred_name': 'Apelido / Nome Fantasia',
-            'tax_id_formatted': 'CPF/CNPJ',
-            'phone_formatted': 'Telefone',
-            'email': 'E-mail',
-            'is_active_display': 'Ativo',
-            'is_vip_display': 'VIP',
-            'profession': 'Profissão',
-            'interests': 'Interesses',
-            'notes': 'Observações',
-            'registration_date_formatted': 'Data Cadastro',
-            'address_zip_code_formatted': 'CEP',
-            'address_street': 'Logradouro',
-            'address_number': 'Número',
-            'address_complement': 'Complemento',
-            'address_neighborhood': 'Bairro',
-            'address_city': 'Cidade',
-            'address_state': 'UF',
-            'address_full_formatted': 'Endereço Completo',
+        address_info = self._get_address(customer)
+        address_full_formatted = "-"
+        if address_info:
+             address_full_formatted = f"{address_info.street}, {address_info.number or 'SN'}"
+             if address_info.complement:
+                 address_full_formatted += f" - {address_info.complement}"
+             address_full_formatted += f", {address_info.neighborhood or '-'}, {address_info.city or '-'} - {address_info.state or '-'} / CEP: {address_info.formatted_zip_code or '-'}"
+
+        return {
+            'id': customer.pk,
+            'customer_type': customer.customer_type, # Valor raw ('IND' ou 'CORP')
+            'customer_type_display': customer.get_customer_type_display(), # Valor formatado ("Pessoa Física"/"Pessoa Jurídica")
+            'full_name': customer.full_name,
+            'preferred_name': customer.preferred_name,
+            'tax_id': customer.tax_id, # Valor raw (apenas dígitos)
+            'tax_id_formatted': customer.formatted_tax_id, # Valor formatado
+            'phone': customer.phone, # Valor raw (apenas dígitos)
+            'phone_formatted': customer.formatted_phone, # Valor formatado
+            'email': customer.email,
+            'is_active': customer.is_active, # Booleano True/False
+            'is_active_display': 'Sim' if customer.is_active else 'Não', # Valor formatado
+            'is_vip': customer.is_vip, # Booleano True/False
+            'is_vip_display': 'Sim' if customer.is_vip else 'Não', # Valor formatado
+            'profession': customer.profession,
+            'interests': customer.interests,
+            'notes': customer.notes,
+            'registration_date': customer.registration_date.isoformat() if customer.registration_date else None, # Data/Hora raw (ISO)
+            'registration_date_formatted': customer.registration_date.strftime('%d/%m/%Y %H:%M') if customer.registration_date else None, # Data/Hora formatada
+
+            'address_id': address_info.pk if address_info else None,
+            'address_zip_code': address_info.zip_code if address_info else None,
+            'address_zip_code_formatted': address_info.formatted_zip_code if address_info else None,
+            'address_street': address_info.street if address_info else None,
+            'address_number': address_info.number if address_info else None,
+            'address_complement': address_info.complement if address_info else None,
+            'address_neighborhood': address_info.neighborhood if address_info else None,
+            'address_city': address_info.city if address_info else None,
+            'address_state': address_info.state if address_info else None,
+            'address_full_formatted': address_full_formatted,
         }
 
-        # Criar uma nova lista de dicionários para o CSV com chaves e valores formatados
-        csv_data = []
-        for row in intermediate_data:
-            csv_row = {}
-            for tech_key, pt_header in csv_column_map.items():
-                 value = row.get(tech_key)
-                 # Não precisamos mais converter True/False para Sim/Não aqui
-                 csv_row[pt_header] = value if value is not None else '-' # Usa '-' para None/vazio
-
-            csv_data.append(csv_row)
-
+    @staticmethod
+    def _get_address(customer):
+        """
+        Retorna o primeiro endereço do cliente aproveitando o cache de
+        `prefetch_related('addresses')` quando disponível (`customer.address`
+        usa `.first()`, que sempre dispara uma nova consulta).
+        """
+        addresses = customer.addresses.all()
+        return addresses[0] if addresses else None
 
-        df = pd.DataFrame(csv_data) # Cria o DataFrame a partir dos dados formatados para CSV
 
-        buffer = StringIO()
-        df.to_csv(buffer, index=False, encoding='utf-8-sig', sep=';', decimal='.')
+    def get_pdf_row(self, row):
+        """Acrescenta aos dados intermediários as colunas calculadas do PDF."""
+        if row.get('address_city'):
+            row['address_city_state'] = f"{row['address_city']}/{row.get('address_state') or '-'}"
+        return row
 
-        csv_value = buffer.getvalue()
-        buffer.close()
+    def get_filename(self, extension):
+        """Nome do arquivo de download, com data e hora da geração."""
+        return f'{self.filename_prefix}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.{extension}'
 
-        response = HttpResponse(csv_value, content_type='text/csv')
-        response['Content-Disposition'] = f'attachment; filename="relatorio_clientes_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv"'
-        return response
\ No newline at end of file
+    def get_applied_filters_info(self, form):
+        """
+        Retorna a lista de filtros aplicados no formato "Rótulo: Valor",
+        usada no cabeçalho dos relatórios Excel e PDF.
+        """
+        applied_filters_info = []
+        for field_name, field in form.fields.items():
+            if field_name != 'output_format':
+                 value = form.cleaned_data.get(field_name)
+                 display_value = None
+
+                 if isinstance(field, forms.ChoiceField): # Para RadioSelect (ChoiceField)
+                     if value is not None:
+                          choices_dict = dict(field.choices)
+                          display_value = choices_dict.get(value, value) # Obtém o label ("Todos", "Sim", "Não", etc.)
+
+                 elif isinstance(field, (forms.CharField, forms.EmailField)):
+                     if value: # Check if string is not empty
+                          display_value = str(value)
+
+                 if display_value is not None:
+                      applied_filters_info.append(f'{field.label}: {display_value}')
+        return applied_filters_info
@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-19 06:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Sequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Identificador da série de numeração', max_length=50, unique=True, verbose_name='Série')),
+                ('last_value', models.PositiveBigIntegerField(default=0, help_text='Último número já entregue pela série', verbose_name='Último Valor')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Última Alocação')),
+            ],
+            options={
+                'verbose_name': 'Sequência',
+                'verbose_name_plural': 'Sequências',
+                'ordering': ['name'],
+            },
+        ),
+    ]
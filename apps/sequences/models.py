@@ -0,0 +1,39 @@
+from django.db import models
+
+
+class Sequence(models.Model):
+    """
+    Contador persistente de uma série de numeração (ex: códigos internos de
+    produto por prefixo, números de pedido).
+
+    Os valores são alocados por `apps.sequences.services`, que incrementa
+    `last_value` de forma atômica no banco.
+
+    Atributos:
+        name (CharField): Nome da série (ex: "order", "product:MOVSOF")
+        last_value (PositiveBigIntegerField): Último valor já alocado
+        updated_at (DateTimeField): Data/hora da última alocação
+    """
+    name = models.CharField(
+        verbose_name='Série',
+        max_length=50,
+        unique=True,
+        help_text="Identificador da série de numeração"
+    )
+    last_value = models.PositiveBigIntegerField(
+        verbose_name='Último Valor',
+        default=0,
+        help_text="Último número já entregue pela série"
+    )
+    updated_at = models.DateTimeField(
+        verbose_name='Última Alocação',
+        auto_now=True
+    )
+
+    class Meta:
+        verbose_name = 'Sequência'
+        verbose_name_plural = 'Sequências'
+        ordering = ['name']
+
+    def __str__(self):
+        return f"{self.name}: {self.last_value}"
@@ -0,0 +1,123 @@
+## alocação de números sequenciais (códigos internos, números de pedido) via tabela de contadores
+import threading
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core.db import supports_update_returning
+from .models import Sequence
+
+# Valores pré-alocados por este processo: {série: [range, ...]}
+_preallocated = {}
+_preallocated_lock = threading.Lock()
+
+
+def _increment(name, count):
+    """
+    Soma `count` ao contador da série e retorna o novo `last_value`
+    (ou None se a série ainda não existe).
+
+    Com suporte a `UPDATE ... RETURNING` (PostgreSQL, SQLite 3.35+) é um único
+    comando; caso contrário, a linha é bloqueada com `select_for_update`.
+    Nos dois casos a linha do contador fica bloqueada até o fim da transação
+    de quem chamou, então transações concorrentes recebem valores distintos.
+    """
+    if supports_update_returning(connection):
+        table = connection.ops.quote_name(Sequence._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {table} SET last_value = last_value + %s, updated_at = %s "
+                f"WHERE name = %s RETURNING last_value",
+                [count, connection.ops.adapt_datetimefield_value(timezone.now()), name],
+            )
+            row = cursor.fetchone()
+        return row[0] if row else None
+
+    with transaction.atomic():
+        sequence = Sequence.objects.select_for_update().filter(name=name).first()
+        if sequence is None:
+            return None
+        Sequence.objects.filter(pk=sequence.pk).update(
+            last_value=F('last_value') + count, updated_at=timezone.now()
+        )
+        return sequence.last_value + count
+
+
+def next_values(name, count=1, initial=None):
+    """
+    Aloca `count` valores consecutivos da série.
+
+    Args:
+        name: Nome da série (criada na primeira alocação).
+        count: Quantidade de valores.
+        initial: Função chamada só na criação da série, retornando o último
+            valor já usado fora do contador (ex: maior código existente).
+
+    Returns:
+        range: Valores alocados.
+    """
+    value = _increment(name, count)
+    if value is None:
+        try:
+            with transaction.atomic():
+                Sequence.objects.create(name=name, last_value=initial() if initial else 0)
+        except IntegrityError:
+            pass  # Outro processo criou a série ao mesmo tempo
+        value = _increment(name, count)
+    return range(value - count + 1, value + 1)
+
+
+def _store_preallocated(name, values):
+    with _preallocated_lock:
+        _preallocated.setdefault(name, []).append(values)
+
+
+def _take_preallocated(name):
+    with _preallocated_lock:
+        blocks = _preallocated.get(name)
+        if not blocks:
+            return None
+        value = blocks[0][0]
+        blocks[0] = blocks[0][1:]
+        if not blocks[0]:
+            blocks.pop(0)
+        return value
+
+
+def next_value(name, initial=None, block_size=1):
+    """
+    Retorna o próximo valor da série.
+
+    Com `block_size > 1`, o processo reserva um bloco de valores de uma vez e
+    entrega os seguintes da memória, sem tocar no contador (menos disputa pela
+    linha da série entre workers). O restante do bloco só fica disponível
+    depois do commit da transação que o reservou, para que um rollback não
+    deixe valores em memória que o contador não registrou. A numeração deixa
+    de ser estritamente crescente entre workers e valores não usados de um
+    bloco se perdem quando o processo termina.
+
+    Args:
+        name: Nome da série.
+        initial: Ver `next_values`.
+        block_size: Quantidade de valores reservados por ida ao banco.
+    """
+    if block_size > 1:
+        value = _take_preallocated(name)
+        if value is not None:
+            return value
+
+    values = next_values(name, max(block_size, 1), initial)
+    if len(values) > 1:
+        rest = values[1:]
+        transaction.on_commit(lambda: _store_preallocated(name, rest))
+    return values[0]
+
+
+def clear_preallocated(name=None):
+    """Descarta os valores pré-alocados em memória (de uma série ou de todas)."""
+    with _preallocated_lock:
+        if name is None:
+            _preallocated.clear()
+        else:
+            _preallocated.pop(name, None)
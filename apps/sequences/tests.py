@@ -0,0 +1,51 @@
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
+
+from apps.sequences.models import Sequence
+from apps.sequences.services import clear_preallocated, next_value, next_values
+
+
+class SequenceTests(TestCase):
+    """Testa a alocação de valores pelas séries de numeração."""
+
+    def tearDown(self):
+        clear_preallocated()
+
+    def test_values_are_consecutive_per_series(self):
+        self.assertEqual([next_value("a") for _ in range(3)], [1, 2, 3])
+        self.assertEqual(next_value("b"), 1)
+        self.assertEqual(list(next_values("a", 2)), [4, 5])
+        self.assertEqual(Sequence.objects.get(name="a").last_value, 5)
+
+    def test_initial_seeds_a_new_series_only(self):
+        self.assertEqual(next_value("c", initial=lambda: 41), 42)
+        self.assertEqual(next_value("c", initial=lambda: 100), 43)
+
+    def test_block_preallocation_hits_the_counter_once(self):
+        # O restante do bloco só vai para a memória no commit da transação que o reservou
+        with self.captureOnCommitCallbacks(execute=True):
+            first = next_value("d", block_size=5)
+        with self.assertNumQueries(0):
+            values = [next_value("d", block_size=5) for _ in range(4)]
+        self.assertEqual([first, *values], [1, 2, 3, 4, 5])
+        self.assertEqual(Sequence.objects.get(name="d").last_value, 5)
+        self.assertEqual(next_value("d", block_size=5), 6)
+        self.assertEqual(Sequence.objects.get(name="d").last_value, 10)
+
+
+class SequenceRollbackTests(TransactionTestCase):
+    """Blocos reservados em uma transação desfeita não podem ser reaproveitados."""
+
+    def tearDown(self):
+        clear_preallocated()
+
+    def test_rolled_back_block_is_not_cached(self):
+        try:
+            with transaction.atomic():
+                next_value("e", block_size=10)
+                raise RuntimeError
+        except RuntimeError:
+            pass
+
+        self.assertEqual(next_value("e", block_size=10), 1)
+        self.assertEqual(next_value("e", block_size=10), 2)
@@ -0,0 +1,248 @@
+## arquivamento (roll-off) das movimentações de estoque antigas e compactação em resumos mensais
+import gzip
+import json
+import os
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from .ledger import build_snapshots, day_start
+from .models import StockMovement, StockMovementArchive, StockMovementSummary, StockSnapshot
+
+# Movimentações movidas por transação
+ARCHIVE_CHUNK_SIZE = 10000
+# Movimentações lidas por vez ao gravar o arquivo NDJSON de um mês
+COMPACT_READ_CHUNK_SIZE = 5000
+
+ARCHIVED_FIELDS = [
+    'id', 'product_id', 'location_id', 'movement_type', 'quantity', 'direction', 'unit_cost', 'reference_id',
+    'user_id', 'notes', 'is_cancelled', 'cancelled_reason', 'cancelled_by_id',
+    'cancelled_at', 'created_at', 'updated_at',
+]
+
+
+def archive_cutoff(months=None, today=None):
+    """
+    Limite (exclusivo) do arquivamento: início do mês de `months` meses atrás.
+
+    Nunca passa do último dia coberto pelos checkpoints diários, pois os saldos
+    de `stock_at` e da conciliação incremental partem dos checkpoints; meses
+    ainda não consolidados ficam na tabela principal.
+
+    Returns:
+        datetime | None: Limite, ou None se ainda não há checkpoints.
+    """
+    months = settings.STOCK_MOVEMENT_RETENTION_MONTHS if months is None else months
+    today = today or timezone.localdate()
+    month_index = today.year * 12 + today.month - 1 - months
+    cutoff = day_start(date(month_index // 12, month_index % 12 + 1, 1))
+
+    last_day = StockSnapshot.objects.aggregate(last=Max('date'))['last']
+    if last_day is None:
+        return None
+    return min(cutoff, day_start(last_day + timedelta(days=1)))
+
+
+def archive_movements(months=None, chunk_size=ARCHIVE_CHUNK_SIZE):
+    """
+    Move as movimentações anteriores a `archive_cutoff` para `StockMovementArchive`.
+
+    Os checkpoints são atualizados antes. Cada lote (em ordem de `id`) é
+    copiado com um `bulk_create` e removido da tabela principal na mesma
+    transação, então uma interrupção nunca perde nem duplica linhas e a
+    rotina pode ser retomada.
+
+    Returns:
+        int: Quantidade de movimentações arquivadas.
+    """
+    build_snapshots()
+    cutoff = archive_cutoff(months)
+    if cutoff is None:
+        return 0
+
+    archived = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                StockMovement.objects.filter(created_at__lt=cutoff)
+                .order_by('id')
+                .values(*ARCHIVED_FIELDS)[:chunk_size]
+            )
+            if not rows:
+                return archived
+            StockMovementArchive.objects.bulk_create(
+                [StockMovementArchive(**row) for row in rows],
+                batch_size=1000,
+            )
+            StockMovement.objects.filter(id__in=[row['id'] for row in rows]).delete()
+        archived += len(rows)
+
+
+def _month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def _next_month(day):
+    return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+
+
+def compaction_cutoff(months=None, today=None):
+    """
+    Limite (exclusivo) da compactação: `archive_cutoff` de `months` meses
+    (padrão: `STOCK_MOVEMENT_COMPACTION_MONTHS`), nunca mais recente que o do
+    arquivamento, então só movimentações já arquivadas são compactadas.
+    """
+    months = settings.STOCK_MOVEMENT_COMPACTION_MONTHS if months is None else months
+    return archive_cutoff(max(months, settings.STOCK_MOVEMENT_RETENTION_MONTHS), today)
+
+
+def _compact_month(period, directory):
+    """
+    Compacta as movimentações arquivadas de um mês em uma transação.
+
+    As linhas são gravadas em ordem de `id` em `stock-movements-AAAA-MM.ndjson.gz`
+    (um objeto JSON por linha, com os campos de `ARCHIVED_FIELDS`) e somadas
+    por produto, tipo e sentido; resumos já existentes do mês são acumulados.
+    Arquivos nunca são sobrescritos: se o nome já existe, ganha um sufixo
+    (`.2`, `.3`...). O arquivo é escrito em um nome temporário e renomeado
+    antes do commit; uma falha depois disso deixa as linhas na tabela (e uma
+    cópia a mais em disco), então nada se perde.
+
+    Returns:
+        int: Quantidade de movimentações compactadas.
+    """
+    starts_at = day_start(period)
+    until = day_start(_next_month(period))
+    totals = {}
+    compacted = 0
+
+    with transaction.atomic():
+        existing = {
+            (summary.product_id, summary.movement_type, summary.direction): summary
+            for summary in StockMovementSummary.objects.select_for_update().filter(period=period)
+        }
+        file_name = f"stock-movements-{period:%Y-%m}.ndjson.gz"
+        part = 1
+        while os.path.exists(os.path.join(directory, file_name)):
+            part += 1
+            file_name = f"stock-movements-{period:%Y-%m}.{part}.ndjson.gz"
+        path = os.path.join(directory, file_name)
+
+        rows = (
+            StockMovementArchive.objects.select_for_update()
+            .filter(created_at__gte=starts_at, created_at__lt=until)
+            .order_by('id')
+            .values(*ARCHIVED_FIELDS)
+        )
+        with gzip.open(f"{path}.tmp", 'wt', encoding='utf-8') as output:
+            for row in rows.iterator(chunk_size=COMPACT_READ_CHUNK_SIZE):
+                output.write(json.dumps(row, cls=DjangoJSONEncoder) + '\n')
+                compacted += 1
+                if row['is_cancelled']:
+                    continue
+                key = (row['product_id'], row['movement_type'], row['direction'])
+                quantity, count, costed, cost = totals.get(key, (0, 0, 0, Decimal(0)))
+                if row['unit_cost'] is not None:
+                    costed += row['quantity']
+                    cost += row['quantity'] * row['unit_cost']
+                totals[key] = (quantity + row['quantity'], count + 1, costed, cost)
+
+        if not compacted:
+            os.remove(f"{path}.tmp")
+            return 0
+
+        created = []
+        for key, (quantity, count, costed, cost) in totals.items():
+            summary = existing.get(key)
+            if summary is None:
+                summary = StockMovementSummary(
+                    product_id=key[0], movement_type=key[1], direction=key[2], period=period,
+                    until=until, quantity=0, movements=0, archive_file=file_name,
+                )
+                created.append(summary)
+            else:
+                summary.archive_file = f"{summary.archive_file},{file_name}"[:255]
+                if summary.unit_cost is not None:
+                    # Custo já resumido entra na média com o peso da quantidade resumida
+                    costed += summary.quantity
+                    cost += summary.quantity * summary.unit_cost
+            summary.quantity += quantity
+            summary.movements += count
+            summary.unit_cost = (cost / costed).quantize(Decimal('0.0001')) if costed else summary.unit_cost
+        StockMovementSummary.objects.bulk_create(created, batch_size=1000)
+        StockMovementSummary.objects.bulk_update(
+            [summary for key, summary in existing.items() if key in totals],
+            ['quantity', 'movements', 'unit_cost', 'archive_file'],
+            batch_size=1000,
+        )
+        StockMovementArchive.objects.filter(created_at__gte=starts_at, created_at__lt=until).delete()
+        os.replace(f"{path}.tmp", path)
+    return compacted
+
+
+def compact_movements(months=None, directory=None):
+    """
+    Compacta o livro: as movimentações arquivadas anteriores a
+    `compaction_cutoff` viram resumos mensais (`StockMovementSummary`) e as
+    linhas originais vão para arquivos NDJSON compactados em `directory`
+    (padrão: `STOCK_LEDGER_ARCHIVE_DIR`), um por mês.
+
+    O arquivamento é executado antes, então os meses compactados já estão
+    cobertos pelos checkpoints diários: `stock_at` e a conciliação incremental
+    não dependem das movimentações removidas, e a conciliação completa e a
+    revalorização somam os resumos (`summary_movements`).
+
+    Returns:
+        int: Quantidade de movimentações compactadas.
+    """
+    archive_movements()
+    cutoff = compaction_cutoff(months)
+    if cutoff is None:
+        return 0
+    first = StockMovementArchive.objects.filter(created_at__lt=cutoff).aggregate(first=Min('created_at'))['first']
+    if first is None:
+        return 0
+
+    directory = directory or settings.STOCK_LEDGER_ARCHIVE_DIR
+    os.makedirs(directory, exist_ok=True)
+    compacted = 0
+    period = _month_start(timezone.localtime(first).date())
+    while day_start(period) < cutoff:
+        compacted += _compact_month(period, directory)
+        period = _next_month(period)
+    return compacted
+
+
+def compacted_until():
+    """
+    Fim (exclusivo) do período compactado: movimentações anteriores só existem
+    nos resumos mensais. None se nada foi compactado.
+    """
+    return StockMovementSummary.objects.aggregate(until=Max('until'))['until']
+
+
+def summary_movements(product_ids=None):
+    """
+    Resumos mensais como movimentações não gravadas, para a revalorização.
+
+    Cada resumo vira uma movimentação no início do mês com a quantidade total
+    e o custo médio; no mesmo mês as entradas vêm antes das saídas, pois a
+    ordem original não é mais conhecida.
+    """
+    summaries = StockMovementSummary.objects.order_by('period', '-direction', 'product_id', 'movement_type')
+    if product_ids is not None:
+        summaries = summaries.filter(product_id__in=product_ids)
+    for summary in summaries.iterator():
+        yield StockMovement(
+            product_id=summary.product_id,
+            movement_type=summary.movement_type,
+            direction=summary.direction,
+            quantity=summary.quantity,
+            unit_cost=summary.unit_cost,
+            created_at=day_start(summary.period),
+        )
@@ -0,0 +1,257 @@
+## contagem física de estoque (inventário rotativo) por leitura de código de barras
+from collections import Counter
+
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models import Case, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.products.models import Product
+from .ledger import ledger_movements, signed_quantity
+from .models import InventoryCount, InventoryCountLine, Stock, StockMovement
+from .services import STOCK_UPDATE_CHUNK_SIZE, apply_movements, lock_stocks
+
+# GTINs distintos acumulados em memória antes de gravar as leituras
+SCAN_FLUSH_SIZE = 500
+
+
+def _lock_open_count(count):
+    """
+    Bloqueia a sessão e garante que ainda está aberta.
+
+    Leituras e encerramento bloqueiam a mesma linha, então nenhuma leitura é
+    gravada depois que as diferenças foram calculadas.
+    """
+    if not InventoryCount.objects.select_for_update().filter(pk=count.pk, status='open').exists():
+        raise ValidationError(f"A contagem #{count.pk} não está aberta.")
+
+
+def open_count(user, category=None, notes=''):
+    """
+    Abre uma sessão de contagem e fotografa o estoque esperado do escopo.
+
+    Os estoques do escopo são bloqueados (em ordem de produto) enquanto a foto
+    é tirada: toda gravação de estoque bloqueia o `Stock` antes de registrar a
+    movimentação, então as movimentações anteriores a `started_at` já estão
+    na foto e as posteriores ficam de fora, sem contagem dupla no encerramento.
+    As linhas são criadas com um `bulk_create`.
+
+    Args:
+        user: Usuário que abre a sessão.
+        category: Limita a contagem a uma categoria (padrão: todos os produtos com estoque).
+        notes: Observações da sessão.
+
+    Returns:
+        InventoryCount: Sessão aberta.
+    """
+    stocks = Stock.objects.select_for_update().order_by('product_id')
+    if category is not None:
+        stocks = stocks.filter(product__category=category)
+
+    with transaction.atomic():
+        expected = list(stocks.values_list('product_id', 'quantity'))
+        count = InventoryCount.objects.create(category=category, notes=notes, started_by=user)
+        InventoryCountLine.objects.bulk_create(
+            [
+                InventoryCountLine(
+                    count=count,
+                    product_id=product_id,
+                    expected=quantity,
+                    expected_at=count.started_at,
+                )
+                for product_id, quantity in expected
+            ],
+            batch_size=1000,
+        )
+    return count
+
+
+class ScanBuffer:
+    """
+    Acumula leituras de uma sessão em memória e as grava em lote.
+
+    As leituras são somadas por GTIN; a cada `flush_every` GTINs distintos (e
+    ao sair do bloco `with`) `flush()` resolve os GTINs em uma consulta e
+    incrementa `counted` com um único `UPDATE` com `CASE`, em vez de um
+    `UPDATE` por bipe.
+
+    Uso:
+        with ScanBuffer(count) as buffer:
+            for gtin in leituras:
+                buffer.add(gtin)
+    """
+
+    def __init__(self, count, flush_every=SCAN_FLUSH_SIZE):
+        self.count = count
+        self.flush_every = flush_every
+        self.pending = Counter()
+        self.unknown = Counter()
+        self.recorded = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.flush()
+
+    def add(self, gtin, quantity=1):
+        """Registra a leitura de `quantity` unidades de um GTIN."""
+        if quantity <= 0:
+            raise ValidationError(f"Quantidade inválida para o GTIN {gtin}: {quantity}")
+        self.pending[str(gtin).strip()] += quantity
+        if len(self.pending) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        """
+        Grava as leituras pendentes.
+
+        Produtos lidos que não estavam na foto de abertura (fora do escopo ou
+        sem estoque) ganham uma linha com o estoque esperado no momento da
+        primeira leitura. GTINs não cadastrados ficam em `unknown`.
+        """
+        if not self.pending:
+            return
+        products = dict(Product.objects.filter(gtin__in=self.pending).values_list('gtin', 'pk'))
+        quantities = {}
+        for gtin, quantity in self.pending.items():
+            if gtin in products:
+                quantities[products[gtin]] = quantities.get(products[gtin], 0) + quantity
+            else:
+                self.unknown[gtin] += quantity
+
+        with transaction.atomic():
+            _lock_open_count(self.count)
+            lines = InventoryCountLine.objects.filter(count=self.count)
+            existing = set(lines.filter(product_id__in=quantities).values_list('product_id', flat=True))
+            missing = sorted(set(quantities) - existing)
+            if missing:
+                stocks = lock_stocks(missing)
+                now = timezone.now()
+                InventoryCountLine.objects.bulk_create([
+                    InventoryCountLine(
+                        count=self.count,
+                        product_id=product_id,
+                        expected=stocks[product_id].quantity if product_id in stocks else 0,
+                        expected_at=now,
+                    )
+                    for product_id in missing
+                ])
+
+            now = timezone.now()
+            lines.filter(product_id__in=quantities).update(
+                counted=F('counted') + Case(
+                    *[When(product_id=product_id, then=Value(quantity)) for product_id, quantity in quantities.items()],
+                    default=Value(0),
+                    output_field=models.IntegerField(),
+                ),
+                first_scanned_at=Coalesce('first_scanned_at', Value(now)),
+            )
+
+        self.recorded += sum(quantities.values())
+        self.pending.clear()
+
+
+def record_scans(count, scans):
+    """
+    Registra um lote de leituras `(gtin, quantidade)` em uma sessão aberta.
+
+    Returns:
+        dict: `{'recorded': unidades gravadas, 'unknown': {gtin: unidades}}`.
+    """
+    with ScanBuffer(count) as buffer:
+        for gtin, quantity in scans:
+            buffer.add(gtin, quantity)
+    return {'recorded': buffer.recorded, 'unknown': dict(buffer.unknown)}
+
+
+def close_count(count, user, zero_missing=False):
+    """
+    Encerra a sessão e aplica as diferenças como movimentações `ADJUSTMENT`.
+
+    O estoque físico de cada produto foi observado na primeira leitura, não na
+    abertura. Por isso o valor esperado é a foto da abertura mais as
+    movimentações (não canceladas) entre a foto e a primeira leitura; vendas
+    ou recebimentos posteriores à leitura já estão no `Stock` e são mantidos,
+    pois o ajuste é aplicado como variação sobre a quantidade atual. Tudo é
+    calculado em uma consulta (subconsulta por linha), com os estoques
+    bloqueados; os ajustes são gravados em lote por `apply_movements`.
+
+    Args:
+        count: Sessão aberta.
+        user: Usuário que encerra a sessão (responsável pelos ajustes).
+        zero_missing: Se verdadeiro, produtos do escopo não lidos são
+            considerados com contagem zero; por padrão ficam inalterados.
+
+    Returns:
+        list[StockMovement]: Movimentações de ajuste criadas.
+    """
+    with transaction.atomic():
+        _lock_open_count(count)
+        now = timezone.now()
+        lines = InventoryCountLine.objects.filter(count=count)
+        if not zero_missing:
+            lines = lines.filter(first_scanned_at__isnull=False)
+
+        stocks = lock_stocks(lines.values_list('product_id', flat=True))
+        moved = (
+            ledger_movements().filter(
+                product=OuterRef('product'),
+                created_at__gt=OuterRef('expected_at'),
+                created_at__lt=OuterRef('observed_at'),
+            )
+            .order_by()
+            .values('product')
+            .annotate(total=Sum(signed_quantity()))
+            .values('total')
+        )
+        rows = (
+            lines.alias(observed_at=Coalesce('first_scanned_at', Value(now)))
+            .annotate(moved=Coalesce(Subquery(moved), 0))
+            .order_by('product_id')
+        )
+
+        adjusted = []
+        deltas = {}
+        for line in rows:
+            current = stocks[line.product_id].quantity if line.product_id in stocks else 0
+            # Vendas após a leitura podem ter consumido unidades não contadas;
+            # o estoque nunca fica negativo
+            line.adjustment = max(line.counted - (line.expected + line.moved), -current)
+            adjusted.append(line)
+            if line.adjustment:
+                deltas[line.product_id] = line.adjustment
+
+        reference_id = f"COUNT-{count.pk}"
+        movements = apply_movements(
+            (
+                StockMovement(
+                    product_id=product_id,
+                    movement_type='ADJUSTMENT',
+                    direction=1 if delta > 0 else -1,
+                    quantity=abs(delta),
+                    reference_id=reference_id,
+                    user=user,
+                    notes=f"Ajuste da contagem de estoque #{count.pk}",
+                )
+                for product_id, delta in deltas.items()
+            ),
+            now=now,
+        )
+        InventoryCountLine.objects.bulk_update(adjusted, ['adjustment'], batch_size=STOCK_UPDATE_CHUNK_SIZE)
+
+        count.status = 'closed'
+        count.closed_by = user
+        count.closed_at = now
+        count.save(update_fields=['status', 'closed_by', 'closed_at'])
+    return movements
+
+
+def cancel_count(count):
+    """Cancela uma sessão aberta sem alterar o estoque."""
+    with transaction.atomic():
+        _lock_open_count(count)
+        InventoryCount.objects.filter(pk=count.pk).update(status='cancelled')
+        count.status = 'cancelled'
@@ -0,0 +1,139 @@
+## previsão de demanda e ponto de reposição (min_quantity) a partir das saídas de estoque
+import math
+from datetime import timedelta
+from decimal import Decimal
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+from django.db.models import Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .ledger import day_start, ledger_movements
+from .models import Stock
+
+# Dias de histórico usados na previsão
+FORECAST_WINDOW_DAYS = 90
+# Prazo de reposição (dias entre o pedido de compra e a chegada)
+LEAD_TIME_DAYS = 7
+# Dias de demanda cobertos por cada compra
+REVIEW_PERIOD_DAYS = 30
+# Probabilidade de não faltar estoque durante o prazo de reposição
+SERVICE_LEVEL = 0.95
+# Peso da observação mais recente na suavização exponencial
+SMOOTHING_ALPHA = 0.3
+
+METHOD_MOVING_AVERAGE = 'moving_average'
+METHOD_EXPONENTIAL = 'exponential'
+
+FORECAST_BATCH_SIZE = 1000
+
+
+def demand_matrix(first_day, last_day, product_ids):
+    """
+    Saídas (`OUT` não canceladas) por dia e produto, como matriz densa.
+
+    O banco devolve uma linha por produto/dia com movimentação (uma consulta
+    agrupada para todo o catálogo); o pivot completa com zero os dias sem
+    saída e os produtos sem histórico.
+
+    Returns:
+        pandas.DataFrame: Índice = dias de `first_day` a `last_day`, colunas = `product_ids`.
+    """
+    rows = (
+        ledger_movements().filter(
+            movement_type='OUT',
+            created_at__gte=day_start(first_day),
+            created_at__lt=day_start(last_day + timedelta(days=1)),
+        )
+        .annotate(day=TruncDate('created_at'))
+        .order_by()
+        .values('product_id', 'day')
+        .annotate(total=Sum('quantity'))
+        .values_list('product_id', 'day', 'total')
+    )
+    frame = pd.DataFrame.from_records(list(rows), columns=['product_id', 'day', 'total'])
+    days = pd.date_range(first_day, last_day, freq='D').date
+    matrix = frame.pivot_table(index='day', columns='product_id', values='total', aggfunc='sum')
+    return matrix.reindex(index=days, columns=list(product_ids)).fillna(0).astype(float)
+
+
+def forecast_reorder_points(
+    matrix,
+    method=METHOD_MOVING_AVERAGE,
+    lead_time_days=LEAD_TIME_DAYS,
+    review_period_days=REVIEW_PERIOD_DAYS,
+    service_level=SERVICE_LEVEL,
+    alpha=SMOOTHING_ALPHA,
+):
+    """
+    Calcula, para todas as colunas (produtos) de uma vez, a demanda diária
+    prevista, o estoque de segurança e as sugestões de reposição.
+
+    - Demanda: média do período (`METHOD_MOVING_AVERAGE`) ou suavização
+      exponencial simples (`METHOD_EXPONENTIAL`, último nível da série).
+    - Estoque de segurança: `z * desvio padrão diário * raiz(prazo)`, com `z`
+      do nível de serviço na normal padrão.
+    - Estoque mínimo (ponto de reposição): demanda no prazo + segurança.
+    - Quantidade de reposição: demanda de `review_period_days` dias.
+
+    Returns:
+        pandas.DataFrame: Índice = produto; colunas `daily_demand`,
+        `safety_stock`, `min_quantity` e `reorder_quantity`.
+    """
+    if method == METHOD_EXPONENTIAL:
+        demand = matrix.ewm(alpha=alpha, adjust=False).mean().iloc[-1]
+    else:
+        demand = matrix.mean()
+    sigma = matrix.std(ddof=1).fillna(0)
+    safety = NormalDist().inv_cdf(service_level) * sigma * math.sqrt(lead_time_days)
+
+    return pd.DataFrame({
+        'daily_demand': demand.round(3),
+        'safety_stock': safety,
+        'min_quantity': np.ceil(demand * lead_time_days + safety).astype(int),
+        'reorder_quantity': np.ceil(demand * review_period_days).astype(int),
+    })
+
+
+def update_reorder_points(window_days=FORECAST_WINDOW_DAYS, apply=False, until_date=None, **options):
+    """
+    Rotina em lote: previsão de todo o catálogo em uma passada.
+
+    Lê os estoques (uma consulta), extrai a matriz de demanda (uma consulta
+    agrupada), calcula tudo de forma vetorizada e grava as sugestões com
+    `bulk_update`, sem consultas por produto.
+
+    Args:
+        window_days: Dias de histórico, terminando em `until_date` (padrão: ontem).
+        apply: Se verdadeiro, o estoque mínimo sugerido também passa a ser o `min_quantity`.
+        **options: Parâmetros de `forecast_reorder_points`.
+
+    Returns:
+        int: Quantidade de estoques atualizados.
+    """
+    last_day = until_date or timezone.localdate() - timedelta(days=1)
+    first_day = last_day - timedelta(days=window_days - 1)
+    stock_ids = dict(Stock.objects.values_list('product_id', 'pk'))
+    if not stock_ids:
+        return 0
+
+    forecast = forecast_reorder_points(demand_matrix(first_day, last_day, stock_ids), **options)
+    now = timezone.now()
+    stocks = []
+    for product_id, row in forecast.iterrows():
+        stock = Stock(pk=stock_ids[product_id], product_id=product_id)
+        stock.daily_demand = Decimal(str(row['daily_demand']))
+        stock.suggested_min_quantity = int(row['min_quantity'])
+        stock.reorder_quantity = int(row['reorder_quantity'])
+        stock.forecast_at = now
+        if apply:
+            stock.min_quantity = stock.suggested_min_quantity
+        stocks.append(stock)
+
+    fields = ['daily_demand', 'suggested_min_quantity', 'reorder_quantity', 'forecast_at']
+    if apply:
+        fields.append('min_quantity')
+    Stock.objects.bulk_update(stocks, fields, batch_size=FORECAST_BATCH_SIZE)
+    return len(stocks)
@@ -0,0 +1,162 @@
+## série histórica do nível de estoque (função degrau) reduzida para gráficos
+import numpy as np
+
+from .archive import compacted_until
+from .ledger import archived_movements, ledger_movements, signed_quantity, stock_at
+from .models import StockSnapshot
+
+# Pontos devolvidos por padrão e no máximo
+DEFAULT_POINTS = 500
+MAX_POINTS = 5000
+
+METHOD_MINMAX = 'minmax'
+METHOD_LTTB = 'lttb'
+METHODS = (METHOD_MINMAX, METHOD_LTTB)
+
+
+def level_steps(product_id, start, end):
+    """
+    Função degrau do saldo de um produto entre `start` e `end`.
+
+    O saldo inicial vem de `stock_at` (checkpoint + movimentações); as
+    movimentações do intervalo (ativas e arquivadas, em uma consulta com
+    `UNION`) são acumuladas com `numpy.cumsum`. O primeiro ponto é o saldo em
+    `start` e o último repete o saldo final em `end`.
+
+    No período compactado (`compacted_until`) as movimentações individuais
+    não existem mais: ali os degraus são os checkpoints diários
+    (`StockSnapshot`), posicionados no fim de cada dia, e as movimentações
+    entram a partir do limite da compactação.
+
+    Returns:
+        tuple: `(instantes em segundos desde a época, saldos)` como arrays numpy.
+    """
+    initial = stock_at([product_id], start).get(product_id, 0)
+    boundary = compacted_until()
+
+    daily = []
+    # `stock_at` já inclui o instante `start`; o checkpoint no limite não inclui o limite
+    after = {'created_at__gt': start}
+    if boundary is not None and boundary > start:
+        daily = list(
+            StockSnapshot.objects.filter(product_id=product_id, until__gt=start, until__lte=min(boundary, end))
+            .order_by('until')
+            .values_list('until', 'quantity')
+        )
+        after = {'created_at__gte': boundary}
+
+    def window(movements):
+        return (
+            movements.filter(product_id=product_id, created_at__lte=end, **after)
+            .annotate(delta=signed_quantity())
+            .order_by()
+            .values_list('created_at', 'delta')
+        )
+
+    rows = list(window(ledger_movements()).union(window(archived_movements()), all=True).order_by('created_at'))
+    base = daily[-1][1] if daily else initial
+    steps = daily + rows
+    times = np.fromiter(
+        (start.timestamp(), *(moment.timestamp() for moment, _ in steps), end.timestamp()),
+        dtype=float,
+        count=len(steps) + 2,
+    )
+    deltas = np.fromiter((delta for _, delta in rows), dtype=np.int64, count=len(rows))
+    levels = np.concatenate((
+        [initial],
+        np.fromiter((quantity for _, quantity in daily), dtype=np.int64, count=len(daily)),
+        base + np.cumsum(deltas),
+        [base + deltas.sum()],
+    ))
+    return times, levels
+
+
+def minmax_indices(times, levels, points):
+    """
+    Índices mantidos pela redução por faixas: o intervalo é dividido em
+    faixas de mesma duração e cada uma guarda seu menor e seu maior saldo
+    (picos e rupturas de estoque nunca somem). Primeiro e último ponto são
+    sempre mantidos.
+    """
+    count = len(times)
+    if count <= points:
+        return np.arange(count)
+    buckets = max((points - 2) // 2, 1)
+    span = times[-1] - times[0] or 1.0
+    bucket = np.minimum(((times - times[0]) / span * buckets).astype(np.int64), buckets - 1)
+
+    order = np.lexsort((levels, bucket))
+    sorted_buckets = bucket[order]
+    first = np.flatnonzero(np.r_[True, sorted_buckets[1:] != sorted_buckets[:-1]])
+    last = np.r_[first[1:] - 1, count - 1]
+    return np.unique(np.concatenate(([0, count - 1], order[first], order[last])))
+
+
+def lttb_indices(times, levels, points):
+    """
+    Índices escolhidos pelo Largest-Triangle-Three-Buckets: em cada faixa
+    (de mesmo número de pontos) fica o ponto que forma o maior triângulo com o
+    ponto escolhido na faixa anterior e a média da faixa seguinte.
+    """
+    count = len(times)
+    if count <= points or points < 3:
+        return np.arange(count)
+    x = times - times[0]
+    y = levels.astype(float)
+    edges = np.linspace(1, count - 1, points - 1).astype(np.int64)
+
+    selected = np.empty(points, dtype=np.int64)
+    selected[0] = previous = 0
+    for i in range(points - 2):
+        lower, upper = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_x, next_y = x[upper:edges[i + 2]].mean(), y[upper:edges[i + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        area = np.abs(
+            (x[previous] - next_x) * (y[lower:upper] - y[previous])
+            - (x[previous] - x[lower:upper]) * (next_y - y[previous])
+        )
+        previous = lower + int(area.argmax())
+        selected[i + 1] = previous
+    selected[-1] = count - 1
+    return selected
+
+
+def stock_level_series(product_id, start, end, points=DEFAULT_POINTS, method=METHOD_MINMAX):
+    """
+    Série do nível de estoque de um produto para gráficos, com no máximo
+    `points` pontos, qualquer que seja o número de movimentações.
+
+    A série é uma função degrau (o saldo vale até o próximo ponto) e deve ser
+    desenhada como tal. Custo: uma consulta de saldo inicial, uma do limite da
+    compactação, uma das movimentações do intervalo e, se o intervalo começa
+    no período compactado, uma dos checkpoints diários; o resto é feito com
+    numpy.
+
+    Args:
+        start, end: Intervalo (datetimes com fuso).
+        points: Orçamento de pontos (limitado a `MAX_POINTS`).
+        method: `METHOD_MINMAX` (padrão, preserva mínimos e máximos) ou `METHOD_LTTB`.
+
+    Returns:
+        dict: `product_id`, `method`, `movements` (degraus no intervalo:
+        movimentações, ou dias com movimentação no período compactado),
+        `initial`, `final` e os arrays paralelos `t` (milissegundos desde a
+        época) e `level`.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Método de redução desconhecido: {method}")
+    points = max(3, min(points, MAX_POINTS))
+    times, levels = level_steps(product_id, start, end)
+    reduce = lttb_indices if method == METHOD_LTTB else minmax_indices
+    kept = reduce(times, levels, points)
+    return {
+        'product_id': product_id,
+        'method': method,
+        'movements': len(times) - 2,
+        'initial': int(levels[0]),
+        'final': int(levels[-1]),
+        't': (times[kept] * 1000).round().astype(np.int64).tolist(),
+        'level': levels[kept].tolist(),
+    }
@@ -0,0 +1,169 @@
+## consultas sobre o livro de movimentações (saldo com sinal, checkpoints diários, saldo em uma data)
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.db import models, transaction
+from django.db.models import ExpressionWrapper, F, Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from apps.products.models import Product
+from .models import StockMovement, StockMovementArchive, StockSnapshot
+
+# Limite inferior usado quando o produto ainda não tem checkpoint
+LEDGER_START = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+# Dias processados por vez na geração de checkpoints (uma consulta agrupada por lote)
+SNAPSHOT_DAYS_PER_PASS = 31
+
+
+def signed_quantity():
+    """Expressão da quantidade com sinal de uma movimentação (`quantity * direction`)."""
+    return ExpressionWrapper(F('quantity') * F('direction'), output_field=models.IntegerField())
+
+
+def ledger_movements():
+    """Movimentações que compõem o saldo (as canceladas são ignoradas)."""
+    return StockMovement.objects.filter(is_cancelled=False)
+
+
+def archived_movements():
+    """Movimentações arquivadas que compõem o saldo (`StockMovementArchive`)."""
+    return StockMovementArchive.objects.filter(is_cancelled=False)
+
+
+def day_start(day):
+    """Início do dia no fuso horário ativo (limite usado pelos checkpoints)."""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def stock_at(product_ids, timestamp):
+    """
+    Saldo do livro de movimentações (não canceladas) de cada produto em um instante.
+
+    Em uma única consulta, combina para cada produto o checkpoint mais recente
+    anterior ao instante (`StockSnapshot`) com a soma das movimentações entre
+    o checkpoint e o instante, sem percorrer todo o histórico. Sem checkpoint,
+    soma todas as movimentações até o instante. Movimentações já arquivadas
+    entram pela tabela de arquivo (só lida quando o instante é antigo o
+    bastante para não haver checkpoint mais recente). Meses compactados em
+    resumos (`StockMovementSummary`) são sempre anteriores ao último
+    checkpoint, então o saldo vem dos checkpoints, com resolução diária.
+
+    Args:
+        product_ids: Produtos consultados.
+        timestamp: Instante (inclusive) em que o saldo é apurado.
+
+    Returns:
+        dict: `{product_id: saldo}` (produtos sem movimentação ficam com 0).
+    """
+    checkpoints = (
+        StockSnapshot.objects.filter(product=OuterRef('pk'), until__lte=timestamp)
+        .order_by('-until')
+    )
+    def delta(movements):
+        return (
+            movements.filter(
+                product=OuterRef('pk'),
+                created_at__gte=OuterRef('checkpoint_until'),
+                created_at__lte=timestamp,
+            )
+            .order_by()
+            .values('product')
+            .annotate(total=Sum(signed_quantity()))
+            .values('total')
+        )
+
+    rows = (
+        Product.objects.filter(pk__in=product_ids)
+        .alias(
+            checkpoint_until=Coalesce(
+                Subquery(checkpoints.values('until')[:1]),
+                Value(LEDGER_START),
+            ),
+        )
+        .annotate(
+            balance=Coalesce(Subquery(checkpoints.values('quantity')[:1]), 0)
+            + Coalesce(Subquery(delta(ledger_movements())), 0)
+            + Coalesce(Subquery(delta(archived_movements())), 0),
+        )
+        .values_list('pk', 'balance')
+    )
+    return dict(rows)
+
+
+def _latest_balances(product_ids, before):
+    """Saldo do checkpoint mais recente anterior a `before` (data) de cada produto."""
+    latest = (
+        StockSnapshot.objects.filter(product=OuterRef('product'), date__lt=before)
+        .order_by('-date')
+        .values('date')[:1]
+    )
+    return dict(
+        StockSnapshot.objects.filter(product_id__in=product_ids, date=Subquery(latest))
+        .values_list('product_id', 'quantity')
+    )
+
+
+def _build_range(first_day, last_day):
+    """Gera os checkpoints dos dias `first_day`..`last_day` (inclusive) em uma transação."""
+    deltas = (
+        ledger_movements().filter(
+            created_at__gte=day_start(first_day),
+            created_at__lt=day_start(last_day + timedelta(days=1)),
+        )
+        .annotate(day=TruncDate('created_at'))
+        .order_by()
+        .values('product_id', 'day')
+        .annotate(delta=Sum(signed_quantity()))
+        .order_by('product_id', 'day')
+        .values_list('product_id', 'day', 'delta')
+    )
+    deltas = list(deltas)
+    if not deltas:
+        return 0
+
+    balances = _latest_balances({product_id for product_id, _, _ in deltas}, before=first_day)
+    snapshots = []
+    for product_id, day, delta in deltas:
+        balances[product_id] = balances.get(product_id, 0) + delta
+        snapshots.append(StockSnapshot(
+            product_id=product_id,
+            date=day,
+            quantity=balances[product_id],
+            until=day_start(day + timedelta(days=1)),
+        ))
+
+    with transaction.atomic():
+        StockSnapshot.objects.bulk_create(snapshots, batch_size=1000)
+    return len(snapshots)
+
+
+def build_snapshots(until_date=None):
+    """
+    Gera os checkpoints diários que ainda faltam, de forma incremental.
+
+    Continua a partir do último dia já processado (ou do dia da primeira
+    movimentação) até `until_date` (padrão: ontem; o dia corrente ainda recebe
+    movimentações). Cada lote de `SNAPSHOT_DAYS_PER_PASS` dias custa uma
+    consulta agrupada por produto e dia, uma para os saldos anteriores e um
+    `bulk_create`; só produtos com movimentação no dia ganham linha.
+
+    Returns:
+        int: Quantidade de checkpoints criados.
+    """
+    until_date = until_date or timezone.localdate() - timedelta(days=1)
+    last_day = StockSnapshot.objects.aggregate(last=Max('date'))['last']
+    if last_day is not None:
+        first_day = last_day + timedelta(days=1)
+    else:
+        first_movement = StockMovement.objects.order_by('created_at').values_list('created_at', flat=True).first()
+        if first_movement is None:
+            return 0
+        first_day = timezone.localdate(first_movement)
+
+    created = 0
+    while first_day <= until_date:
+        last_of_pass = min(first_day + timedelta(days=SNAPSHOT_DAYS_PER_PASS - 1), until_date)
+        created += _build_range(first_day, last_of_pass)
+        first_day = last_of_pass + timedelta(days=1)
+    return created
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from apps.stock.archive import ARCHIVE_CHUNK_SIZE, archive_movements
+
+
+class Command(BaseCommand):
+    """
+    Move as movimentações de estoque antigas para a tabela de arquivo.
+
+    Pensado para execução mensal (cron), depois de `build_stock_snapshots`;
+    mantém na tabela principal apenas os últimos
+    `STOCK_MOVEMENT_RETENTION_MONTHS` meses.
+    """
+
+    help = "Arquiva as movimentações de estoque anteriores ao período de retenção."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months",
+            type=int,
+            help="Meses mantidos na tabela principal (padrão: STOCK_MOVEMENT_RETENTION_MONTHS).",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=ARCHIVE_CHUNK_SIZE,
+            help=f"Movimentações por transação (padrão: {ARCHIVE_CHUNK_SIZE}).",
+        )
+
+    def handle(self, *args, **options):
+        archived = archive_movements(months=options["months"], chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"{archived} movimentação(ões) arquivada(s)."))
@@ -0,0 +1,27 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from apps.stock.ledger import build_snapshots
+
+
+class Command(BaseCommand):
+    """
+    Gera os checkpoints diários de saldo por produto (`StockSnapshot`) que ainda faltam.
+
+    Pensado para execução diária logo após a meia-noite (cron); cada execução
+    só processa os dias posteriores ao último checkpoint.
+    """
+
+    help = "Gera os checkpoints diários de estoque a partir das novas movimentações."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--until",
+            type=date.fromisoformat,
+            help="Último dia a processar (AAAA-MM-DD). Padrão: ontem.",
+        )
+
+    def handle(self, *args, **options):
+        created = build_snapshots(until_date=options["until"])
+        self.stdout.write(self.style.SUCCESS(f"{created} checkpoint(s) de estoque gerado(s)."))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from apps.stock.archive import compact_movements
+
+
+class Command(BaseCommand):
+    """
+    Compacta as movimentações de estoque mais antigas em resumos mensais.
+
+    Pensado para execução mensal (cron), depois de `archive_stock_movements`
+    (que também é executada no início); as movimentações anteriores a
+    `STOCK_MOVEMENT_COMPACTION_MONTHS` meses são gravadas em arquivos NDJSON
+    compactados em `STOCK_LEDGER_ARCHIVE_DIR` e removidas do banco.
+    """
+
+    help = "Compacta as movimentações arquivadas antigas em resumos mensais por produto e tipo."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months",
+            type=int,
+            help="Meses mantidos como movimentações individuais (padrão: STOCK_MOVEMENT_COMPACTION_MONTHS).",
+        )
+        parser.add_argument(
+            "--directory",
+            help="Pasta dos arquivos NDJSON (padrão: STOCK_LEDGER_ARCHIVE_DIR).",
+        )
+
+    def handle(self, *args, **options):
+        compacted = compact_movements(months=options["months"], directory=options["directory"])
+        self.stdout.write(self.style.SUCCESS(f"{compacted} movimentação(ões) compactada(s)."))
@@ -0,0 +1,70 @@
+from django.core.management.base import BaseCommand
+
+from apps.stock.forecasting import (
+    FORECAST_WINDOW_DAYS,
+    LEAD_TIME_DAYS,
+    METHOD_EXPONENTIAL,
+    METHOD_MOVING_AVERAGE,
+    REVIEW_PERIOD_DAYS,
+    SERVICE_LEVEL,
+    update_reorder_points,
+)
+
+
+class Command(BaseCommand):
+    """
+    Prevê a demanda diária de cada produto a partir das saídas de estoque e
+    grava as sugestões de estoque mínimo e de quantidade de reposição.
+
+    Pensado para execução diária (cron), depois de `build_stock_snapshots`.
+    """
+
+    help = "Calcula a previsão de demanda e o ponto de reposição de todo o catálogo."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=FORECAST_WINDOW_DAYS,
+            help=f"Dias de histórico (padrão: {FORECAST_WINDOW_DAYS}).",
+        )
+        parser.add_argument(
+            "--method",
+            choices=[METHOD_MOVING_AVERAGE, METHOD_EXPONENTIAL],
+            default=METHOD_MOVING_AVERAGE,
+            help="Média do período ou suavização exponencial.",
+        )
+        parser.add_argument(
+            "--lead-time",
+            type=int,
+            default=LEAD_TIME_DAYS,
+            help=f"Prazo de reposição em dias (padrão: {LEAD_TIME_DAYS}).",
+        )
+        parser.add_argument(
+            "--review-period",
+            type=int,
+            default=REVIEW_PERIOD_DAYS,
+            help=f"Dias de demanda cobertos por compra (padrão: {REVIEW_PERIOD_DAYS}).",
+        )
+        parser.add_argument(
+            "--service-level",
+            type=float,
+            default=SERVICE_LEVEL,
+            help=f"Nível de serviço entre 0 e 1 (padrão: {SERVICE_LEVEL}).",
+        )
+        parser.add_argument(
+            "--apply",
+            action="store_true",
+            help="Grava o estoque mínimo sugerido em min_quantity.",
+        )
+
+    def handle(self, *args, **options):
+        updated = update_reorder_points(
+            window_days=options["days"],
+            apply=options["apply"],
+            method=options["method"],
+            lead_time_days=options["lead_time"],
+            review_period_days=options["review_period"],
+            service_level=options["service_level"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Previsão atualizada para {updated} produto(s)."))
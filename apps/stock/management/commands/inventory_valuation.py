@@ -0,0 +1,47 @@
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.stock.valuation import inventory_valuation, rebuild_valuation
+
+
+class Command(BaseCommand):
+    """
+    Mostra o valor do estoque em uma data (custo médio e PEPS) a partir das
+    entradas de valorização já calculadas.
+
+    `--rebuild` refaz a valorização a partir do livro de movimentações
+    (necessário na implantação e após cancelar movimentações valorizadas).
+    """
+
+    help = "Valor do estoque em uma data pelo custo médio ponderado e pelo PEPS."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--date",
+            type=lambda value: datetime.strptime(value, "%Y-%m-%d").date(),
+            help="Data da posição (AAAA-MM-DD), ao final do dia. Padrão: agora.",
+        )
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Refaz a valorização a partir de todas as movimentações antes de calcular.",
+        )
+
+    def handle(self, *args, **options):
+        if options["rebuild"]:
+            processed = rebuild_valuation()
+            self.stdout.write(f"{processed} movimentação(ões) reprocessada(s).")
+
+        if options["date"]:
+            timestamp = timezone.make_aware(datetime.combine(options["date"], time.max))
+        else:
+            timestamp = timezone.now()
+        result = inventory_valuation(timestamp)
+        self.stdout.write(
+            f"{len(result['products'])} produto(s), {result['quantity']} unidade(s) em "
+            f"{timestamp:%d/%m/%Y %H:%M}"
+        )
+        self.stdout.write(f"Custo médio ponderado: R$ {result['average_value']:.2f}")
+        self.stdout.write(self.style.SUCCESS(f"PEPS: R$ {result['fifo_value']:.2f}"))
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+
+from apps.stock.reconciliation import RECONCILE_CHUNK_SIZE, REPAIR_LEDGER, REPAIR_STOCK, reconcile
+
+
+class Command(BaseCommand):
+    """
+    Confere se `Stock.quantity` bate com a soma com sinal das movimentações
+    não canceladas de cada produto e, opcionalmente, corrige as divergências.
+
+    Por padrão é incremental: atualiza os checkpoints diários e só lê as
+    movimentações posteriores a eles. `--full` soma o livro inteiro.
+    """
+
+    help = "Concilia o estoque com o livro de movimentações."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Soma todas as movimentações, ignorando os checkpoints diários.",
+        )
+        parser.add_argument(
+            "--repair",
+            choices=[REPAIR_LEDGER, REPAIR_STOCK],
+            help=(
+                f"'{REPAIR_LEDGER}': registra ajustes para o livro bater com o estoque físico; "
+                f"'{REPAIR_STOCK}': corrige o estoque para o saldo do livro."
+            ),
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=RECONCILE_CHUNK_SIZE,
+            help=f"Produtos por consulta (padrão: {RECONCILE_CHUNK_SIZE}).",
+        )
+
+    def handle(self, *args, **options):
+        result = reconcile(full=options["full"], repair=options["repair"], chunk_size=options["chunk_size"])
+
+        for product_id, quantity, balance in result["drift"]:
+            self.stdout.write(
+                f"Produto {product_id}: estoque {quantity}, livro {balance} (diferença {quantity - balance:+d})"
+            )
+        self.stdout.write(f"{len(result['drift'])} produto(s) com divergência.")
+        if options["repair"]:
+            self.stdout.write(self.style.SUCCESS(f"{result['repaired']} produto(s) corrigido(s)."))
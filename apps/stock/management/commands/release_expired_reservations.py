@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from apps.stock.services import release_expired_reservations
+
+
+class Command(BaseCommand):
+    """
+    Libera as reservas de estoque vencidas (rascunhos abandonados).
+
+    Pensado para execução periódica (ex: cron a cada poucos minutos); todas as
+    reservas vencidas são expiradas em um único UPDATE.
+    """
+
+    help = "Marca como expiradas as reservas de estoque cuja validade já passou."
+
+    def handle(self, *args, **options):
+        released = release_expired_reservations()
+        self.stdout.write(self.style.SUCCESS(f"{released} reserva(s) expirada(s) liberada(s)."))
@@ -0,0 +1,36 @@
+# Generated by Django 5.2 on 2026-10-19 06:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0001_initial'),
+        ('products', '0003_alter_product_options_and_more'),
+        ('stock', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockReservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField(help_text='Quantidade reservada', verbose_name='Quantidade')),
+                ('status', models.CharField(choices=[('active', 'Ativa'), ('converted', 'Convertida em saída'), ('released', 'Liberada'), ('expired', 'Expirada')], default='active', help_text='Situação atual da reserva', max_length=10, verbose_name='Situação')),
+                ('expires_at', models.DateTimeField(blank=True, help_text='Data e hora em que a reserva expira (vazio = não expira)', null=True, verbose_name='Expira em')),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Data e hora de criação da reserva', verbose_name='Data de Criação')),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='Data e hora da última atualização da reserva', verbose_name='Última Atualização')),
+                ('order', models.ForeignKey(help_text='Pedido que originou a reserva', on_delete=django.db.models.deletion.CASCADE, related_name='stock_reservations', to='orders.order', verbose_name='Pedido')),
+                ('product', models.ForeignKey(help_text='Produto reservado', on_delete=django.db.models.deletion.PROTECT, related_name='reservations', to='products.product', verbose_name='Produto')),
+            ],
+            options={
+                'verbose_name': 'Reserva de Estoque',
+                'verbose_name_plural': 'Reservas de Estoque',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(condition=models.Q(('status', 'active')), fields=['product', 'expires_at'], name='reservation_active_idx'), models.Index(condition=models.Q(('status', 'active')), fields=['expires_at'], name='reservation_expiry_idx'), models.Index(fields=['order', 'status'], name='reservation_order_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status', 'active')), fields=('order', 'product'), name='unique_active_reservation_per_order_product')],
+            },
+        ),
+    ]
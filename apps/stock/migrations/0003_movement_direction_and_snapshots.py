@@ -0,0 +1,61 @@
+# Generated by Django 5.2 on 2026-10-19 06:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def set_outgoing_direction(apps, schema_editor):
+    """Saídas registradas antes do campo `direction` passam a ter sinal negativo."""
+    StockMovement = apps.get_model('stock', 'StockMovement')
+    StockMovement.objects.filter(movement_type='OUT').update(direction=-1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_alter_product_options_and_more'),
+        ('stock', '0002_stockreservation'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(help_text='Dia ao fim do qual o saldo foi apurado', verbose_name='Data')),
+                ('quantity', models.IntegerField(help_text='Soma com sinal das movimentações até o fim do dia', verbose_name='Saldo')),
+                ('until', models.DateTimeField(help_text='Movimentações anteriores a este instante estão incluídas no saldo', verbose_name='Apurado Até')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Data de Criação')),
+            ],
+            options={
+                'verbose_name': 'Checkpoint de Estoque',
+                'verbose_name_plural': 'Checkpoints de Estoque',
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.AddField(
+            model_name='stockmovement',
+            name='direction',
+            field=models.SmallIntegerField(choices=[(1, 'Entrada'), (-1, 'Saída')], default=1, help_text='Entrada (+1) ou saída (-1) no saldo; definido pelo tipo, exceto em ajustes', verbose_name='Sentido'),
+        ),
+        migrations.RunPython(set_outgoing_direction, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['product', 'created_at'], name='movement_product_created_idx'),
+        ),
+        migrations.AddField(
+            model_name='stocksnapshot',
+            name='product',
+            field=models.ForeignKey(help_text='Produto do checkpoint', on_delete=django.db.models.deletion.CASCADE, related_name='stock_snapshots', to='products.product', verbose_name='Produto'),
+        ),
+        migrations.AddIndex(
+            model_name='stocksnapshot',
+            index=models.Index(fields=['product', 'until'], name='snapshot_product_until_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='stocksnapshot',
+            constraint=models.UniqueConstraint(fields=('product', 'date'), name='unique_snapshot_per_product_day'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-19 06:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_alter_product_options_and_more'),
+        ('stock', '0003_movement_direction_and_snapshots'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='stock',
+            index=models.Index(condition=models.Q(('quantity__lt', models.F('min_quantity'))), fields=['product'], name='stock_below_min_idx'),
+        ),
+    ]
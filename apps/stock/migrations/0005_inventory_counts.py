@@ -0,0 +1,53 @@
+# Generated by Django 5.2 on 2026-10-19 06:42
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_alter_product_options_and_more'),
+        ('stock', '0004_stock_below_min_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('open', 'Aberta'), ('closed', 'Encerrada'), ('cancelled', 'Cancelada')], default='open', max_length=10, verbose_name='Situação')),
+                ('notes', models.TextField(blank=True, verbose_name='Observações')),
+                ('started_at', models.DateTimeField(auto_now_add=True, verbose_name='Aberta em')),
+                ('closed_at', models.DateTimeField(blank=True, null=True, verbose_name='Encerrada em')),
+                ('category', models.ForeignKey(blank=True, help_text='Limita a contagem a uma categoria (vazio = todos os produtos com estoque)', null=True, on_delete=django.db.models.deletion.PROTECT, to='products.category', verbose_name='Categoria')),
+                ('closed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='closed_inventory_counts', to=settings.AUTH_USER_MODEL, verbose_name='Encerrada por')),
+                ('started_by', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='started_inventory_counts', to=settings.AUTH_USER_MODEL, verbose_name='Aberta por')),
+            ],
+            options={
+                'verbose_name': 'Contagem de Estoque',
+                'verbose_name_plural': 'Contagens de Estoque',
+                'ordering': ['-started_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='InventoryCountLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('expected', models.IntegerField(default=0, verbose_name='Esperado')),
+                ('expected_at', models.DateTimeField(verbose_name='Esperado em')),
+                ('counted', models.PositiveIntegerField(default=0, verbose_name='Contado')),
+                ('first_scanned_at', models.DateTimeField(blank=True, null=True, verbose_name='Primeira Leitura')),
+                ('adjustment', models.IntegerField(blank=True, null=True, verbose_name='Ajuste')),
+                ('count', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='stock.inventorycount', verbose_name='Contagem')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='inventory_count_lines', to='products.product', verbose_name='Produto')),
+            ],
+            options={
+                'verbose_name': 'Item da Contagem',
+                'verbose_name_plural': 'Itens da Contagem',
+                'constraints': [models.UniqueConstraint(fields=('count', 'product'), name='unique_count_line_per_product')],
+            },
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.2 on 2026-10-19 06:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_alter_product_options_and_more'),
+        ('stock', '0005_inventory_counts'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovementArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('movement_type', models.CharField(choices=[('IN', 'Entrada'), ('OUT', 'Saída'), ('RETURN', 'Devolução'), ('ADJUSTMENT', 'Ajuste'), ('CANCELLATION', 'Cancelamento')], max_length=12, verbose_name='Tipo de Movimentação')),
+                ('quantity', models.PositiveIntegerField(verbose_name='Quantidade')),
+                ('direction', models.SmallIntegerField(choices=[(1, 'Entrada'), (-1, 'Saída')], default=1, verbose_name='Sentido')),
+                ('reference_id', models.CharField(blank=True, max_length=50, verbose_name='ID de Referência')),
+                ('notes', models.TextField(blank=True, verbose_name='Observações')),
+                ('is_cancelled', models.BooleanField(default=False, verbose_name='Cancelado')),
+                ('cancelled_reason', models.TextField(blank=True, verbose_name='Motivo do Cancelamento')),
+                ('cancelled_at', models.DateTimeField(blank=True, null=True, verbose_name='Data de Cancelamento')),
+                ('created_at', models.DateTimeField(verbose_name='Data de Criação')),
+                ('updated_at', models.DateTimeField(verbose_name='Última Atualização')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='Arquivada em')),
+            ],
+            options={
+                'verbose_name': 'Movimentação Arquivada',
+                'verbose_name_plural': 'Movimentações Arquivadas',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='stockmovement',
+            name='movement_product_idx',
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['created_at'], name='movement_created_idx'),
+        ),
+        migrations.AddField(
+            model_name='stockmovementarchive',
+            name='cancelled_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='cancelled_archived_movements', to=settings.AUTH_USER_MODEL, verbose_name='Cancelado por'),
+        ),
+        migrations.AddField(
+            model_name='stockmovementarchive',
+            name='product',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_movements', to='products.product', verbose_name='Produto'),
+        ),
+        migrations.AddField(
+            model_name='stockmovementarchive',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_movements', to=settings.AUTH_USER_MODEL, verbose_name='Responsável'),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovementarchive',
+            index=models.Index(fields=['product', 'created_at'], name='archive_product_created_idx'),
+        ),
+    ]
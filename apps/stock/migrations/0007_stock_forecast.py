@@ -0,0 +1,33 @@
+# Generated by Django 5.2 on 2026-10-19 06:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0006_movement_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stock',
+            name='daily_demand',
+            field=models.DecimalField(blank=True, decimal_places=3, help_text='Média de saídas por dia prevista a partir do histórico', max_digits=12, null=True, verbose_name='Demanda Diária Prevista'),
+        ),
+        migrations.AddField(
+            model_name='stock',
+            name='forecast_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Previsão Calculada em'),
+        ),
+        migrations.AddField(
+            model_name='stock',
+            name='reorder_quantity',
+            field=models.PositiveIntegerField(blank=True, help_text='Quantidade sugerida por pedido de compra', null=True, verbose_name='Quantidade de Reposição Sugerida'),
+        ),
+        migrations.AddField(
+            model_name='stock',
+            name='suggested_min_quantity',
+            field=models.PositiveIntegerField(blank=True, help_text='Demanda no prazo de reposição mais o estoque de segurança', null=True, verbose_name='Estoque Mínimo Sugerido'),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2 on 2026-10-19 06:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_alter_product_options_and_more'),
+        ('stock', '0007_stock_forecast'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stockmovement',
+            name='unit_cost',
+            field=models.DecimalField(blank=True, decimal_places=4, help_text='Custo de aquisição por unidade (entradas). Vazio: custo médio atual do produto', max_digits=12, null=True, verbose_name='Custo Unitário'),
+        ),
+        migrations.AddField(
+            model_name='stockmovementarchive',
+            name='unit_cost',
+            field=models.DecimalField(blank=True, decimal_places=4, max_digits=12, null=True, verbose_name='Custo Unitário'),
+        ),
+        migrations.CreateModel(
+            name='CostLayer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('movement_id', models.BigIntegerField(blank=True, null=True, verbose_name='Movimentação')),
+                ('received_at', models.DateTimeField(verbose_name='Recebida em')),
+                ('quantity', models.PositiveIntegerField(verbose_name='Quantidade')),
+                ('remaining', models.PositiveIntegerField(verbose_name='Saldo')),
+                ('unit_cost', models.DecimalField(decimal_places=4, max_digits=12, verbose_name='Custo Unitário')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cost_layers', to='products.product', verbose_name='Produto')),
+            ],
+            options={
+                'verbose_name': 'Camada de Custo',
+                'verbose_name_plural': 'Camadas de Custo',
+                'ordering': ['product', 'received_at', 'id'],
+                'indexes': [models.Index(condition=models.Q(('remaining__gt', 0)), fields=['product', 'received_at'], name='costlayer_open_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ValuationEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('movement_id', models.BigIntegerField(blank=True, null=True, verbose_name='Movimentação')),
+                ('created_at', models.DateTimeField(verbose_name='Data')),
+                ('quantity', models.IntegerField(verbose_name='Saldo')),
+                ('average_cost', models.DecimalField(decimal_places=4, max_digits=12, verbose_name='Custo Médio')),
+                ('fifo_value', models.DecimalField(decimal_places=4, max_digits=16, verbose_name='Valor PEPS')),
+                ('cogs_average', models.DecimalField(decimal_places=4, default=0, max_digits=16, verbose_name='Custo da Saída (Médio)')),
+                ('cogs_fifo', models.DecimalField(decimal_places=4, default=0, max_digits=16, verbose_name='Custo da Saída (PEPS)')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='valuation_entries', to='products.product', verbose_name='Produto')),
+            ],
+            options={
+                'verbose_name': 'Valorização de Estoque',
+                'verbose_name_plural': 'Valorizações de Estoque',
+                'ordering': ['product', 'created_at', 'id'],
+                'indexes': [models.Index(fields=['product', 'created_at', 'id'], name='valuation_product_created_idx')],
+            },
+        ),
+    ]
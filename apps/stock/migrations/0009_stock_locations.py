@@ -0,0 +1,87 @@
+# Generated by Django 5.2 on 2026-10-19 06:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def create_default_location(apps, schema_editor):
+    """
+    Cria o local padrão e atribui a ele todo o estoque existente, mantendo
+    `Stock.quantity` igual à soma por local.
+    """
+    Location = apps.get_model('stock', 'Location')
+    LocationStock = apps.get_model('stock', 'LocationStock')
+    Stock = apps.get_model('stock', 'Stock')
+    location = Location.objects.create(
+        code='PRINCIPAL', name='Depósito Principal', kind='WAREHOUSE', receives_stock=True
+    )
+    LocationStock.objects.bulk_create(
+        [
+            LocationStock(location=location, product_id=product_id, quantity=quantity)
+            for product_id, quantity in Stock.objects.filter(quantity__gt=0).values_list('product_id', 'quantity').iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_alter_product_options_and_more'),
+        ('stock', '0008_inventory_valuation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Location',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=10, unique=True, verbose_name='Código')),
+                ('name', models.CharField(max_length=100, verbose_name='Nome')),
+                ('kind', models.CharField(choices=[('SHOWROOM', 'Showroom'), ('WAREHOUSE', 'Depósito')], default='WAREHOUSE', max_length=10, verbose_name='Tipo')),
+                ('priority', models.PositiveSmallIntegerField(default=100, help_text='Baixas de pedidos retiram primeiro dos locais de menor prioridade', verbose_name='Prioridade de Retirada')),
+                ('receives_stock', models.BooleanField(default=False, help_text='Local padrão das entradas, devoluções e estornos', verbose_name='Recebe Entradas')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Ativo')),
+            ],
+            options={
+                'verbose_name': 'Local de Estoque',
+                'verbose_name_plural': 'Locais de Estoque',
+                'ordering': ['priority', 'code'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='stockmovement',
+            name='movement_type',
+            field=models.CharField(choices=[('IN', 'Entrada'), ('OUT', 'Saída'), ('RETURN', 'Devolução'), ('ADJUSTMENT', 'Ajuste'), ('CANCELLATION', 'Cancelamento'), ('TRANSFER', 'Transferência')], help_text='Tipo de operação realizada no estoque', max_length=12, verbose_name='Tipo de Movimentação'),
+        ),
+        migrations.AlterField(
+            model_name='stockmovementarchive',
+            name='movement_type',
+            field=models.CharField(choices=[('IN', 'Entrada'), ('OUT', 'Saída'), ('RETURN', 'Devolução'), ('ADJUSTMENT', 'Ajuste'), ('CANCELLATION', 'Cancelamento'), ('TRANSFER', 'Transferência')], max_length=12, verbose_name='Tipo de Movimentação'),
+        ),
+        migrations.AddField(
+            model_name='stockmovement',
+            name='location',
+            field=models.ForeignKey(blank=True, help_text='Local de estoque (showroom, depósito) movimentado', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='movements', to='stock.location', verbose_name='Local'),
+        ),
+        migrations.AddField(
+            model_name='stockmovementarchive',
+            name='location',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='archived_movements', to='stock.location', verbose_name='Local'),
+        ),
+        migrations.CreateModel(
+            name='LocationStock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField(default=0, verbose_name='Quantidade')),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='stocks', to='stock.location', verbose_name='Local')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='location_stocks', to='products.product', verbose_name='Produto')),
+            ],
+            options={
+                'verbose_name': 'Estoque por Local',
+                'verbose_name_plural': 'Estoques por Local',
+                'constraints': [models.UniqueConstraint(fields=('location', 'product'), name='unique_stock_per_location')],
+            },
+        ),
+        migrations.RunPython(create_default_location, migrations.RunPython.noop),
+    ]
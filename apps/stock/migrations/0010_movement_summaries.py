@@ -0,0 +1,37 @@
+# Generated by Django 5.2 on 2026-10-19 07:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_alter_product_options_and_more'),
+        ('stock', '0009_stock_locations'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovementSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.DateField(verbose_name='Mês')),
+                ('until', models.DateTimeField(verbose_name='Apurado Até')),
+                ('movement_type', models.CharField(choices=[('IN', 'Entrada'), ('OUT', 'Saída'), ('RETURN', 'Devolução'), ('ADJUSTMENT', 'Ajuste'), ('CANCELLATION', 'Cancelamento'), ('TRANSFER', 'Transferência')], max_length=12, verbose_name='Tipo de Movimentação')),
+                ('direction', models.SmallIntegerField(choices=[(1, 'Entrada'), (-1, 'Saída')], verbose_name='Sentido')),
+                ('quantity', models.PositiveIntegerField(verbose_name='Quantidade')),
+                ('movements', models.PositiveIntegerField(verbose_name='Movimentações')),
+                ('unit_cost', models.DecimalField(blank=True, decimal_places=4, max_digits=12, null=True, verbose_name='Custo Unitário Médio')),
+                ('archive_file', models.CharField(max_length=255, verbose_name='Arquivo')),
+                ('compacted_at', models.DateTimeField(auto_now_add=True, verbose_name='Compactada em')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='movement_summaries', to='products.product', verbose_name='Produto')),
+            ],
+            options={
+                'verbose_name': 'Resumo de Movimentações',
+                'verbose_name_plural': 'Resumos de Movimentações',
+                'ordering': ['product', 'period'],
+                'constraints': [models.UniqueConstraint(fields=('product', 'period', 'movement_type', 'direction'), name='unique_movement_summary')],
+            },
+        ),
+    ]
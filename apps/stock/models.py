@@ -7,6 +7,21 @@ from apps.products.models import Product
 
 User = get_user_model()
 
+class StockQuerySet(models.QuerySet):
+    def below_minimum(self):
+        """
+        Estoques abaixo do mínimo (`quantity < min_quantity`), com produto,
+        categoria e subcategoria na mesma consulta, do maior para o menor déficit.
+        O filtro corresponde ao índice parcial `stock_below_min_idx`.
+        """
+        return (
+            self.filter(quantity__lt=F('min_quantity'))
+            .select_related('product__category', 'product__subcategory')
+            .annotate(shortage=F('min_quantity') - F('quantity'))
+            .order_by('-shortage', 'product_id')
+        )
+
+
 class Stock(models.Model):
     """
     Modelo que representa o estoque físico de um produto no sistema.
@@ -16,6 +31,10 @@ class Stock(models.Model):
         quantity (PositiveIntegerField): Quantidade atual em estoque
         min_quantity (PositiveIntegerField): Nível mínimo de estoque para alertas
         location (CharField): Localização física no armazém
+        daily_demand (DecimalField): Demanda diária prevista (rotina `forecast_stock_demand`)
+        suggested_min_quantity (PositiveIntegerField): Ponto de reposição sugerido pela previsão
+        reorder_quantity (PositiveIntegerField): Quantidade de compra sugerida pela previsão
+        forecast_at (DateTimeField): Data/hora da última previsão
         last_updated (DateTimeField): Data/hora da última atualização
     """
     product = models.OneToOneField(
@@ -41,17 +60,50 @@ class Stock(models.Model):
         blank=True,
         help_text="Corredor, prateleira ou código de localização"
     )
+    daily_demand = models.DecimalField(
+        verbose_name='Demanda Diária Prevista',
+        max_digits=12,
+        decimal_places=3,
+        null=True,
+        blank=True,
+        help_text="Média de saídas por dia prevista a partir do histórico"
+    )
+    suggested_min_quantity = models.PositiveIntegerField(
+        verbose_name='Estoque Mínimo Sugerido',
+        null=True,
+        blank=True,
+        help_text="Demanda no prazo de reposição mais o estoque de segurança"
+    )
+    reorder_quantity = models.PositiveIntegerField(
+        verbose_name='Quantidade de Reposição Sugerida',
+        null=True,
+        blank=True,
+        help_text="Quantidade sugerida por pedido de compra"
+    )
+    forecast_at = models.DateTimeField(
+        verbose_name='Previsão Calculada em',
+        null=True,
+        blank=True
+    )
     last_updated = models.DateTimeField(
         verbose_name='Última Atualização',
         auto_now=True,
         help_text="Data e hora da última atualização do estoque"
     )
 
+    objects = StockQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Estoque'
         verbose_name_plural = 'Estoques'
         indexes = [
             models.Index(fields=['product'], name='stock_product_idx'),
+            # Índice parcial: só os estoques abaixo do mínimo (lista de reposição)
+            models.Index(
+                fields=['product'],
+                name='stock_below_min_idx',
+                condition=models.Q(quantity__lt=F('min_quantity')),
+            ),
         ]
         ordering = ['-last_updated']
 
@@ -59,6 +111,110 @@ class Stock(models.Model):
         """Representação string do objeto."""
         return f"{self.product.name} | {self.quantity} unidades"
 
+    @property
+    def is_below_minimum(self):
+        """Indica se o estoque está abaixo do mínimo de reposição."""
+        return self.quantity < self.min_quantity
+
+
+
+class Location(models.Model):
+    """
+    Local físico de estoque (showroom, depósitos).
+
+    `Stock.quantity` continua sendo o total do produto; a divisão por local
+    fica em `LocationStock`, mantida pelas mesmas gravações em lote
+    (`apps.stock.services.apply_stock_deltas`).
+
+    Atributos:
+        code (CharField): Código curto do local
+        name (CharField): Nome do local
+        kind (CharField): Tipo (showroom ou depósito)
+        priority (PositiveSmallIntegerField): Ordem de retirada nas baixas (menor primeiro)
+        receives_stock (BooleanField): Local padrão das entradas e devoluções
+        is_active (BooleanField): Local em uso
+    """
+    KIND_CHOICES = [
+        ('SHOWROOM', 'Showroom'),
+        ('WAREHOUSE', 'Depósito'),
+    ]
+
+    code = models.CharField(verbose_name='Código', max_length=10, unique=True)
+    name = models.CharField(verbose_name='Nome', max_length=100)
+    kind = models.CharField(verbose_name='Tipo', max_length=10, choices=KIND_CHOICES, default='WAREHOUSE')
+    priority = models.PositiveSmallIntegerField(
+        verbose_name='Prioridade de Retirada',
+        default=100,
+        help_text="Baixas de pedidos retiram primeiro dos locais de menor prioridade"
+    )
+    receives_stock = models.BooleanField(
+        verbose_name='Recebe Entradas',
+        default=False,
+        help_text="Local padrão das entradas, devoluções e estornos"
+    )
+    is_active = models.BooleanField(verbose_name='Ativo', default=True)
+
+    class Meta:
+        verbose_name = 'Local de Estoque'
+        verbose_name_plural = 'Locais de Estoque'
+        ordering = ['priority', 'code']
+
+    def __str__(self):
+        """Representação string do objeto."""
+        return f"{self.code} - {self.name}"
+
+
+class LocationStock(models.Model):
+    """
+    Quantidade de um produto em um local de estoque.
+
+    Atributos:
+        location (ForeignKey): Local
+        product (ForeignKey): Produto
+        quantity (PositiveIntegerField): Quantidade no local
+    """
+    location = models.ForeignKey(
+        Location,
+        verbose_name='Local',
+        on_delete=models.PROTECT,
+        related_name='stocks'
+    )
+    product = models.ForeignKey(
+        Product,
+        verbose_name='Produto',
+        on_delete=models.CASCADE,
+        related_name='location_stocks'
+    )
+    quantity = models.PositiveIntegerField(verbose_name='Quantidade', default=0)
+
+    class Meta:
+        verbose_name = 'Estoque por Local'
+        verbose_name_plural = 'Estoques por Local'
+        constraints = [
+            models.UniqueConstraint(fields=['location', 'product'], name='unique_stock_per_location'),
+        ]
+
+    def __str__(self):
+        """Representação string do objeto."""
+        return f"{self.location_id} | {self.product_id} | {self.quantity}"
+
+
+class StockMovementQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        """
+        Preenche `direction` a partir do tipo, como em `StockMovement.save`, e
+        atualiza a valorização do estoque (custo médio e camadas PEPS) das
+        movimentações criadas.
+        """
+        from .valuation import value_movements
+
+        objs = list(objs)
+        for movement in objs:
+            movement.direction = movement.resolve_direction()
+        with transaction.atomic(savepoint=False):
+            created = super().bulk_create(objs, *args, **kwargs)
+            value_movements(created)
+        return created
 
 
 class StockMovement(models.Model):
@@ -68,7 +224,10 @@ class StockMovement(models.Model):
     Atributos:
         product (ForeignKey): Produto relacionado à movimentação
         movement_type (CharField): Tipo de movimentação (Entrada, Saída, Devolução, etc.)
+        location (ForeignKey): Local de estoque movimentado (vazio = sem local definido)
         quantity (PositiveIntegerField): Quantidade movimentada (sempre positiva)
+        direction (SmallIntegerField): Sinal da movimentação no saldo (+1 entrada, -1 saída)
+        unit_cost (DecimalField): Custo unitário de aquisição (entradas); base da valorização
         reference_id (CharField): Identificador externo para referência (ex: número do pedido)
         user (ForeignKey): Usuário responsável pela movimentação
         notes (TextField): Observações adicionais sobre a movimentação
@@ -84,7 +243,21 @@ class StockMovement(models.Model):
         ('OUT', 'Saída'),
         ('RETURN', 'Devolução'),
         ('ADJUSTMENT', 'Ajuste'),
-        ('CANCELLATION', 'Cancelamento')
+        ('CANCELLATION', 'Cancelamento'),
+        ('TRANSFER', 'Transferência'),
+    ]
+
+    # Sinal de cada tipo no saldo; ajustes (ADJUSTMENT) e transferências (TRANSFER,
+    # uma saída na origem e uma entrada no destino) informam o sinal em `direction`
+    TYPE_DIRECTIONS = {
+        'IN': 1,
+        'OUT': -1,
+        'RETURN': 1,
+        'CANCELLATION': 1,
+    }
+    DIRECTION_CHOICES = [
+        (1, 'Entrada'),
+        (-1, 'Saída'),
     ]
 
     product = models.ForeignKey(
@@ -100,10 +273,33 @@ class StockMovement(models.Model):
         choices=MOVEMENT_TYPE_CHOICES,
         help_text="Tipo de operação realizada no estoque"
     )
+    location = models.ForeignKey(
+        'Location',
+        verbose_name='Local',
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='movements',
+        help_text="Local de estoque (showroom, depósito) movimentado"
+    )
     quantity = models.PositiveIntegerField(
         verbose_name='Quantidade',
         help_text="Quantidade movimentada (valor sempre positivo)"
     )
+    direction = models.SmallIntegerField(
+        verbose_name='Sentido',
+        choices=DIRECTION_CHOICES,
+        default=1,
+        help_text="Entrada (+1) ou saída (-1) no saldo; definido pelo tipo, exceto em ajustes"
+    )
+    unit_cost = models.DecimalField(
+        verbose_name='Custo Unitário',
+        max_digits=12,
+        decimal_places=4,
+        null=True,
+        blank=True,
+        help_text="Custo de aquisição por unidade (entradas). Vazio: custo médio atual do produto"
+    )
     reference_id = models.CharField(
         verbose_name='ID de Referência',
         max_length=50,
@@ -157,18 +353,562 @@ class StockMovement(models.Model):
         help_text="Data e hora da última atualização do registro"
     )
 
+    objects = StockMovementQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Movimentação de Estoque'
         verbose_name_plural = 'Movimentações de Estoque'
         app_label = 'stock'
         ordering = ['-created_at']
+        # Caminhos de acesso: histórico recente de um produto (product, created_at),
+        # listagem/arquivamento por data (created_at) e filtros por tipo.
+        # O índice isolado em `product` é coberto pelo prefixo do composto.
         indexes = [
-            models.Index(fields=['product'], name='movement_product_idx'),
             models.Index(fields=['movement_type'], name='movement_type_idx'),
             models.Index(fields=['is_cancelled'], name='movement_cancelled_idx'),
+            models.Index(fields=['product', 'created_at'], name='movement_product_created_idx'),
+            models.Index(fields=['created_at'], name='movement_created_idx'),
         ]
 
+    def resolve_direction(self):
+        """Sentido da movimentação: fixo pelo tipo, ou o informado no caso de ajustes."""
+        return self.TYPE_DIRECTIONS.get(self.movement_type, self.direction)
+
+    @property
+    def signed_quantity(self):
+        """Quantidade com sinal (positiva para entradas, negativa para saídas)."""
+        return self.quantity * self.direction
+
+    def save(self, *args, **kwargs):
+        from .valuation import value_movements
+
+        self.direction = self.resolve_direction()
+        creating = self._state.adding
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+            if creating:
+                value_movements([self])
+
     def __str__(self):
         """Representação string do objeto."""
         status = "(CANCELADO)" if self.is_cancelled else ""
         return f"{self.get_movement_type_display()} {status} | {self.product.name} | {self.quantity} unidades"
+
+
+
+class StockMovementArchive(models.Model):
+    """
+    Movimentações de estoque antigas, retiradas da tabela principal.
+
+    A rotina `archive_stock_movements` move para cá, em lotes, os meses já
+    cobertos pelos checkpoints diários (`StockSnapshot`), mantendo
+    `StockMovement` com o histórico recente. As linhas preservam o `id`
+    original e continuam somando no livro (`apps.stock.ledger`).
+
+    Atributos: os mesmos de `StockMovement`, mais `archived_at`.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    product = models.ForeignKey(
+        Product,
+        verbose_name='Produto',
+        on_delete=models.PROTECT,
+        related_name='archived_movements'
+    )
+    movement_type = models.CharField(
+        verbose_name='Tipo de Movimentação',
+        max_length=12,
+        choices=StockMovement.MOVEMENT_TYPE_CHOICES
+    )
+    location = models.ForeignKey(
+        'Location',
+        verbose_name='Local',
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='archived_movements'
+    )
+    quantity = models.PositiveIntegerField(verbose_name='Quantidade')
+    direction = models.SmallIntegerField(
+        verbose_name='Sentido',
+        choices=StockMovement.DIRECTION_CHOICES,
+        default=1
+    )
+    unit_cost = models.DecimalField(
+        verbose_name='Custo Unitário',
+        max_digits=12,
+        decimal_places=4,
+        null=True,
+        blank=True
+    )
+    reference_id = models.CharField(verbose_name='ID de Referência', max_length=50, blank=True)
+    user = models.ForeignKey(
+        User,
+        verbose_name='Responsável',
+        on_delete=models.PROTECT,
+        related_name='archived_movements'
+    )
+    notes = models.TextField(verbose_name='Observações', blank=True)
+    is_cancelled = models.BooleanField(verbose_name='Cancelado', default=False)
+    cancelled_reason = models.TextField(verbose_name='Motivo do Cancelamento', blank=True)
+    cancelled_by = models.ForeignKey(
+        User,
+        verbose_name='Cancelado por',
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='cancelled_archived_movements'
+    )
+    cancelled_at = models.DateTimeField(verbose_name='Data de Cancelamento', null=True, blank=True)
+    created_at = models.DateTimeField(verbose_name='Data de Criação')
+    updated_at = models.DateTimeField(verbose_name='Última Atualização')
+    archived_at = models.DateTimeField(verbose_name='Arquivada em', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Movimentação Arquivada'
+        verbose_name_plural = 'Movimentações Arquivadas'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['product', 'created_at'], name='archive_product_created_idx'),
+        ]
+
+    @property
+    def signed_quantity(self):
+        """Quantidade com sinal (positiva para entradas, negativa para saídas)."""
+        return self.quantity * self.direction
+
+    def __str__(self):
+        """Representação string do objeto."""
+        return f"{self.get_movement_type_display()} (arquivada) | {self.product_id} | {self.quantity} unidades"
+
+
+class StockMovementSummary(models.Model):
+    """
+    Total mensal das movimentações compactadas de um produto, por tipo e sentido.
+
+    A rotina `compact_stock_movements` substitui as movimentações arquivadas
+    mais antigas por estas linhas e grava as originais em arquivos NDJSON
+    compactados (`archive_file`). O livro continua somando os totais na
+    conciliação completa e na revalorização (`apps.stock.archive`).
+
+    Atributos:
+        product (ForeignKey): Produto
+        period (DateField): Primeiro dia do mês
+        until (DateTimeField): Início do mês seguinte (limite exclusivo das movimentações incluídas)
+        movement_type (CharField): Tipo das movimentações somadas
+        direction (SmallIntegerField): Sentido das movimentações somadas
+        quantity (PositiveIntegerField): Soma das quantidades (canceladas ficam de fora)
+        movements (PositiveIntegerField): Quantidade de movimentações somadas
+        unit_cost (DecimalField): Custo médio ponderado das movimentações com custo
+        archive_file (CharField): Arquivo NDJSON com as movimentações originais
+        compacted_at (DateTimeField): Data/hora da compactação
+    """
+    product = models.ForeignKey(
+        Product,
+        verbose_name='Produto',
+        on_delete=models.PROTECT,
+        related_name='movement_summaries'
+    )
+    period = models.DateField(verbose_name='Mês')
+    until = models.DateTimeField(verbose_name='Apurado Até')
+    movement_type = models.CharField(
+        verbose_name='Tipo de Movimentação',
+        max_length=12,
+        choices=StockMovement.MOVEMENT_TYPE_CHOICES
+    )
+    direction = models.SmallIntegerField(
+        verbose_name='Sentido',
+        choices=StockMovement.DIRECTION_CHOICES
+    )
+    quantity = models.PositiveIntegerField(verbose_name='Quantidade')
+    movements = models.PositiveIntegerField(verbose_name='Movimentações')
+    unit_cost = models.DecimalField(
+        verbose_name='Custo Unitário Médio',
+        max_digits=12,
+        decimal_places=4,
+        null=True,
+        blank=True
+    )
+    archive_file = models.CharField(verbose_name='Arquivo', max_length=255)
+    compacted_at = models.DateTimeField(verbose_name='Compactada em', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Resumo de Movimentações'
+        verbose_name_plural = 'Resumos de Movimentações'
+        ordering = ['product', 'period']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['product', 'period', 'movement_type', 'direction'],
+                name='unique_movement_summary',
+            ),
+        ]
+
+    @property
+    def signed_quantity(self):
+        """Quantidade com sinal (positiva para entradas, negativa para saídas)."""
+        return self.quantity * self.direction
+
+    def __str__(self):
+        """Representação string do objeto."""
+        return f"{self.get_movement_type_display()} {self.period:%m/%Y} | {self.product_id} | {self.quantity} unidades"
+
+class StockReservation(models.Model):
+    """
+    Reserva (hold) de estoque feita por um pedido ainda não confirmado.
+
+    A quantidade disponível de um produto é o estoque físico menos as reservas
+    ativas. Reservas de rascunho expiram (`expires_at`) e são liberadas pela
+    rotina `release_expired_reservations`; na confirmação do pedido viram
+    movimentações de saída e são marcadas como convertidas.
+
+    Atributos:
+        product (ForeignKey): Produto reservado
+        order (ForeignKey): Pedido que fez a reserva
+        quantity (PositiveIntegerField): Quantidade reservada
+        status (CharField): Situação da reserva (ativa, convertida, liberada, expirada)
+        expires_at (DateTimeField): Validade da reserva (vazio = sem expiração)
+        created_at (DateTimeField): Data/hora de criação
+        updated_at (DateTimeField): Data/hora da última atualização
+    """
+    STATUS_CHOICES = [
+        ('active', 'Ativa'),
+        ('converted', 'Convertida em saída'),
+        ('released', 'Liberada'),
+        ('expired', 'Expirada'),
+    ]
+
+    product = models.ForeignKey(
+        Product,
+        verbose_name='Produto',
+        on_delete=models.PROTECT,
+        related_name='reservations',
+        help_text="Produto reservado"
+    )
+    order = models.ForeignKey(
+        'orders.Order',
+        verbose_name='Pedido',
+        on_delete=models.CASCADE,
+        related_name='stock_reservations',
+        help_text="Pedido que originou a reserva"
+    )
+    quantity = models.PositiveIntegerField(
+        verbose_name='Quantidade',
+        help_text="Quantidade reservada"
+    )
+    status = models.CharField(
+        verbose_name='Situação',
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default='active',
+        help_text="Situação atual da reserva"
+    )
+    expires_at = models.DateTimeField(
+        verbose_name='Expira em',
+        null=True,
+        blank=True,
+        help_text="Data e hora em que a reserva expira (vazio = não expira)"
+    )
+    created_at = models.DateTimeField(
+        verbose_name='Data de Criação',
+        auto_now_add=True,
+        help_text="Data e hora de criação da reserva"
+    )
+    updated_at = models.DateTimeField(
+        verbose_name='Última Atualização',
+        auto_now=True,
+        help_text="Data e hora da última atualização da reserva"
+    )
+
+    class Meta:
+        verbose_name = 'Reserva de Estoque'
+        verbose_name_plural = 'Reservas de Estoque'
+        ordering = ['-created_at']
+        indexes = [
+            # Índices parciais: só as reservas ativas participam das consultas quentes
+            models.Index(
+                fields=['product', 'expires_at'],
+                name='reservation_active_idx',
+                condition=models.Q(status='active'),
+            ),
+            models.Index(
+                fields=['expires_at'],
+                name='reservation_expiry_idx',
+                condition=models.Q(status='active'),
+            ),
+            models.Index(fields=['order', 'status'], name='reservation_order_idx'),
+        ]
+        constraints = [
+            # Um pedido mantém no máximo uma reserva ativa por produto
+            models.UniqueConstraint(
+                fields=['order', 'product'],
+                condition=models.Q(status='active'),
+                name='unique_active_reservation_per_order_product',
+            ),
+        ]
+
+    def __str__(self):
+        """Representação string do objeto."""
+        return f"Reserva {self.get_status_display()} | Pedido #{self.order_id} | {self.quantity} unidades"
+
+
+class StockSnapshot(models.Model):
+    """
+    Saldo de um produto no fim de um dia (checkpoint do livro de movimentações).
+
+    As linhas são geradas de forma incremental pela rotina
+    `build_stock_snapshots`, só para os dias em que o produto teve
+    movimentações. O saldo em qualquer instante é o checkpoint mais recente
+    somado às movimentações posteriores a ele (`apps.stock.ledger.stock_at`).
+
+    Atributos:
+        product (ForeignKey): Produto
+        date (DateField): Dia do checkpoint
+        quantity (IntegerField): Saldo acumulado das movimentações até o fim do dia
+        until (DateTimeField): Início do dia seguinte (limite exclusivo das movimentações incluídas)
+        created_at (DateTimeField): Data/hora de geração
+    """
+    product = models.ForeignKey(
+        Product,
+        verbose_name='Produto',
+        on_delete=models.CASCADE,
+        related_name='stock_snapshots',
+        help_text="Produto do checkpoint"
+    )
+    date = models.DateField(
+        verbose_name='Data',
+        help_text="Dia ao fim do qual o saldo foi apurado"
+    )
+    quantity = models.IntegerField(
+        verbose_name='Saldo',
+        help_text="Soma com sinal das movimentações até o fim do dia"
+    )
+    until = models.DateTimeField(
+        verbose_name='Apurado Até',
+        help_text="Movimentações anteriores a este instante estão incluídas no saldo"
+    )
+    created_at = models.DateTimeField(
+        verbose_name='Data de Criação',
+        auto_now_add=True
+    )
+
+    class Meta:
+        verbose_name = 'Checkpoint de Estoque'
+        verbose_name_plural = 'Checkpoints de Estoque'
+        ordering = ['-date']
+        indexes = [
+            models.Index(fields=['product', 'until'], name='snapshot_product_until_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'date'], name='unique_snapshot_per_product_day'),
+        ]
+
+    def __str__(self):
+        """Representação string do objeto."""
+        return f"{self.product_id} | {self.date:%d/%m/%Y} | {self.quantity} unidades"
+
+
+class InventoryCount(models.Model):
+    """
+    Sessão de contagem física de estoque (inventário rotativo) por leitura de código de barras.
+
+    Na abertura, o estoque esperado dos produtos do escopo é fotografado em
+    `InventoryCountLine`; as leituras (GTIN + quantidade) somam em `counted`
+    e, no encerramento, as diferenças viram movimentações `ADJUSTMENT`
+    (ver `apps.stock.counting`).
+
+    Atributos:
+        status (CharField): Situação da sessão (aberta, encerrada, cancelada)
+        category (ForeignKey): Categoria contada (vazio = todos os produtos com estoque)
+        notes (TextField): Observações
+        started_by (ForeignKey): Usuário que abriu a sessão
+        started_at (DateTimeField): Data/hora da abertura (momento da foto do estoque)
+        closed_by (ForeignKey): Usuário que encerrou a sessão
+        closed_at (DateTimeField): Data/hora do encerramento
+    """
+    STATUS_CHOICES = [
+        ('open', 'Aberta'),
+        ('closed', 'Encerrada'),
+        ('cancelled', 'Cancelada'),
+    ]
+
+    status = models.CharField(
+        verbose_name='Situação',
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default='open'
+    )
+    category = models.ForeignKey(
+        'products.Category',
+        verbose_name='Categoria',
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        help_text="Limita a contagem a uma categoria (vazio = todos os produtos com estoque)"
+    )
+    notes = models.TextField(verbose_name='Observações', blank=True)
+    started_by = models.ForeignKey(
+        User,
+        verbose_name='Aberta por',
+        on_delete=models.PROTECT,
+        related_name='started_inventory_counts'
+    )
+    started_at = models.DateTimeField(verbose_name='Aberta em', auto_now_add=True)
+    closed_by = models.ForeignKey(
+        User,
+        verbose_name='Encerrada por',
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='closed_inventory_counts'
+    )
+    closed_at = models.DateTimeField(verbose_name='Encerrada em', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Contagem de Estoque'
+        verbose_name_plural = 'Contagens de Estoque'
+        ordering = ['-started_at']
+
+    def __str__(self):
+        """Representação string do objeto."""
+        return f"Contagem #{self.pk} ({self.get_status_display()})"
+
+
+class InventoryCountLine(models.Model):
+    """
+    Produto de uma sessão de contagem: estoque esperado e quantidade lida.
+
+    Atributos:
+        count (ForeignKey): Sessão de contagem
+        product (ForeignKey): Produto
+        expected (IntegerField): Estoque do sistema em `expected_at`
+        expected_at (DateTimeField): Momento da foto do estoque esperado
+        counted (PositiveIntegerField): Soma das leituras
+        first_scanned_at (DateTimeField): Primeira leitura do produto (vazio = não lido)
+        adjustment (IntegerField): Ajuste aplicado no encerramento
+    """
+    count = models.ForeignKey(
+        InventoryCount,
+        verbose_name='Contagem',
+        on_delete=models.CASCADE,
+        related_name='lines'
+    )
+    product = models.ForeignKey(
+        Product,
+        verbose_name='Produto',
+        on_delete=models.PROTECT,
+        related_name='inventory_count_lines'
+    )
+    expected = models.IntegerField(verbose_name='Esperado', default=0)
+    expected_at = models.DateTimeField(verbose_name='Esperado em')
+    counted = models.PositiveIntegerField(verbose_name='Contado', default=0)
+    first_scanned_at = models.DateTimeField(verbose_name='Primeira Leitura', null=True, blank=True)
+    adjustment = models.IntegerField(verbose_name='Ajuste', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Item da Contagem'
+        verbose_name_plural = 'Itens da Contagem'
+        constraints = [
+            models.UniqueConstraint(fields=['count', 'product'], name='unique_count_line_per_product'),
+        ]
+
+    def __str__(self):
+        """Representação string do objeto."""
+        return f"Contagem #{self.count_id} | {self.product_id} | {self.counted}/{self.expected}"
+
+
+class CostLayer(models.Model):
+    """
+    Camada de custo PEPS (FIFO): um lote de unidades que entrou no estoque a um custo.
+
+    Cada entrada cria uma camada; as saídas consomem `remaining` das camadas
+    mais antigas primeiro (ver `apps.stock.valuation`).
+
+    Atributos:
+        product (ForeignKey): Produto
+        movement_id (BigIntegerField): Movimentação de origem (sem FK: pode ser arquivada)
+        received_at (DateTimeField): Data/hora da entrada
+        quantity (PositiveIntegerField): Unidades recebidas
+        remaining (PositiveIntegerField): Unidades ainda em estoque
+        unit_cost (DecimalField): Custo unitário da camada
+    """
+    product = models.ForeignKey(
+        Product,
+        verbose_name='Produto',
+        on_delete=models.CASCADE,
+        related_name='cost_layers'
+    )
+    movement_id = models.BigIntegerField(verbose_name='Movimentação', null=True, blank=True)
+    received_at = models.DateTimeField(verbose_name='Recebida em')
+    quantity = models.PositiveIntegerField(verbose_name='Quantidade')
+    remaining = models.PositiveIntegerField(verbose_name='Saldo')
+    unit_cost = models.DecimalField(verbose_name='Custo Unitário', max_digits=12, decimal_places=4)
+
+    class Meta:
+        verbose_name = 'Camada de Custo'
+        verbose_name_plural = 'Camadas de Custo'
+        ordering = ['product', 'received_at', 'id']
+        indexes = [
+            # Só as camadas com saldo são lidas ao valorizar saídas
+            models.Index(
+                fields=['product', 'received_at'],
+                name='costlayer_open_idx',
+                condition=models.Q(remaining__gt=0),
+            ),
+        ]
+
+    def __str__(self):
+        """Representação string do objeto."""
+        return f"{self.product_id} | {self.remaining}/{self.quantity} a {self.unit_cost}"
+
+
+class ValuationEntry(models.Model):
+    """
+    Situação da valorização de um produto após cada movimentação.
+
+    Gravada de forma incremental junto com as movimentações; o valor do
+    estoque em uma data é a entrada mais recente de cada produto até a data,
+    sem reprocessar o livro.
+
+    Atributos:
+        product (ForeignKey): Produto
+        movement_id (BigIntegerField): Movimentação que gerou a entrada
+        created_at (DateTimeField): Data/hora da movimentação
+        quantity (IntegerField): Saldo de unidades após a movimentação
+        average_cost (DecimalField): Custo médio ponderado após a movimentação
+        fifo_value (DecimalField): Valor do estoque pelas camadas PEPS
+        cogs_average (DecimalField): Custo da saída pelo custo médio (0 em entradas)
+        cogs_fifo (DecimalField): Custo da saída pelas camadas PEPS (0 em entradas)
+    """
+    product = models.ForeignKey(
+        Product,
+        verbose_name='Produto',
+        on_delete=models.CASCADE,
+        related_name='valuation_entries'
+    )
+    movement_id = models.BigIntegerField(verbose_name='Movimentação', null=True, blank=True)
+    created_at = models.DateTimeField(verbose_name='Data')
+    quantity = models.IntegerField(verbose_name='Saldo')
+    average_cost = models.DecimalField(verbose_name='Custo Médio', max_digits=12, decimal_places=4)
+    fifo_value = models.DecimalField(verbose_name='Valor PEPS', max_digits=16, decimal_places=4)
+    cogs_average = models.DecimalField(
+        verbose_name='Custo da Saída (Médio)', max_digits=16, decimal_places=4, default=0
+    )
+    cogs_fifo = models.DecimalField(
+        verbose_name='Custo da Saída (PEPS)', max_digits=16, decimal_places=4, default=0
+    )
+
+    class Meta:
+        verbose_name = 'Valorização de Estoque'
+        verbose_name_plural = 'Valorizações de Estoque'
+        ordering = ['product', 'created_at', 'id']
+        indexes = [
+            models.Index(fields=['product', 'created_at', 'id'], name='valuation_product_created_idx'),
+        ]
+
+    @property
+    def average_value(self):
+        """Valor do estoque pelo custo médio."""
+        return self.quantity * self.average_cost
+
+    def __str__(self):
+        """Representação string do objeto."""
+        return f"{self.product_id} | {self.quantity} un. | médio {self.average_cost} | PEPS {self.fifo_value}"
@@ -0,0 +1,170 @@
+## conciliação entre Stock.quantity e o livro de movimentações
+from django.db import models, transaction
+from django.db.models import Case, F, Max, Min, Sum, Value, When
+from django.utils import timezone
+
+from apps.employees.models import Employee
+from .ledger import archived_movements, build_snapshots, ledger_movements, signed_quantity, stock_at
+from .models import Stock, StockMovement, StockMovementSummary
+from .services import STOCK_UPDATE_CHUNK_SIZE, invalidate_availability, lock_stocks, trim_location_stocks
+
+# Produtos (faixa de IDs) conferidos por consulta
+RECONCILE_CHUNK_SIZE = 5000
+
+REPAIR_LEDGER = 'ledger'
+REPAIR_STOCK = 'stock'
+
+
+def _full_ledger_totals(first_id, last_id):
+    """
+    Soma com sinal de todas as movimentações de uma faixa de produtos, incluindo
+    as arquivadas e os resumos mensais das compactadas (uma consulta agrupada
+    por tabela).
+    """
+    totals = {}
+    for movements in (ledger_movements(), archived_movements(), StockMovementSummary.objects.all()):
+        rows = (
+            movements
+            .filter(product_id__gte=first_id, product_id__lte=last_id)
+            .order_by()
+            .values('product_id')
+            .annotate(total=Sum(signed_quantity()))
+            .values_list('product_id', 'total')
+        )
+        for product_id, total in rows:
+            totals[product_id] = totals.get(product_id, 0) + total
+    return totals
+
+
+def _ledger_totals(product_ids, full):
+    """Saldo do livro dos produtos: completo, ou checkpoint + movimentações recentes."""
+    if full:
+        return _full_ledger_totals(min(product_ids), max(product_ids))
+    return stock_at(product_ids, timezone.now())
+
+
+def find_drift(full=False, chunk_size=RECONCILE_CHUNK_SIZE):
+    """
+    Compara `Stock.quantity` com o saldo do livro de movimentações, por faixas de produto.
+
+    No modo incremental (padrão) o saldo do livro vem dos checkpoints diários
+    (`StockSnapshot`, o "watermark" da última apuração) mais as movimentações
+    posteriores, então cada faixa custa uma consulta que só lê movimentações
+    recentes. Com `full=True` todas as movimentações são somadas em uma
+    consulta agrupada por faixa (use após cancelar movimentações antigas,
+    que os checkpoints já gerados não refletem).
+
+    Yields:
+        tuple: `(product_id, quantidade_em_estoque, saldo_do_livro)` dos produtos divergentes.
+    """
+    bounds = Stock.objects.aggregate(first=Min('product_id'), last=Max('product_id'))
+    if bounds['first'] is None:
+        return
+
+    for start in range(bounds['first'], bounds['last'] + 1, chunk_size):
+        stocks = dict(
+            Stock.objects.filter(product_id__gte=start, product_id__lt=start + chunk_size)
+            .values_list('product_id', 'quantity')
+        )
+        if not stocks:
+            continue
+        ledger = _ledger_totals(list(stocks), full)
+        for product_id, quantity in sorted(stocks.items()):
+            balance = ledger.get(product_id, 0)
+            if quantity != balance:
+                yield product_id, quantity, balance
+
+
+def repair_drift(product_ids, mode, user, full=False):
+    """
+    Corrige a divergência dos produtos informados.
+
+    Os estoques são bloqueados (mesma ordem usada pelas baixas) e a diferença
+    é recalculada sob o bloqueio, pois todas as gravações de estoque
+    bloqueiam o `Stock` antes de registrar movimentações.
+
+    Modos:
+        - `REPAIR_LEDGER`: o estoque físico prevalece; registra movimentações
+          `ADJUSTMENT` (um `bulk_create`) com a diferença.
+        - `REPAIR_STOCK`: o livro prevalece; `Stock.quantity` recebe o saldo do
+          livro com um `UPDATE` em lote. Saldos negativos não são aplicados.
+          O livro não diz em qual local está a diferença: uma correção para
+          cima fica sem local atribuído e os saldos por local
+          (`LocationStock`) não mudam; numa correção para baixo só o que os
+          locais somam além do novo total é retirado, na ordem de prioridade
+          das baixas (`trim_location_stocks`), para que nenhum local mostre
+          nem transfira unidades que não existem mais.
+
+    Returns:
+        int: Quantidade de produtos corrigidos.
+    """
+    if not product_ids:
+        return 0
+
+    with transaction.atomic():
+        stocks = lock_stocks(product_ids)
+        ledger = _ledger_totals(list(stocks), full) if stocks else {}
+        differences = {
+            product_id: stock.quantity - ledger.get(product_id, 0)
+            for product_id, stock in stocks.items()
+            if stock.quantity != ledger.get(product_id, 0)
+        }
+
+        if mode == REPAIR_LEDGER:
+            reference_id = f"RECONCILE-{timezone.localdate():%Y%m%d}"
+            StockMovement.objects.bulk_create(
+                [
+                    StockMovement(
+                        product_id=product_id,
+                        movement_type='ADJUSTMENT',
+                        direction=1 if difference > 0 else -1,
+                        quantity=abs(difference),
+                        reference_id=reference_id,
+                        user=user,
+                        notes="Ajuste de conciliação: livro alinhado ao estoque físico",
+                    )
+                    for product_id, difference in sorted(differences.items())
+                ],
+                batch_size=1000,
+            )
+            return len(differences)
+
+        applicable = sorted(
+            product_id for product_id in differences if ledger.get(product_id, 0) >= 0
+        )
+        now = timezone.now()
+        for start in range(0, len(applicable), STOCK_UPDATE_CHUNK_SIZE):
+            chunk = applicable[start:start + STOCK_UPDATE_CHUNK_SIZE]
+            Stock.objects.filter(product_id__in=chunk).update(
+                quantity=Case(
+                    *[When(product_id=product_id, then=Value(ledger.get(product_id, 0))) for product_id in chunk],
+                    default=F('quantity'),
+                    output_field=models.IntegerField(),
+                ),
+                last_updated=now,
+            )
+        trim_location_stocks({product_id: ledger.get(product_id, 0) for product_id in applicable})
+        transaction.on_commit(lambda: invalidate_availability(applicable))
+        return len(applicable)
+
+
+def reconcile(full=False, repair=None, user=None, chunk_size=RECONCILE_CHUNK_SIZE):
+    """
+    Executa a conciliação completa: atualiza os checkpoints (modo incremental),
+    lista as divergências e, se `repair` for informado, corrige-as em lotes.
+
+    Returns:
+        dict: `{'drift': [(product_id, estoque, livro), ...], 'repaired': int}`.
+    """
+    if not full:
+        build_snapshots()
+    if repair == REPAIR_LEDGER:
+        user = user or Employee.get_system_user()
+
+    drift = list(find_drift(full=full, chunk_size=chunk_size))
+    repaired = 0
+    if repair:
+        product_ids = [product_id for product_id, _, _ in drift]
+        for start in range(0, len(product_ids), chunk_size):
+            repaired += repair_drift(product_ids[start:start + chunk_size], repair, user, full=full)
+    return {'drift': drift, 'repaired': repaired}
@@ -0,0 +1,965 @@
+## regras de negócio de estoque que envolvem vários registros (baixas, movimentações em lote)
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connection, models, transaction
+from django.db.models import Case, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.products.models import Product
+from core.db import supports_update_returning
+from .models import Location, LocationStock, Stock, StockMovement, StockReservation
+from .signals import stock_below_minimum
+
+# Cache por processo da disponibilidade (ver `cached_availability`):
+# `('id', product_id)` e `('gtin', gtin)` -> `(expira_em, linha)`
+_availability_cache = {}
+_availability_lock = threading.Lock()
+# Acima disso o cache é descartado em vez de crescer indefinidamente
+AVAILABILITY_CACHE_MAX_ENTRIES = 20000
+
+def aggregate_quantities(items):
+    """
+    Soma as quantidades por produto.
+
+    Args:
+        items: Iterável de pares `(product_id, quantity)`.
+
+    Returns:
+        dict: `{product_id: quantidade_total}`.
+    """
+    quantities = defaultdict(int)
+    for product_id, quantity in items:
+        quantities[product_id] += quantity
+    return dict(quantities)
+
+
+def lock_stocks(product_ids):
+    """
+    Bloqueia (`SELECT ... FOR UPDATE`) os registros de estoque dos produtos
+    em uma única consulta, sempre em ordem de `product_id`.
+
+    A ordem fixa faz com que transações concorrentes disputem os bloqueios na
+    mesma sequência, evitando deadlocks entre pedidos com itens em comum.
+    Deve ser chamada dentro de `transaction.atomic()`.
+
+    Returns:
+        dict: `{product_id: Stock}` com os registros bloqueados.
+    """
+    stocks = (
+        Stock.objects.select_for_update()
+        .filter(product_id__in=product_ids)
+        .order_by('product_id')
+    )
+    return {stock.product_id: stock for stock in stocks}
+
+
+def shortage_messages(shortages):
+    """
+    Monta as mensagens de erro de estoque (uma consulta para os nomes dos produtos).
+
+    Args:
+        shortages: `{product_id: (disponível ou None se sem estoque, necessário)}`.
+    """
+    descriptions = dict(
+        Product.objects.filter(pk__in=shortages.keys()).values_list('pk', 'description')
+    )
+    messages = []
+    for product_id, (available, required) in sorted(shortages.items()):
+        description = descriptions.get(product_id, f'#{product_id}')
+        if available is None:
+            messages.append(f"Produto {description} não encontrado no estoque")
+        else:
+            messages.append(
+                f"Estoque insuficiente: {description}. "
+                f"Disponível: {available}, Necessário: {required}"
+            )
+    return messages
+
+
+def _quantity_case(deltas):
+    """Expressão CASE com a variação de quantidade de cada produto."""
+    return Case(
+        *[When(product_id=product_id, then=Value(delta)) for product_id, delta in deltas.items()],
+        default=Value(0),
+        output_field=models.IntegerField(),
+    )
+
+
+# Quantidade máxima de produtos por UPDATE com CASE nas operações em massa
+STOCK_UPDATE_CHUNK_SIZE = 500
+
+
+def default_location():
+    """Local que recebe entradas e estornos quando nenhum é informado (o de menor prioridade)."""
+    return (
+        Location.objects.filter(is_active=True)
+        .order_by('-receives_stock', 'priority', 'pk')
+        .first()
+    )
+
+
+def _apply_location_deltas(deltas, location=None):
+    """
+    Distribui as variações de estoque entre os locais (`LocationStock`).
+
+    Decrementos retiram dos locais ativos em ordem de `Location.priority`
+    (uma consulta com bloqueio); a parte que nenhum local cobre (estoque sem
+    local atribuído) fica registrada com local `None`. Incrementos vão para
+    `location` (padrão: `default_location()`); locais sem registro do produto
+    ganham um com `bulk_create`. As alterações são gravadas com `UPDATE`s em
+    lote por `CASE`.
+
+    Returns:
+        dict: Retiradas por produto, `{product_id: [[location_id, quantidade], ...]}`.
+    """
+    debits = {product_id: -delta for product_id, delta in deltas.items() if delta < 0}
+    credits = {product_id: delta for product_id, delta in deltas.items() if delta > 0}
+    row_deltas = {}
+    allocation = {}
+
+    if debits:
+        rows = (
+            LocationStock.objects.select_for_update(of=('self',))
+            .filter(product_id__in=debits, quantity__gt=0, location__is_active=True)
+            .order_by('product_id', 'location__priority', 'location_id')
+            .values_list('pk', 'product_id', 'location_id', 'quantity')
+        )
+        missing = dict(debits)
+        for pk, product_id, location_id, quantity in rows:
+            taken = min(quantity, missing[product_id])
+            if taken:
+                row_deltas[pk] = -taken
+                allocation.setdefault(product_id, []).append([location_id, taken])
+                missing[product_id] -= taken
+        for product_id, quantity in missing.items():
+            if quantity:
+                allocation.setdefault(product_id, []).append([None, quantity])
+
+    if credits:
+        location = location or default_location()
+        if location is not None:
+            existing = dict(
+                LocationStock.objects.select_for_update()
+                .filter(location=location, product_id__in=credits)
+                .values_list('product_id', 'pk')
+            )
+            for product_id, quantity in credits.items():
+                if product_id in existing:
+                    row_deltas[existing[product_id]] = quantity
+            LocationStock.objects.bulk_create([
+                LocationStock(location=location, product_id=product_id, quantity=quantity)
+                for product_id, quantity in sorted(credits.items())
+                if product_id not in existing
+            ])
+
+    pks = sorted(row_deltas)
+    for start in range(0, len(pks), STOCK_UPDATE_CHUNK_SIZE):
+        chunk = pks[start:start + STOCK_UPDATE_CHUNK_SIZE]
+        LocationStock.objects.filter(pk__in=chunk).update(
+            quantity=F('quantity') + Case(
+                *[When(pk=pk, then=Value(row_deltas[pk])) for pk in chunk],
+                default=Value(0),
+                output_field=models.IntegerField(),
+            )
+        )
+    return allocation
+
+
+def trim_location_stocks(quantities):
+    """
+    Ajusta os saldos por local a novos totais de produto sem criar unidades:
+    o que os locais ativos somam além de `quantities[product_id]` é retirado
+    na mesma ordem das baixas (`Location.priority`). Locais que somam menos
+    que o total ficam como estão (a diferença é estoque sem local atribuído).
+
+    Args:
+        quantities: `{product_id: novo Stock.quantity}`.
+
+    Returns:
+        dict: Retiradas por produto (ver `take_allocated`).
+    """
+    located = (
+        LocationStock.objects.filter(product_id__in=quantities, location__is_active=True)
+        .order_by()
+        .values('product_id')
+        .annotate(total=Sum('quantity'))
+        .values_list('product_id', 'total')
+    )
+    excess = {
+        product_id: quantities[product_id] - total
+        for product_id, total in located
+        if total > quantities[product_id]
+    }
+    return _apply_location_deltas(excess) if excess else {}
+
+
+def take_allocated(allocation, product_id, quantity):
+    """
+    Consome `quantity` unidades das retiradas por local de um produto
+    (retorno de `apply_stock_deltas`), na ordem em que foram feitas.
+
+    Usada para dividir as movimentações de saída por local, inclusive quando
+    várias linhas (ex: pedidos) compartilham a mesma retirada.
+
+    Returns:
+        list: `[(location_id, quantidade), ...]`, um item por local.
+    """
+    pieces = []
+    for share in allocation.get(product_id, []):
+        if not quantity:
+            break
+        taken = min(share[1], quantity)
+        if taken:
+            pieces.append((share[0], taken))
+            share[1] -= taken
+            quantity -= taken
+    if quantity:
+        pieces.append((None, quantity))
+    merged = {}
+    for location_id, taken in pieces:
+        merged[location_id] = merged.get(location_id, 0) + taken
+    return list(merged.items())
+
+
+def _update_stocks(deltas, now):
+    """
+    Aplica as variações aos estoques existentes com um `UPDATE` condicional
+    (`quantity + delta >= 0`) a cada `STOCK_UPDATE_CHUNK_SIZE` produtos.
+
+    Com suporte a `UPDATE ... RETURNING` (PostgreSQL, SQLite 3.35+) o mesmo
+    comando devolve as novas quantidades; caso contrário, as linhas são
+    bloqueadas com `select_for_update`, conferidas e atualizadas com `F()`.
+    Produtos sem registro ou cujo saldo ficaria negativo não são alterados.
+
+    Returns:
+        dict: `{product_id: (quantidade_após, min_quantity)}` dos estoques alterados.
+    """
+    product_ids = sorted(deltas)
+    updated = {}
+    if supports_update_returning(connection):
+        quote = connection.ops.quote_name
+        table = quote(Stock._meta.db_table)
+        product = quote(Stock._meta.get_field('product').column)
+        quantity = quote('quantity')
+        for start in range(0, len(product_ids), STOCK_UPDATE_CHUNK_SIZE):
+            chunk = product_ids[start:start + STOCK_UPDATE_CHUNK_SIZE]
+            case = f"CASE {product} " + " ".join(["WHEN %s THEN %s"] * len(chunk)) + " ELSE 0 END"
+            case_params = [value for product_id in chunk for value in (product_id, deltas[product_id])]
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"UPDATE {table} SET {quantity} = {quantity} + {case}, {quote('last_updated')} = %s "
+                    f"WHERE {product} IN ({', '.join(['%s'] * len(chunk))}) AND {quantity} + {case} >= 0 "
+                    f"RETURNING {product}, {quantity}, {quote('min_quantity')}",
+                    case_params + [connection.ops.adapt_datetimefield_value(now)] + chunk + case_params,
+                )
+                updated.update((row[0], (row[1], row[2])) for row in cursor.fetchall())
+        return updated
+
+    for stock in Stock.objects.select_for_update().filter(product_id__in=product_ids).order_by('product_id'):
+        if stock.quantity + deltas[stock.product_id] >= 0:
+            updated[stock.product_id] = (stock.quantity + deltas[stock.product_id], stock.min_quantity)
+    for start in range(0, len(product_ids), STOCK_UPDATE_CHUNK_SIZE):
+        chunk = {product_id: deltas[product_id] for product_id in product_ids[start:start + STOCK_UPDATE_CHUNK_SIZE] if product_id in updated}
+        Stock.objects.filter(product_id__in=chunk.keys()).update(
+            quantity=F('quantity') + _quantity_case(chunk),
+            last_updated=now,
+        )
+    return updated
+
+
+def apply_stock_deltas(deltas, now=None, location=None):
+    """
+    Aplica variações de quantidade (positivas ou negativas) a vários estoques
+    de uma só vez, sem ler e regravar as linhas (ver `_update_stocks`), e
+    distribui as variações entre os locais de estoque (`LocationStock`).
+
+    O `UPDATE` só altera linhas cujo saldo continua não negativo; se algum
+    produto ficar de fora (saldo insuficiente, ou decremento sem registro de
+    estoque) é levantado `ValidationError` e a transação de quem chamou é
+    desfeita. Incrementos de produtos sem registro criam o `Stock`. Após o
+    commit os produtos alterados saem do cache de disponibilidade.
+    Os estoques que cruzarem o mínimo para baixo disparam o sinal
+    `stock_below_minimum` após o commit. Quem altera vários produtos em
+    transações concorrentes deve bloqueá-los antes com `lock_stocks`.
+
+    Args:
+        deltas: `{product_id: variação}`.
+        location: Local que recebe os incrementos (padrão: `default_location()`).
+
+    Returns:
+        dict: Retiradas por local dos decrementos (ver `take_allocated`).
+    """
+    now = now or timezone.now()
+    deltas = {product_id: delta for product_id, delta in deltas.items() if delta}
+    if not deltas:
+        return {}
+    updated = _update_stocks(deltas, now)
+
+    rejected = [product_id for product_id in deltas if product_id not in updated]
+    created = {}
+    if rejected:
+        existing = dict(Stock.objects.filter(product_id__in=rejected).values_list('product_id', 'quantity'))
+        shortages = {
+            product_id: (existing.get(product_id), -deltas[product_id])
+            for product_id in rejected
+            if product_id in existing or deltas[product_id] < 0
+        }
+        if shortages:
+            raise ValidationError(shortage_messages(shortages))
+        created = {product_id: deltas[product_id] for product_id in rejected}
+
+    if any(delta > 0 for delta in deltas.values()):
+        location = location or default_location()
+    if created:
+        Stock.objects.bulk_create([
+            Stock(product_id=product_id, quantity=quantity, last_updated=now)
+            for product_id, quantity in sorted(created.items())
+        ])
+        if location is not None:
+            LocationStock.objects.bulk_create([
+                LocationStock(location=location, product_id=product_id, quantity=quantity)
+                for product_id, quantity in sorted(created.items())
+            ])
+    allocation = _apply_location_deltas(
+        {product_id: delta for product_id, delta in deltas.items() if product_id in updated}, location
+    )
+    _invalidate_availability_on_commit(deltas)
+
+    if stock_below_minimum.has_listeners():
+        crossings = [
+            {
+                'product_id': product_id,
+                'before': after - deltas[product_id],
+                'after': after,
+                'min_quantity': min_quantity,
+            }
+            for product_id, (after, min_quantity) in sorted(updated.items())
+            if after - deltas[product_id] >= min_quantity > after
+        ]
+        if crossings:
+            transaction.on_commit(lambda: stock_below_minimum.send(sender=Stock, crossings=crossings))
+    return allocation
+
+
+def _copy_movement(movement, **changes):
+    """Nova movimentação (não gravada) com os mesmos campos de `movement`."""
+    fields = {
+        field.attname: getattr(movement, field.attname)
+        for field in StockMovement._meta.concrete_fields
+        if not field.primary_key
+    }
+    fields.update(changes)
+    return StockMovement(**fields)
+
+
+def apply_movements(movements, location=None, now=None):
+    """
+    Caminho único de gravação do estoque: aplica e registra movimentações em lote.
+
+    As variações com sinal das movimentações (não gravadas) são somadas por
+    produto e aplicadas por `apply_stock_deltas` (`UPDATE` condicional com
+    `RETURNING`, sem leitura-modificação-gravação); em seguida todas as
+    movimentações são gravadas com um `bulk_create`. O número de comandos
+    é fixo por chamada, qualquer que seja a quantidade de produtos.
+
+    Saídas sem local definido são divididas pelos locais de onde as unidades
+    foram retiradas (uma movimentação por local); entradas recebem `location`.
+    O local de cada movimentação é sempre definido aqui: movimentações que já
+    trazem `location_id` são recusadas, pois o saldo seria alterado em outro
+    local (transferências entre locais usam `transfer_stock`).
+    Deve ser chamada dentro de `transaction.atomic()`: uma falta de saldo
+    levanta `ValidationError` depois de parte dos estoques ter sido alterada.
+
+    Args:
+        movements: Iterável de `StockMovement` ainda não gravados.
+        location: Local que recebe as entradas (padrão: `default_location()`).
+
+    Returns:
+        list[StockMovement]: Movimentações gravadas.
+
+    Raises:
+        ValueError: Se alguma movimentação já tiver `location_id`.
+    """
+    movements = [movement for movement in movements if movement.quantity]
+    if not movements:
+        return []
+    if any(movement.location_id is not None for movement in movements):
+        raise ValueError("O local das movimentações é definido por apply_movements (use o argumento location).")
+    deltas = {}
+    credited = {}
+    debited = {}
+    for movement in movements:
+        movement.direction = movement.resolve_direction()
+        deltas[movement.product_id] = deltas.get(movement.product_id, 0) + movement.quantity * movement.direction
+        totals = credited if movement.direction > 0 else debited
+        totals[movement.product_id] = totals.get(movement.product_id, 0) + movement.quantity
+
+    if credited:
+        location = location or default_location()
+    allocation = apply_stock_deltas(deltas, now=now, location=location)
+    # Saídas compensadas por entradas do mesmo produto na mesma chamada saem do
+    # local que recebeu as entradas
+    for product_id, quantity in credited.items():
+        if product_id in debited:
+            allocation.setdefault(product_id, []).insert(
+                0, [location.pk if location else None, min(quantity, debited[product_id])]
+            )
+
+    recorded = []
+    for movement in movements:
+        if movement.direction > 0:
+            movement.location = location
+            recorded.append(movement)
+        else:
+            for location_id, quantity in take_allocated(allocation, movement.product_id, movement.quantity):
+                recorded.append(_copy_movement(movement, location_id=location_id, quantity=quantity))
+    return StockMovement.objects.bulk_create(recorded, batch_size=1000)
+
+
+def reservation_expiry():
+    """Data/hora de expiração para uma reserva de rascunho criada agora."""
+    ttl_minutes = getattr(settings, 'STOCK_RESERVATION_TTL_MINUTES', 120)
+    return timezone.now() + timedelta(minutes=ttl_minutes)
+
+
+def active_reservations(now=None):
+    """QuerySet das reservas ativas e ainda dentro da validade."""
+    now = now or timezone.now()
+    return StockReservation.objects.filter(status='active').filter(
+        Q(expires_at__isnull=True) | Q(expires_at__gt=now)
+    )
+
+
+def reserved_quantities(product_ids, exclude_order_id=None, exclude_order_ids=()):
+    """
+    Soma das reservas ativas por produto, em uma consulta agrupada.
+
+    Args:
+        product_ids: Produtos consultados.
+        exclude_order_id: Ignora as reservas deste pedido (usado quando o
+            próprio pedido está alterando ou consumindo suas reservas).
+        exclude_order_ids: Idem, para vários pedidos (confirmação em lote).
+
+    Returns:
+        dict: `{product_id: quantidade_reservada}` (só produtos com reservas).
+    """
+    excluded = set(exclude_order_ids)
+    if exclude_order_id is not None:
+        excluded.add(exclude_order_id)
+    reservations = active_reservations().filter(product_id__in=product_ids)
+    if excluded:
+        reservations = reservations.exclude(order_id__in=excluded)
+    return dict(
+        reservations.order_by()
+        .values('product_id')
+        .annotate(total=Sum('quantity'))
+        .values_list('product_id', 'total')
+    )
+
+
+def _reserved_total(product_ref, now):
+    """Subconsulta da soma das reservas ativas do produto em `product_ref`."""
+    return (
+        StockReservation.objects.filter(product_id=OuterRef(product_ref), status='active')
+        .filter(Q(expires_at__isnull=True) | Q(expires_at__gt=now))
+        .order_by()
+        .values('product_id')
+        .annotate(total=Sum('quantity'))
+        .values('total')
+    )
+
+
+def get_availability(product_ids):
+    """
+    Estoque físico, reservado e disponível de vários produtos em uma única consulta.
+
+    A soma das reservas ativas entra como subconsulta correlacionada, atendida
+    pelo índice parcial `reservation_active_idx`.
+
+    Returns:
+        dict: `{product_id: {'on_hand': int, 'reserved': int, 'available': int}}`.
+    """
+    rows = (
+        Stock.objects.filter(product_id__in=product_ids)
+        .annotate(reserved=Coalesce(Subquery(_reserved_total('product_id', timezone.now())), 0))
+        .values_list('product_id', 'quantity', 'reserved')
+    )
+    return {
+        product_id: {
+            'on_hand': on_hand,
+            'reserved': reserved_quantity,
+            'available': max(on_hand - reserved_quantity, 0),
+        }
+        for product_id, on_hand, reserved_quantity in rows
+    }
+
+
+def lookup_availability(product_ids=(), gtins=()):
+    """
+    Disponibilidade de produtos informados por ID e/ou GTIN, em uma consulta.
+
+    Parte de `Product` (produtos sem registro de estoque vêm zerados), com o
+    estoque por junção e as reservas como subconsulta.
+
+    Returns:
+        list[dict]: `product_id`, `gtin`, `on_hand`, `reserved` e `available`
+        dos produtos encontrados.
+    """
+    if not product_ids and not gtins:
+        return []
+    rows = (
+        Product.objects.filter(Q(pk__in=product_ids) | Q(gtin__in=gtins))
+        .annotate(
+            on_hand=Coalesce('stock__quantity', 0),
+            reserved=Coalesce(Subquery(_reserved_total('pk', timezone.now())), 0),
+        )
+        .values_list('pk', 'gtin', 'on_hand', 'reserved')
+    )
+    return [
+        {
+            'product_id': product_id,
+            'gtin': gtin,
+            'on_hand': on_hand,
+            'reserved': reserved_quantity,
+            'available': max(on_hand - reserved_quantity, 0),
+        }
+        for product_id, gtin, on_hand, reserved_quantity in rows
+    ]
+
+
+def cached_availability(product_ids=(), gtins=()):
+    """
+    `lookup_availability` com cache por processo de validade curta
+    (`settings.STOCK_AVAILABILITY_CACHE_SECONDS`).
+
+    Só os produtos ausentes ou vencidos no cache são consultados (uma consulta
+    por chamada, no máximo). As gravações de estoque e de reservas invalidam
+    os produtos alterados após o commit (`invalidate_availability`); em outros
+    processos o valor antigo vale no máximo até o fim da validade.
+
+    Returns:
+        tuple: `(linhas encontradas, IDs não encontrados, GTINs não encontrados)`.
+    """
+    ttl = getattr(settings, 'STOCK_AVAILABILITY_CACHE_SECONDS', 2)
+    keys = [('id', product_id) for product_id in product_ids] + [('gtin', gtin) for gtin in gtins]
+    found = {}
+    now = time.monotonic()
+    with _availability_lock:
+        for key in keys:
+            entry = _availability_cache.get(key)
+            if entry is not None and entry[0] > now:
+                found[key] = entry[1]
+
+    missing = [key for key in keys if key not in found]
+    if missing:
+        rows = lookup_availability(
+            [value for kind, value in missing if kind == 'id'],
+            [value for kind, value in missing if kind == 'gtin'],
+        )
+        expires_at = time.monotonic() + ttl
+        with _availability_lock:
+            if len(_availability_cache) > AVAILABILITY_CACHE_MAX_ENTRIES:
+                _availability_cache.clear()
+            for row in rows:
+                for key in (('id', row['product_id']), ('gtin', row['gtin'])):
+                    if ttl > 0 and key[1] is not None:
+                        _availability_cache[key] = (expires_at, row)
+                    found[key] = row
+
+    results = {}
+    for key in keys:
+        if key in found:
+            results[found[key]['product_id']] = found[key]
+    return (
+        list(results.values()),
+        [value for kind, value in keys if kind == 'id' and (kind, value) not in found],
+        [value for kind, value in keys if kind == 'gtin' and (kind, value) not in found],
+    )
+
+
+def invalidate_availability(product_ids=None):
+    """
+    Descarta do cache de disponibilidade os produtos informados (todos, se None).
+    """
+    with _availability_lock:
+        if product_ids is None:
+            _availability_cache.clear()
+            return
+        for product_id in product_ids:
+            entry = _availability_cache.pop(('id', product_id), None)
+            if entry is not None and entry[1]['gtin'] is not None:
+                _availability_cache.pop(('gtin', entry[1]['gtin']), None)
+
+
+def _invalidate_availability_on_commit(product_ids=None):
+    product_ids = None if product_ids is None else list(product_ids)
+    transaction.on_commit(lambda: invalidate_availability(product_ids))
+
+
+def _reservation_shortages(order_id, quantities, existing, stocks, now):
+    """
+    Aumentos de reserva que excedem o disponível (estoque físico menos as
+    reservas de outros pedidos), no formato de `shortage_messages`.
+    """
+    reserved_by_others = reserved_quantities(quantities.keys(), exclude_order_id=order_id)
+    shortages = {}
+    for product_id, quantity in quantities.items():
+        current = existing.get(product_id)
+        held = current.quantity if current and (current.expires_at is None or current.expires_at > now) else 0
+        if quantity <= held:
+            continue
+        if product_id not in stocks:
+            shortages[product_id] = (None, quantity)
+            continue
+        available = stocks[product_id].quantity - reserved_by_others.get(product_id, 0)
+        if quantity > available:
+            shortages[product_id] = (max(available, 0), quantity)
+    return shortages
+
+
+def check_reservations(order_id, quantities):
+    """
+    Confere, sem bloquear nem gravar, se `sync_reservations` aceitaria as
+    quantidades (ex: validação de formulários antes de salvar os itens).
+
+    Returns:
+        list[str]: Mensagens de falta de estoque (vazia se tudo cabe).
+    """
+    quantities = {product_id: quantity for product_id, quantity in quantities.items() if quantity}
+    existing = {}
+    if order_id is not None:
+        existing = {
+            reservation.product_id: reservation
+            for reservation in StockReservation.objects.filter(order_id=order_id, status='active')
+        }
+    stocks = Stock.objects.in_bulk(quantities.keys(), field_name='product_id')
+    shortages = _reservation_shortages(order_id, quantities, existing, stocks, timezone.now())
+    return shortage_messages(shortages) if shortages else []
+
+
+def sync_reservations(order_id, quantities, expires_at=None):
+    """
+    Ajusta as reservas ativas de um pedido para as quantidades informadas.
+
+    Os estoques envolvidos são bloqueados (em ordem de produto) para que dois
+    pedidos não reservem a mesma última unidade. Apenas aumentos de reserva
+    são validados contra o disponível (estoque físico menos reservas de outros
+    pedidos); reduções e remoções sempre são aceitas.
+
+    Args:
+        order_id: Pedido dono das reservas.
+        quantities: `{product_id: quantidade}` que o pedido deve manter reservada.
+        expires_at: Nova validade de todas as reservas do pedido (None = sem expiração).
+
+    Raises:
+        ValidationError: Se algum aumento de reserva exceder o disponível.
+    """
+    quantities = {product_id: quantity for product_id, quantity in quantities.items() if quantity}
+    now = timezone.now()
+
+    with transaction.atomic():
+        existing = {
+            reservation.product_id: reservation
+            for reservation in StockReservation.objects.filter(order_id=order_id, status='active')
+        }
+        stocks = lock_stocks(set(quantities) | set(existing))
+        shortages = _reservation_shortages(order_id, quantities, existing, stocks, now)
+        if shortages:
+            raise ValidationError(shortage_messages(shortages))
+
+        to_release = [r.pk for product_id, r in existing.items() if product_id not in quantities]
+        if to_release:
+            StockReservation.objects.filter(pk__in=to_release).update(status='released', updated_at=now)
+
+        to_update = []
+        for product_id, reservation in existing.items():
+            if product_id in quantities:
+                reservation.quantity = quantities[product_id]
+                reservation.expires_at = expires_at
+                reservation.updated_at = now
+                to_update.append(reservation)
+        if to_update:
+            StockReservation.objects.bulk_update(to_update, ['quantity', 'expires_at', 'updated_at'])
+
+        StockReservation.objects.bulk_create([
+            StockReservation(order_id=order_id, product_id=product_id, quantity=quantity, expires_at=expires_at)
+            for product_id, quantity in quantities.items()
+            if product_id not in existing
+        ])
+        _invalidate_availability_on_commit(set(quantities) | set(existing))
+
+
+def release_reservations(order_id):
+    """Libera todas as reservas ativas de um pedido (ex: rascunho cancelado)."""
+    return release_orders_reservations([order_id])
+
+
+def release_orders_reservations(order_ids):
+    """
+    Libera, em um único `UPDATE`, as reservas ativas de vários pedidos.
+
+    Os produtos liberados não são lidos, então todo o cache de
+    disponibilidade do processo é descartado após o commit.
+    """
+    released = StockReservation.objects.filter(order_id__in=order_ids, status='active').update(
+        status='released', updated_at=timezone.now()
+    )
+    if released:
+        _invalidate_availability_on_commit()
+    return released
+
+
+def convert_reservations(order_ids):
+    """Marca como convertidas em saída as reservas ativas dos pedidos baixados."""
+    return StockReservation.objects.filter(order_id__in=order_ids, status='active').update(
+        status='converted', updated_at=timezone.now()
+    )
+
+
+def release_expired_reservations(now=None):
+    """
+    Marca como expiradas, em um único `UPDATE`, todas as reservas ativas vencidas.
+
+    Returns:
+        int: Quantidade de reservas expiradas.
+    """
+    now = now or timezone.now()
+    return StockReservation.objects.filter(status='active', expires_at__lte=now).update(
+        status='expired', updated_at=now
+    )
+
+
+def deduct_stock(quantities, user, reference_id, notes='', order_id=None):
+    """
+    Dá baixa no estoque de vários produtos de uma só vez.
+
+    1. Bloqueia todos os `Stock` envolvidos em uma consulta ordenada por produto.
+    2. Valida todas as quantidades antes de alterar qualquer registro contra o
+       disponível (estoque físico menos as reservas de outros pedidos); os
+       problemas de todos os produtos são reportados juntos.
+    3. Converte as reservas ativas do pedido (`order_id`) em saída.
+    4. Aplica os decrementos e registra as saídas (uma por produto e local)
+       com `apply_movements`, retirando dos locais na ordem de prioridade.
+
+    Args:
+        quantities: `{product_id: quantidade}` a ser baixada.
+        user: Usuário responsável pelas movimentações.
+        reference_id: Identificador externo (ex: "ORDER-15").
+        notes: Observações gravadas em cada movimentação.
+        order_id: Pedido cuja baixa consome as próprias reservas.
+
+    Returns:
+        list[StockMovement]: Movimentações criadas.
+
+    Raises:
+        ValidationError: Se algum produto não tiver registro de estoque ou
+            quantidade suficiente. Nenhuma alteração é feita nesse caso.
+    """
+    quantities = {product_id: quantity for product_id, quantity in quantities.items() if quantity}
+    if not quantities:
+        return []
+
+    with transaction.atomic():
+        stocks = lock_stocks(quantities.keys())
+        reserved_by_others = reserved_quantities(quantities.keys(), exclude_order_id=order_id)
+
+        shortages = {}
+        for product_id, quantity in quantities.items():
+            if product_id not in stocks:
+                shortages[product_id] = (None, quantity)
+                continue
+            available = stocks[product_id].quantity - reserved_by_others.get(product_id, 0)
+            if available < quantity:
+                shortages[product_id] = (max(available, 0), quantity)
+        if shortages:
+            raise ValidationError(shortage_messages(shortages))
+
+        if order_id is not None:
+            convert_reservations([order_id])
+
+        return apply_movements(
+            StockMovement(
+                product_id=product_id,
+                movement_type='OUT',
+                quantity=quantity,
+                reference_id=reference_id,
+                user=user,
+                notes=notes,
+            )
+            for product_id, quantity in sorted(quantities.items())
+        )
+
+
+def restock(lines, user, movement_type, notes='', location=None):
+    """
+    Devolve quantidades ao estoque (cancelamentos e devoluções de pedidos) em lote.
+
+    Os estoques são bloqueados na mesma ordem usada pelas baixas (por produto)
+    e as movimentações compensatórias (uma por linha) são aplicadas e gravadas
+    por `apply_movements`; produtos sem registro de estoque ganham um.
+
+    Args:
+        lines: Iterável de `(product_id, quantidade, reference_id)`; um mesmo
+            produto pode aparecer em várias linhas (ex: pedidos diferentes).
+        user: Usuário responsável pelas movimentações.
+        movement_type: 'CANCELLATION' ou 'RETURN'.
+        notes: Observações gravadas em cada movimentação.
+        location: Local que recebe as unidades (padrão: `default_location()`).
+
+    Returns:
+        list[StockMovement]: Movimentações criadas.
+    """
+    lines = [line for line in lines if line[1]]
+    if not lines:
+        return []
+
+    with transaction.atomic():
+        lock_stocks({product_id for product_id, _, _ in lines})
+        return apply_movements(
+            [
+                StockMovement(
+                    product_id=product_id,
+                    movement_type=movement_type,
+                    quantity=quantity,
+                    reference_id=reference_id,
+                    user=user,
+                    notes=notes,
+                )
+                for product_id, quantity, reference_id in lines
+            ],
+            location=location,
+        )
+
+
+def receive_stock(lines, user, notes='', location=None):
+    """
+    Registra entradas de mercadoria (`IN`) com o custo de aquisição, em lote.
+
+    Mesmo fluxo de `restock` (bloqueio por produto e `apply_movements`); o
+    `unit_cost` de cada linha alimenta a valorização do estoque (custo médio
+    e camadas PEPS, ver `apps.stock.valuation`).
+
+    Args:
+        lines: Iterável de `(product_id, quantidade, custo_unitário, reference_id)`.
+        user: Usuário responsável pelas movimentações.
+        notes: Observações gravadas em cada movimentação.
+        location: Local que recebe a mercadoria (padrão: `default_location()`).
+
+    Returns:
+        list[StockMovement]: Movimentações criadas.
+    """
+    lines = [line for line in lines if line[1]]
+    if not lines:
+        return []
+
+    with transaction.atomic():
+        lock_stocks({product_id for product_id, _, _, _ in lines})
+        return apply_movements(
+            [
+                StockMovement(
+                    product_id=product_id,
+                    movement_type='IN',
+                    quantity=quantity,
+                    unit_cost=unit_cost,
+                    reference_id=reference_id,
+                    user=user,
+                    notes=notes,
+                )
+                for product_id, quantity, unit_cost, reference_id in lines
+            ],
+            location=location,
+        )
+
+
+def transfer_stock(quantities, source, destination, user, reference_id='', notes=''):
+    """
+    Transfere unidades entre dois locais de estoque, atomicamente e em lote.
+
+    Os estoques dos produtos são bloqueados na mesma ordem das baixas e os
+    saldos da origem, validados antes de qualquer alteração. A origem é
+    debitada e o destino creditado com `UPDATE`s em lote; cada produto gera
+    duas movimentações `TRANSFER` (saída na origem, entrada no destino), que
+    se anulam no saldo total do produto (`Stock.quantity` não muda).
+
+    Args:
+        quantities: `{product_id: quantidade}` a transferir.
+        source: Local de origem.
+        destination: Local de destino.
+
+    Returns:
+        list[StockMovement]: Movimentações criadas.
+
+    Raises:
+        ValidationError: Se a origem não tiver saldo suficiente de algum produto.
+    """
+    quantities = {product_id: quantity for product_id, quantity in quantities.items() if quantity}
+    if not quantities:
+        return []
+    if source.pk == destination.pk:
+        raise ValidationError("A origem e o destino da transferência devem ser diferentes.")
+
+    with transaction.atomic():
+        lock_stocks(quantities.keys())
+        rows = dict(
+            LocationStock.objects.select_for_update()
+            .filter(location=source, product_id__in=quantities)
+            .values_list('product_id', 'quantity')
+        )
+        shortages = {
+            product_id: (rows.get(product_id, 0), quantity)
+            for product_id, quantity in quantities.items()
+            if rows.get(product_id, 0) < quantity
+        }
+        if shortages:
+            raise ValidationError(
+                [f"[{source.code}] {message}" for message in shortage_messages(shortages)]
+            )
+
+        LocationStock.objects.filter(location=source, product_id__in=quantities).update(
+            quantity=F('quantity') - _quantity_case(quantities)
+        )
+        _apply_location_deltas(quantities, destination)
+
+        return StockMovement.objects.bulk_create([
+            StockMovement(
+                product_id=product_id,
+                location=location,
+                movement_type='TRANSFER',
+                direction=direction,
+                quantity=quantity,
+                reference_id=reference_id,
+                user=user,
+                notes=notes or f"Transferência {source.code} → {destination.code}",
+            )
+            for product_id, quantity in sorted(quantities.items())
+            for location, direction in ((source, -1), (destination, 1))
+        ])
+
+
+def stock_by_location(product_ids):
+    """
+    Estoque de cada produto somado e detalhado por local ativo, em uma consulta
+    agrupada por produto e local.
+
+    Returns:
+        dict: `{product_id: {'total': n, 'locations': {código: quantidade}}}`.
+    """
+    rows = (
+        LocationStock.objects.filter(product_id__in=product_ids, location__is_active=True)
+        .order_by()
+        .values('product_id', 'location__code', 'location__priority')
+        .annotate(total=Sum('quantity'))
+        .order_by('product_id', 'location__priority', 'location__code')
+        .values_list('product_id', 'location__code', 'total')
+    )
+    result = {product_id: {'total': 0, 'locations': {}} for product_id in product_ids}
+    for product_id, code, quantity in rows:
+        result[product_id]['total'] += quantity
+        result[product_id]['locations'][code] = quantity
+    return result
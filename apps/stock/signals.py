@@ -0,0 +1,11 @@
+from django.dispatch import Signal
+
+# Disparado (após o commit) quando movimentações levam estoques para baixo do mínimo.
+# Argumentos: `crossings`, lista de dicts com `product_id`, `before`, `after` e `min_quantity`.
+#
+# Exemplo de receptor (ex: enviar e-mail ao comprador):
+#
+#     @receiver(stock_below_minimum)
+#     def notify_purchasing(sender, crossings, **kwargs):
+#         ...
+stock_below_minimum = Signal()
@@ -1,3 +1,683 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import tempfile
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+
+from apps.products.models import Category, Product
+from apps.orders.models import Order
+from apps.stock.archive import archive_movements, compact_movements
+from apps.stock.valuation import inventory_valuation, rebuild_valuation
+from apps.stock.history import METHOD_LTTB, stock_level_series
+from apps.stock.forecasting import METHOD_EXPONENTIAL, update_reorder_points
+from apps.stock.counting import close_count, open_count, record_scans
+from apps.stock.ledger import build_snapshots, day_start, stock_at
+from apps.stock.signals import stock_below_minimum
+from apps.stock.views import InventoryCountScanView, LowStockJsonView, StockAvailabilityView, StockLevelHistoryView
+from apps.stock.reconciliation import REPAIR_LEDGER, REPAIR_STOCK, find_drift, reconcile
+from apps.stock.models import (
+    CostLayer,
+    InventoryCountLine,
+    Location,
+    LocationStock,
+    Stock,
+    StockMovement,
+    StockMovementArchive,
+    StockMovementSummary,
+    StockReservation,
+    StockSnapshot,
+)
+from apps.stock.services import (
+    aggregate_quantities,
+    apply_movements,
+    deduct_stock,
+    invalidate_availability,
+    get_availability,
+    receive_stock,
+    release_expired_reservations,
+    restock,
+    stock_by_location,
+    sync_reservations,
+    transfer_stock,
+)
+
+
+class StockTestMixin:
+    """Cria usuário, categoria e produtos com estoque para os testes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="estoquista", password="senha-teste")
+        cls.category = Category.objects.create(abbreviation="MOV", name="Móveis")
+        cls.sofa = cls.create_product("Sofá", stock=5)
+        cls.chair = cls.create_product("Cadeira", stock=10)
+
+    @classmethod
+    def create_product(cls, description, stock=None):
+        product = Product.objects.create(
+            category=cls.category,
+            description=description,
+            cost_price=Decimal("100.00"),
+            sale_price=Decimal("150.00"),
+        )
+        if stock is not None:
+            Stock.objects.create(product=product, quantity=stock)
+            # Todo o estoque inicial fica no local padrão criado pela migração
+            LocationStock.objects.create(location=Location.objects.get(code="PRINCIPAL"), product=product, quantity=stock)
+        return product
+
+
+class DeductStockTests(StockTestMixin, TestCase):
+    """Testa a baixa de estoque em lote."""
+
+    def test_aggregate_quantities_sums_per_product(self):
+        self.assertEqual(aggregate_quantities([(1, 2), (2, 1), (1, 3)]), {1: 5, 2: 1})
+
+    def test_deducts_all_products_and_records_movements(self):
+        movements = deduct_stock(
+            {self.sofa.pk: 2, self.chair.pk: 4}, user=self.user, reference_id="ORDER-1"
+        )
+        self.assertEqual(len(movements), 2)
+        self.assertEqual(Stock.objects.get(product=self.sofa).quantity, 3)
+        self.assertEqual(Stock.objects.get(product=self.chair).quantity, 6)
+        self.assertEqual(
+            StockMovement.objects.filter(reference_id="ORDER-1", movement_type="OUT").count(), 2
+        )
+
+    def test_uses_a_fixed_number_of_queries(self):
+        # lock + reservas + update + locais (2) + bulk_create (+ savepoint) + valorização (3),
+        # independentemente do número de itens
+        with self.assertNumQueries(11):
+            deduct_stock({self.sofa.pk: 1, self.chair.pk: 1}, user=self.user, reference_id="ORDER-2")
+
+    def test_insufficient_stock_changes_nothing(self):
+        lamp = self.create_product("Luminária")
+        with self.assertRaises(ValidationError) as context:
+            deduct_stock(
+                {self.sofa.pk: 6, self.chair.pk: 1, lamp.pk: 1}, user=self.user, reference_id="ORDER-3"
+            )
+        # Todos os problemas são reportados de uma vez
+        self.assertEqual(len(context.exception.messages), 2)
+        self.assertEqual(Stock.objects.get(product=self.chair).quantity, 10)
+        self.assertFalse(StockMovement.objects.exists())
+
+
+class ApplyMovementsTests(StockTestMixin, TestCase):
+    """Testa o caminho único de gravação do estoque."""
+
+    def movement(self, product, movement_type, quantity, direction=None):
+        return StockMovement(
+            product=product,
+            movement_type=movement_type,
+            quantity=quantity,
+            direction=direction,
+            reference_id="TESTE",
+            user=self.user,
+        )
+
+    def test_nets_movements_per_product_and_records_each_one(self):
+        movements = apply_movements([
+            self.movement(self.sofa, "OUT", 4),
+            self.movement(self.sofa, "RETURN", 1),
+            self.movement(self.chair, "ADJUSTMENT", 2, direction=-1),
+        ])
+
+        self.assertEqual(len(movements), 3)
+        self.assertEqual(Stock.objects.get(product=self.sofa).quantity, 2)
+        self.assertEqual(Stock.objects.get(product=self.chair).quantity, 8)
+        self.assertEqual(LocationStock.objects.get(product=self.sofa).quantity, 2)
+
+    def test_debit_beyond_balance_is_rejected_by_the_update(self):
+        # O saldo é conferido no próprio UPDATE, sem leitura prévia do estoque
+        with self.assertRaises(ValidationError):
+            apply_movements([
+                self.movement(self.chair, "OUT", 1),
+                self.movement(self.sofa, "OUT", 6),
+            ])
+        self.assertEqual(Stock.objects.get(product=self.sofa).quantity, 5)
+        self.assertFalse(StockMovement.objects.exists())
+
+    def test_fallback_without_update_returning(self):
+        with patch("apps.stock.services.supports_update_returning", return_value=False):
+            apply_movements([self.movement(self.sofa, "OUT", 2)])
+            with self.assertRaises(ValidationError):
+                apply_movements([self.movement(self.sofa, "OUT", 4)])
+        self.assertEqual(Stock.objects.get(product=self.sofa).quantity, 3)
+
+    def test_movement_with_its_own_location_is_rejected(self):
+        movement = self.movement(self.sofa, "OUT", 1)
+        movement.location = Location.objects.get(code="PRINCIPAL")
+        with self.assertRaises(ValueError):
+            apply_movements([movement])
+        self.assertEqual(Stock.objects.get(product=self.sofa).quantity, 5)
+        self.assertFalse(StockMovement.objects.exists())
+
+
+class RestockTests(StockTestMixin, TestCase):
+    """Testa a devolução de quantidades ao estoque em lote."""
+
+    def test_restocks_with_one_movement_per_line(self):
+        table = self.create_product("Mesa")  # sem registro de estoque
+        movements = restock(
+            [(self.sofa.pk, 1, "ORDER-1"), (self.sofa.pk, 2, "ORDER-2"), (table.pk, 3, "ORDER-2")],
+            user=self.user,
+            movement_type="CANCELLATION",
+        )
+
+        self.assertEqual(len(movements), 3)
+        self.assertEqual(Stock.objects.get(product=self.sofa).quantity, 8)
+        self.assertEqual(Stock.objects.get(product=table).quantity, 3)
+        self.assertEqual(
+            StockMovement.objects.filter(movement_type="CANCELLATION", reference_id="ORDER-2").count(), 2
+        )
+
+
+class StockReservationTests(StockTestMixin, TestCase):
+    """Testa reservas de estoque e o cálculo de disponibilidade."""
+
+    def setUp(self):
+        self.order = Order.objects.create()
+        self.other_order = Order.objects.create()
+
+    def test_availability_discounts_active_reservations(self):
+        sync_reservations(self.order.pk, {self.sofa.pk: 2})
+        with self.assertNumQueries(1):
+            availability = get_availability([self.sofa.pk, self.chair.pk])
+        self.assertEqual(availability[self.sofa.pk], {"on_hand": 5, "reserved": 2, "available": 3})
+        self.assertEqual(availability[self.chair.pk]["available"], 10)
+
+    def test_cannot_reserve_units_held_by_another_order(self):
+        sync_reservations(self.order.pk, {self.sofa.pk: 4})
+        with self.assertRaises(ValidationError):
+            sync_reservations(self.other_order.pk, {self.sofa.pk: 2})
+        # Reduzir a própria reserva é sempre permitido
+        sync_reservations(self.order.pk, {self.sofa.pk: 1})
+        self.assertEqual(get_availability([self.sofa.pk])[self.sofa.pk]["reserved"], 1)
+
+    def test_removed_products_release_their_reservation(self):
+        sync_reservations(self.order.pk, {self.sofa.pk: 1, self.chair.pk: 1})
+        sync_reservations(self.order.pk, {self.chair.pk: 3})
+        statuses = dict(StockReservation.objects.filter(order=self.order).values_list("product_id", "status"))
+        self.assertEqual(statuses, {self.sofa.pk: "released", self.chair.pk: "active"})
+
+    def test_expired_reservations_do_not_count_and_are_swept(self):
+        past = timezone.now() - timezone.timedelta(minutes=1)
+        sync_reservations(self.order.pk, {self.sofa.pk: 5}, expires_at=past)
+        self.assertEqual(get_availability([self.sofa.pk])[self.sofa.pk]["available"], 5)
+        sync_reservations(self.other_order.pk, {self.sofa.pk: 5})
+
+        self.assertEqual(release_expired_reservations(), 1)
+        call_command("release_expired_reservations", stdout=StringIO())
+        self.assertEqual(StockReservation.objects.get(order=self.order).status, "expired")
+
+    def test_deduction_converts_own_reservations(self):
+        sync_reservations(self.order.pk, {self.sofa.pk: 3})
+        sync_reservations(self.other_order.pk, {self.sofa.pk: 2})
+        deduct_stock({self.sofa.pk: 3}, user=self.user, reference_id="ORDER-X", order_id=self.order.pk)
+        self.assertEqual(StockReservation.objects.get(order=self.order).status, "converted")
+        self.assertEqual(get_availability([self.sofa.pk])[self.sofa.pk], {"on_hand": 2, "reserved": 2, "available": 0})
+        with self.assertRaises(ValidationError):
+            deduct_stock({self.sofa.pk: 1}, user=self.user, reference_id="AJUSTE")
+
+
+class StockLedgerTests(StockTestMixin, TestCase):
+    """Testa os checkpoints diários e o saldo em uma data."""
+
+    def record(self, product, movement_type, quantity, when, direction=1):
+        movement = StockMovement.objects.create(
+            product=product, movement_type=movement_type, quantity=quantity, user=self.user, direction=direction
+        )
+        StockMovement.objects.filter(pk=movement.pk).update(created_at=when)
+        return movement
+
+    def setUp(self):
+        self.day1 = timezone.make_aware(datetime(2026, 3, 1, 10))
+        self.record(self.sofa, "IN", 10, self.day1)
+        self.record(self.sofa, "OUT", 3, self.day1 + timedelta(hours=2))
+        self.record(self.chair, "IN", 4, self.day1)
+        self.record(self.sofa, "ADJUSTMENT", 1, self.day1 + timedelta(days=1), direction=-1)
+        self.record(self.sofa, "RETURN", 2, self.day1 + timedelta(days=3))
+
+    def test_direction_follows_movement_type(self):
+        self.assertEqual(
+            list(StockMovement.objects.order_by("pk").values_list("movement_type", "direction")),
+            [("IN", 1), ("OUT", -1), ("IN", 1), ("ADJUSTMENT", -1), ("RETURN", 1)],
+        )
+
+    def test_snapshots_are_incremental(self):
+        self.assertEqual(build_snapshots(until_date=date(2026, 3, 2)), 3)
+        self.assertEqual(
+            StockSnapshot.objects.get(product=self.sofa, date=date(2026, 3, 2)).quantity, 6
+        )
+        self.assertEqual(build_snapshots(until_date=date(2026, 3, 2)), 0)
+        self.assertEqual(build_snapshots(until_date=date(2026, 3, 10)), 1)
+        self.assertEqual(
+            StockSnapshot.objects.get(product=self.sofa, date=date(2026, 3, 4)).quantity, 8
+        )
+
+    def test_stock_at_matches_full_replay_in_one_query(self):
+        build_snapshots(until_date=date(2026, 3, 2))
+        products = [self.sofa.pk, self.chair.pk]
+        for moment, expected in [
+            (self.day1 - timedelta(hours=1), {self.sofa.pk: 0, self.chair.pk: 0}),
+            (self.day1 + timedelta(hours=1), {self.sofa.pk: 10, self.chair.pk: 4}),
+            (self.day1 + timedelta(days=2), {self.sofa.pk: 6, self.chair.pk: 4}),
+            (self.day1 + timedelta(days=5), {self.sofa.pk: 8, self.chair.pk: 4}),
+        ]:
+            with self.assertNumQueries(1):
+                self.assertEqual(stock_at(products, moment), expected)
+
+    def test_archived_movements_still_count_in_the_ledger(self):
+        self.record(self.chair, "OUT", 1, timezone.now())
+        products = [self.sofa.pk, self.chair.pk]
+        before = [stock_at(products, self.day1 + timedelta(hours=3)), stock_at(products, timezone.now())]
+
+        self.assertEqual(archive_movements(months=0, chunk_size=2), 5)
+        self.assertEqual(StockMovement.objects.count(), 1)
+        self.assertEqual(StockMovementArchive.objects.filter(product=self.sofa).count(), 4)
+        self.assertEqual(
+            [stock_at(products, self.day1 + timedelta(hours=3)), stock_at(products, timezone.now())], before
+        )
+        self.assertEqual(
+            [(product_id, balance) for product_id, _, balance in find_drift(full=True)],
+            [(self.sofa.pk, 8), (self.chair.pk, 3)],
+        )
+
+
+    @override_settings(STOCK_MOVEMENT_RETENTION_MONTHS=0)
+    def test_compaction_keeps_ledger_and_valuation_totals(self):
+        self.record(self.chair, "OUT", 1, timezone.now())
+        products = [self.sofa.pk, self.chair.pk]
+        before = stock_at(products, timezone.now())
+
+        with tempfile.TemporaryDirectory() as directory:
+            self.assertEqual(compact_movements(months=0, directory=directory), 5)
+            with gzip.open(os.path.join(directory, "stock-movements-2026-03.ndjson.gz"), "rt") as archived:
+                rows = [json.loads(line) for line in archived]
+
+        self.assertEqual(len(rows), 5)
+        self.assertFalse(StockMovementArchive.objects.exists())
+        self.assertEqual(StockMovement.objects.count(), 1)
+        self.assertEqual(
+            sorted(StockMovementSummary.objects.filter(product=self.sofa).values_list("movement_type", "quantity")),
+            [("ADJUSTMENT", 1), ("IN", 10), ("OUT", 3), ("RETURN", 2)],
+        )
+        self.assertEqual(stock_at(products, timezone.now()), before)
+        self.assertEqual(
+            [(product_id, balance) for product_id, _, balance in find_drift(full=True)],
+            [(self.sofa.pk, 8), (self.chair.pk, 3)],
+        )
+        rebuild_valuation()
+        self.assertEqual(inventory_valuation(timezone.now())["products"][self.sofa.pk]["quantity"], 8)
+
+    @override_settings(STOCK_MOVEMENT_RETENTION_MONTHS=0)
+    def test_level_series_crosses_the_compacted_months(self):
+        self.record(self.sofa, "OUT", 1, timezone.now() - timedelta(minutes=1))
+        with tempfile.TemporaryDirectory() as directory:
+            compact_movements(months=0, directory=directory)
+
+        series = stock_level_series(self.sofa.pk, day_start(date(2026, 2, 1)), timezone.now())
+
+        # Checkpoints diários no período compactado, movimentações depois dele
+        self.assertEqual(series["level"], [0, 7, 6, 8, 7, 7])
+        self.assertEqual(series["final"], stock_at([self.sofa.pk], timezone.now())[self.sofa.pk])
+
+class StockLevelHistoryTests(StockTestMixin, TestCase):
+    """Testa a série do nível de estoque reduzida para gráficos."""
+
+    def setUp(self):
+        self.start = timezone.make_aware(datetime(2026, 1, 1))
+        self.end = self.start + timedelta(days=30)
+
+    def record_many(self, deltas, step=timedelta(hours=1)):
+        movements = StockMovement.objects.bulk_create([
+            StockMovement(
+                product=self.sofa,
+                movement_type="ADJUSTMENT",
+                direction=1 if delta > 0 else -1,
+                quantity=abs(delta),
+                user=self.user,
+            )
+            for delta in deltas
+        ])
+        for position, movement in enumerate(movements, start=1):
+            movement.created_at = self.start + position * step
+        StockMovement.objects.bulk_update(movements, ["created_at"])
+
+    def test_step_series_starts_from_the_balance_at_start(self):
+        self.record_many([5])
+        StockMovement.objects.update(created_at=self.start - timedelta(days=1))  # antes do intervalo
+        self.record_many([-3, 1])
+
+        # saldo inicial, limite da compactação e movimentações do intervalo
+        with self.assertNumQueries(3):
+            series = stock_level_series(self.sofa.pk, self.start, self.end)
+
+        self.assertEqual(series["level"], [5, 2, 3, 3])
+        self.assertEqual(series["movements"], 2)
+        self.assertEqual(series["t"][0], int(self.start.timestamp() * 1000))
+        self.assertEqual(series["t"][-1], int(self.end.timestamp() * 1000))
+
+    def test_downsampling_keeps_the_point_budget_and_extremes(self):
+        deltas = [1] * 300 + [-1] * 300 + [2] * 50
+        self.record_many(deltas, step=timedelta(minutes=30))
+
+        for method in ("minmax", METHOD_LTTB):
+            series = stock_level_series(self.sofa.pk, self.start, self.end, points=40, method=method)
+            self.assertLessEqual(len(series["t"]), 40)
+            self.assertEqual(series["t"], sorted(series["t"]))
+            self.assertEqual(max(series["level"]), 300)
+            self.assertEqual((series["initial"], series["final"]), (0, 100))
+
+    def test_view_returns_compact_arrays(self):
+        self.record_many([4, -1])
+        request = RequestFactory().get("/stock/products/1/levels.json?start=2026-01-01&end=2026-01-31&points=10")
+        request.user = self.user
+
+        response = StockLevelHistoryView.as_view()(request, product_id=self.sofa.pk)
+
+        data = json.loads(response.content)
+        self.assertEqual(data["level"], [0, 4, 3, 3])
+        bad = RequestFactory().get("/stock/products/1/levels.json?method=media")
+        bad.user = self.user
+        self.assertEqual(StockLevelHistoryView.as_view()(bad, product_id=self.sofa.pk).status_code, 400)
+
+
+class StockReconciliationTests(StockTestMixin, TestCase):
+    """Testa a conciliação entre o estoque e o livro de movimentações."""
+
+    def setUp(self):
+        # O sofá (estoque 5) tem entrada registrada; a cadeira (10) não tem movimentações
+        StockMovement.objects.create(product=self.sofa, movement_type="IN", quantity=5, user=self.user)
+        cancelled = StockMovement.objects.create(product=self.sofa, movement_type="OUT", quantity=2, user=self.user)
+        StockMovement.objects.filter(pk=cancelled.pk).update(is_cancelled=True)
+
+    def test_reports_drift_in_both_modes(self):
+        for full in (False, True):
+            self.assertEqual(list(find_drift(full=full, chunk_size=1)), [(self.chair.pk, 10, 0)])
+
+    def test_repair_ledger_records_adjustments(self):
+        result = reconcile(repair=REPAIR_LEDGER, user=self.user)
+        self.assertEqual(result["repaired"], 1)
+        adjustment = StockMovement.objects.get(movement_type="ADJUSTMENT")
+        self.assertEqual((adjustment.product_id, adjustment.signed_quantity), (self.chair.pk, 10))
+        self.assertEqual(list(find_drift()), [])
+
+    def test_repair_stock_applies_ledger_balance(self):
+        Stock.objects.filter(product=self.sofa).update(quantity=7)
+        reconcile(full=True, repair=REPAIR_STOCK)
+        self.assertEqual(Stock.objects.get(product=self.sofa).quantity, 5)
+        self.assertEqual(Stock.objects.get(product=self.chair).quantity, 0)
+        # As 2 unidades a mais do sofá estavam sem local, que fica como está; as
+        # 10 cadeiras deixam de existir e saem do local, que não pode mais transferi-las
+        self.assertEqual(
+            dict(LocationStock.objects.values_list("product_id", "quantity")),
+            {self.sofa.pk: 5, self.chair.pk: 0},
+        )
+        self.assertFalse(StockMovement.objects.filter(movement_type="ADJUSTMENT").exists())
+
+    def test_repair_stock_takes_excess_from_locations_by_priority(self):
+        backroom = Location.objects.create(code="FUNDOS", name="Fundos", priority=0)
+        LocationStock.objects.create(location=backroom, product=self.chair, quantity=2)
+        Stock.objects.filter(product=self.chair).update(quantity=12)
+        StockMovement.objects.create(product=self.chair, movement_type="IN", quantity=7, user=self.user)
+
+        reconcile(full=True, repair=REPAIR_STOCK)
+
+        self.assertEqual(Stock.objects.get(product=self.chair).quantity, 7)
+        self.assertEqual(
+            sorted(LocationStock.objects.filter(product=self.chair).values_list("location__code", "quantity")),
+            [("FUNDOS", 0), ("PRINCIPAL", 7)],
+        )
+
+
+class StockAvailabilityTests(StockTestMixin, TestCase):
+    """Testa a API de disponibilidade em lote e seu cache."""
+
+    def setUp(self):
+        invalidate_availability()
+        self.addCleanup(invalidate_availability)
+        Product.objects.filter(pk=self.chair.pk).update(gtin="7891234567895")
+        sync_reservations(Order.objects.create().pk, {self.sofa.pk: 2})
+
+    def get(self, query):
+        request = RequestFactory().get(f"/stock/availability.json?{query}")
+        request.user = self.user
+        response = StockAvailabilityView.as_view()(request)
+        return response.status_code, json.loads(response.content)
+
+    def test_ids_and_gtins_in_one_query_then_from_cache(self):
+        with self.assertNumQueries(1):
+            status, data = self.get(f"ids={self.sofa.pk},999999&gtins=7891234567895")
+
+        self.assertEqual(status, 200)
+        rows = {row["product_id"]: row for row in data["results"]}
+        self.assertEqual(rows[self.sofa.pk]["on_hand"], 5)
+        self.assertEqual(rows[self.sofa.pk]["available"], 3)
+        self.assertEqual(rows[self.chair.pk]["available"], 10)
+        self.assertEqual(data["not_found"], {"ids": [999999], "gtins": []})
+
+        with self.assertNumQueries(0):
+            self.get(f"gtins=7891234567895&ids={self.sofa.pk}")
+
+    def test_stock_writes_invalidate_the_cache_after_commit(self):
+        self.get(f"ids={self.chair.pk}")
+        with self.captureOnCommitCallbacks(execute=True):
+            deduct_stock({self.chair.pk: 4}, user=self.user, reference_id="ORDER-1")
+
+        _, data = self.get(f"ids={self.chair.pk}")
+        self.assertEqual(data["results"][0]["on_hand"], 6)
+
+    def test_rejects_invalid_or_empty_requests(self):
+        self.assertEqual(self.get("ids=abc")[0], 400)
+        self.assertEqual(self.get("")[0], 400)
+
+
+class LowStockTests(StockTestMixin, TestCase):
+    """Testa a lista de reposição e o alerta de estoque mínimo."""
+
+    def test_json_lists_products_below_minimum_in_one_query(self):
+        Stock.objects.filter(product=self.sofa).update(quantity=2, min_quantity=5)
+        request = RequestFactory().get("/stock/low-stock.json")
+        request.user = self.user
+
+        with self.assertNumQueries(1):
+            response = LowStockJsonView.as_view()(request)
+
+        data = json.loads(response.content)
+        self.assertEqual(data["count"], 1)
+        self.assertEqual(data["results"][0]["product_id"], self.sofa.pk)
+        self.assertEqual(data["results"][0]["shortage"], 3)
+        self.assertEqual(data["results"][0]["category"], "Móveis")
+
+    def test_alert_fires_once_when_threshold_is_crossed(self):
+        received = []
+        handler = lambda sender, crossings, **kwargs: received.extend(crossings)
+        stock_below_minimum.connect(handler)
+        self.addCleanup(stock_below_minimum.disconnect, handler)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            deduct_stock({self.sofa.pk: 1, self.chair.pk: 1}, user=self.user, reference_id="ORDER-1")
+        with self.captureOnCommitCallbacks(execute=True):
+            deduct_stock({self.sofa.pk: 1}, user=self.user, reference_id="ORDER-2")
+
+        self.assertEqual(
+            received, [{"product_id": self.sofa.pk, "before": 5, "after": 4, "min_quantity": 5}]
+        )
+
+
+class InventoryCountTests(StockTestMixin, TestCase):
+    """Testa a contagem física por leitura de código de barras."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Product.objects.filter(pk=cls.sofa.pk).update(gtin="7891000000011")
+        Product.objects.filter(pk=cls.chair.pk).update(gtin="7891000000028")
+
+    def test_opening_snapshots_expected_stock(self):
+        count = open_count(self.user)
+        self.assertEqual(
+            dict(InventoryCountLine.objects.filter(count=count).values_list("product_id", "expected")),
+            {self.sofa.pk: 5, self.chair.pk: 10},
+        )
+
+    def test_scans_are_aggregated_per_product(self):
+        count = open_count(self.user)
+        result = record_scans(count, [("7891000000011", 1), ("7891000000011", 2), ("0000000000000", 1)])
+        self.assertEqual(result, {"recorded": 3, "unknown": {"0000000000000": 1}})
+        record_scans(count, [("7891000000011", 1)])
+        self.assertEqual(InventoryCountLine.objects.get(count=count, product=self.sofa).counted, 4)
+
+    def test_close_applies_differences_only_to_scanned_products(self):
+        count = open_count(self.user)
+        record_scans(count, [("7891000000011", 4)])
+        movements = close_count(count, self.user)
+
+        self.assertEqual(len(movements), 1)
+        self.assertEqual(movements[0].signed_quantity, -1)
+        self.assertEqual(Stock.objects.get(product=self.sofa).quantity, 4)
+        self.assertEqual(Stock.objects.get(product=self.chair).quantity, 10)
+        with self.assertRaises(ValidationError):
+            record_scans(count, [("7891000000011", 1)])
+
+    def test_movements_during_the_count_are_not_adjusted(self):
+        count = open_count(self.user)
+        # Venda antes da leitura do sofá: a prateleira já tem 3 unidades
+        deduct_stock({self.sofa.pk: 2}, user=self.user, reference_id="ORDER-1")
+        record_scans(count, [("7891000000011", 3), ("7891000000028", 10)])
+        # Venda depois da leitura da cadeira: continua no estoque do sistema
+        deduct_stock({self.chair.pk: 4}, user=self.user, reference_id="ORDER-2")
+
+        self.assertEqual(close_count(count, self.user), [])
+        self.assertEqual(Stock.objects.get(product=self.sofa).quantity, 3)
+        self.assertEqual(Stock.objects.get(product=self.chair).quantity, 6)
+
+    def test_zero_missing_adjusts_unscanned_products(self):
+        count = open_count(self.user)
+        record_scans(count, [("7891000000011", 5)])
+        close_count(count, self.user, zero_missing=True)
+        self.assertEqual(Stock.objects.get(product=self.chair).quantity, 0)
+        self.assertEqual(InventoryCountLine.objects.get(count=count, product=self.chair).adjustment, -10)
+
+    def test_scan_endpoint_records_batch(self):
+        count = open_count(self.user)
+        request = RequestFactory().post(
+            "/stock/counts/scans/",
+            data=json.dumps({"scans": [{"gtin": "7891000000028"}, {"gtin": "7891000000028", "quantity": 2}]}),
+            content_type="application/json",
+        )
+        request.user = self.user
+        response = InventoryCountScanView.as_view()(request, pk=count.pk)
+        self.assertEqual(json.loads(response.content), {"recorded": 3, "unknown": {}})
+
+
+class DemandForecastTests(StockTestMixin, TestCase):
+    """Testa a previsão de demanda e o ponto de reposição sugerido."""
+
+    def setUp(self):
+        today = timezone.localdate()
+        for days_ago in range(1, 11):
+            movement = StockMovement.objects.create(
+                product=self.sofa, movement_type="OUT", quantity=2, user=self.user
+            )
+            StockMovement.objects.filter(pk=movement.pk).update(
+                created_at=timezone.make_aware(datetime.combine(today - timedelta(days=days_ago), datetime.min.time()))
+                + timedelta(hours=12)
+            )
+
+    def test_suggests_reorder_points_for_the_whole_catalog(self):
+        self.assertEqual(update_reorder_points(window_days=10), 2)
+        sofa = Stock.objects.get(product=self.sofa)
+        self.assertEqual(
+            (sofa.daily_demand, sofa.suggested_min_quantity, sofa.reorder_quantity, sofa.min_quantity),
+            (Decimal("2.000"), 14, 60, 5),
+        )
+        chair = Stock.objects.get(product=self.chair)
+        self.assertEqual((chair.suggested_min_quantity, chair.reorder_quantity), (0, 0))
+
+    def test_variable_demand_adds_safety_stock_and_can_be_applied(self):
+        # Pico de demanda ontem: a média suavizada sobe e o desvio gera estoque de segurança
+        StockMovement.objects.create(product=self.sofa, movement_type="OUT", quantity=20, user=self.user)
+        StockMovement.objects.filter(quantity=20).update(
+            created_at=timezone.now() - timedelta(days=1)
+        )
+        update_reorder_points(window_days=10, apply=True, method=METHOD_EXPONENTIAL)
+        sofa = Stock.objects.get(product=self.sofa)
+        self.assertGreater(sofa.suggested_min_quantity, 7 * sofa.daily_demand)
+        self.assertEqual(sofa.min_quantity, sofa.suggested_min_quantity)
+
+
+class InventoryValuationTests(StockTestMixin, TestCase):
+    """Testa o custo médio ponderado, as camadas PEPS e o valor do estoque em uma data."""
+
+    def setUp(self):
+        self.lamp = self.create_product("Luminária")
+        receive_stock([(self.lamp.pk, 10, Decimal("10.00"), "NF-1")], user=self.user)
+        self.after_first_receipt = timezone.now()
+        receive_stock([(self.lamp.pk, 10, Decimal("20.00"), "NF-2")], user=self.user)
+        deduct_stock({self.lamp.pk: 15}, user=self.user, reference_id="ORDER-1")
+
+    def test_average_and_fifo_are_maintained_incrementally(self):
+        valuation = inventory_valuation(timezone.now(), [self.lamp.pk])
+        self.assertEqual(valuation["quantity"], 5)
+        # Médio: 5 x 15,00; PEPS: as 5 unidades restantes da segunda entrada (20,00)
+        self.assertEqual(valuation["average_value"], Decimal("75.00"))
+        self.assertEqual(valuation["fifo_value"], Decimal("100.00"))
+        self.assertEqual(
+            list(CostLayer.objects.filter(product=self.lamp).values_list("remaining", flat=True)), [0, 5]
+        )
+
+    def test_valuation_at_a_past_date_reads_one_entry_per_product(self):
+        with self.assertNumQueries(1):
+            valuation = inventory_valuation(self.after_first_receipt, [self.lamp.pk])
+        self.assertEqual(valuation["fifo_value"], Decimal("100.00"))
+
+    def test_rebuild_matches_incremental_valuation(self):
+        before = inventory_valuation(timezone.now())
+        rebuild_valuation(chunk_size=2)
+        self.assertEqual(inventory_valuation(timezone.now()), before)
+
+
+class StockLocationTests(StockTestMixin, TestCase):
+    """Testa o estoque por local, as transferências e a prioridade de retirada."""
+
+    def setUp(self):
+        self.main = Location.objects.get(code="PRINCIPAL")
+        self.showroom = Location.objects.create(code="SHOW", name="Showroom", kind="SHOWROOM", priority=1)
+
+    def test_transfer_moves_units_between_locations(self):
+        movements = transfer_stock({self.sofa.pk: 2}, self.main, self.showroom, user=self.user)
+        self.assertEqual([movement.signed_quantity for movement in movements], [-2, 2])
+        self.assertEqual(Stock.objects.get(product=self.sofa).quantity, 5)
+        with self.assertNumQueries(1):
+            by_location = stock_by_location([self.sofa.pk, self.chair.pk])
+        self.assertEqual(by_location[self.sofa.pk], {"total": 5, "locations": {"SHOW": 2, "PRINCIPAL": 3}})
+        self.assertEqual(by_location[self.chair.pk], {"total": 10, "locations": {"PRINCIPAL": 10}})
+
+    def test_transfer_without_balance_changes_nothing(self):
+        with self.assertRaises(ValidationError):
+            transfer_stock({self.sofa.pk: 1}, self.showroom, self.main, user=self.user)
+        self.assertFalse(LocationStock.objects.filter(location=self.showroom).exists())
+
+    def test_deduction_follows_location_priority(self):
+        transfer_stock({self.sofa.pk: 2}, self.main, self.showroom, user=self.user)
+        movements = deduct_stock({self.sofa.pk: 3}, user=self.user, reference_id="ORDER-1")
+        self.assertEqual(
+            [(movement.location_id, movement.quantity) for movement in movements],
+            [(self.showroom.pk, 2), (self.main.pk, 1)],
+        )
+        self.assertEqual(stock_by_location([self.sofa.pk])[self.sofa.pk]["locations"], {"SHOW": 0, "PRINCIPAL": 2})
+
+    def test_restock_credits_the_receiving_location(self):
+        restock([(self.sofa.pk, 2, "ORDER-1")], user=self.user, movement_type="CANCELLATION")
+        self.assertEqual(LocationStock.objects.get(location=self.main, product=self.sofa).quantity, 7)
@@ -0,0 +1,18 @@
+from django.urls import path
+from .views import (
+    InventoryCountScanView,
+    LowStockJsonView,
+    LowStockListView,
+    StockAvailabilityView,
+    StockLevelHistoryView,
+)
+
+app_name = "stock"
+
+urlpatterns = [
+    path("low-stock/", LowStockListView.as_view(), name="low_stock"),
+    path("low-stock.json", LowStockJsonView.as_view(), name="low_stock_json"),
+    path("availability.json", StockAvailabilityView.as_view(), name="availability"),
+    path("products/<int:product_id>/levels.json", StockLevelHistoryView.as_view(), name="level_history"),
+    path("counts/<int:pk>/scans/", InventoryCountScanView.as_view(), name="count_scans"),
+]
@@ -0,0 +1,191 @@
+## valorização do estoque: custo médio ponderado e camadas PEPS (FIFO), mantidos de forma incremental
+import heapq
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+
+from apps.products.models import Product
+from .archive import summary_movements
+from .models import CostLayer, StockMovement, StockMovementArchive, ValuationEntry
+
+COST_PLACES = Decimal('0.0001')
+
+# Movimentações reprocessadas por vez em `rebuild_valuation`
+REBUILD_CHUNK_SIZE = 2000
+
+
+def _quantize(value):
+    return Decimal(value).quantize(COST_PLACES)
+
+
+def _latest_entries(product_ids, timestamp=None):
+    """
+    Última entrada de valorização de cada produto (até `timestamp`, se
+    informado), em uma consulta. Produtos sem entrada vêm com campos vazios.
+    """
+    latest = ValuationEntry.objects.filter(product=OuterRef('pk')).order_by('-created_at', '-id')
+    if timestamp is not None:
+        latest = latest.filter(created_at__lte=timestamp)
+    products = Product.objects.all() if product_ids is None else Product.objects.filter(pk__in=product_ids)
+    return products.annotate(
+        last_quantity=Subquery(latest.values('quantity')[:1]),
+        last_average=Subquery(latest.values('average_cost')[:1]),
+        last_fifo=Subquery(latest.values('fifo_value')[:1]),
+    )
+
+
+def value_movements(movements):
+    """
+    Atualiza a valorização com movimentações recém-gravadas.
+
+    Chamada por `StockMovement.save` e `StockMovement.objects.bulk_create`.
+    Com a situação anterior (última `ValuationEntry` de cada produto) e as
+    camadas abertas, processa as movimentações em ordem:
+
+    - Entradas criam uma camada com `unit_cost` (sem custo informado, como em
+      devoluções e estornos, usam o custo médio atual) e recalculam a média.
+    - Saídas consomem as camadas mais antigas (PEPS) e não alteram a média;
+      unidades sem camada (estoque anterior à valorização) saem pelo custo médio.
+
+    Custo fixo por chamada: duas leituras, um `bulk_create` de camadas, um
+    `bulk_update` das camadas consumidas e um `bulk_create` das entradas.
+    Transferências entre locais não alteram o custo do produto e são ignoradas,
+    assim como as movimentações canceladas; ao cancelar uma movimentação já
+    valorizada, use `rebuild_valuation`.
+    """
+    movements = [
+        movement for movement in movements
+        if not movement.is_cancelled and movement.quantity and movement.movement_type != 'TRANSFER'
+    ]
+    if not movements:
+        return
+    product_ids = {movement.product_id for movement in movements}
+
+    state = {}
+    for product in _latest_entries(product_ids):
+        state[product.pk] = (
+            product.last_quantity or 0,
+            product.last_average if product.last_average is not None else _quantize(product.cost_price or 0),
+        )
+    layers = defaultdict(list)
+    for layer in CostLayer.objects.filter(product_id__in=product_ids, remaining__gt=0).order_by('product_id', 'received_at', 'id'):
+        layers[layer.product_id].append(layer)
+
+    new_layers = []
+    consumed = {}
+    entries = []
+    for movement in movements:
+        quantity, average = state[movement.product_id]
+        open_layers = layers[movement.product_id]
+        cogs_average = cogs_fifo = Decimal(0)
+
+        if movement.direction > 0:
+            unit_cost = _quantize(movement.unit_cost) if movement.unit_cost is not None else average
+            layer = CostLayer(
+                product_id=movement.product_id,
+                movement_id=movement.pk,
+                received_at=movement.created_at,
+                quantity=movement.quantity,
+                remaining=movement.quantity,
+                unit_cost=unit_cost,
+            )
+            new_layers.append(layer)
+            open_layers.append(layer)
+            if quantity > 0:
+                average = _quantize((quantity * average + movement.quantity * unit_cost) / (quantity + movement.quantity))
+            else:
+                average = unit_cost
+            quantity += movement.quantity
+        else:
+            needed = movement.quantity
+            for layer in open_layers:
+                if not needed:
+                    break
+                taken = min(layer.remaining, needed)
+                layer.remaining -= taken
+                needed -= taken
+                cogs_fifo += taken * layer.unit_cost
+                if layer.pk:
+                    consumed[layer.pk] = layer
+            open_layers[:] = [layer for layer in open_layers if layer.remaining]
+            cogs_fifo += needed * average
+            cogs_average = movement.quantity * average
+            quantity -= movement.quantity
+
+        state[movement.product_id] = (quantity, average)
+        entries.append(ValuationEntry(
+            product_id=movement.product_id,
+            movement_id=movement.pk,
+            created_at=movement.created_at,
+            quantity=quantity,
+            average_cost=average,
+            fifo_value=sum((layer.remaining * layer.unit_cost for layer in open_layers), Decimal(0)),
+            cogs_average=_quantize(cogs_average),
+            cogs_fifo=_quantize(cogs_fifo),
+        ))
+
+    CostLayer.objects.bulk_create(new_layers, batch_size=1000)
+    CostLayer.objects.bulk_update(consumed.values(), ['remaining'], batch_size=1000)
+    ValuationEntry.objects.bulk_create(entries, batch_size=1000)
+
+
+def inventory_valuation(timestamp, product_ids=None):
+    """
+    Valor do estoque em um instante, pelo custo médio e pelas camadas PEPS.
+
+    Lê apenas a entrada de valorização mais recente de cada produto até o
+    instante (uma consulta), sem reprocessar o livro de movimentações.
+
+    Returns:
+        dict: `{'quantity', 'average_value', 'fifo_value', 'products': {product_id: {...}}}`.
+    """
+    products = {}
+    for product in _latest_entries(product_ids, timestamp).filter(last_quantity__isnull=False):
+        products[product.pk] = {
+            'quantity': product.last_quantity,
+            'average_cost': product.last_average,
+            'average_value': _quantize(product.last_quantity * product.last_average),
+            'fifo_value': product.last_fifo,
+        }
+    return {
+        'quantity': sum(row['quantity'] for row in products.values()),
+        'average_value': sum((row['average_value'] for row in products.values()), Decimal(0)),
+        'fifo_value': sum((row['fifo_value'] for row in products.values()), Decimal(0)),
+        'products': products,
+    }
+
+
+def rebuild_valuation(chunk_size=REBUILD_CHUNK_SIZE):
+    """
+    Refaz toda a valorização a partir do livro (movimentações ativas e
+    arquivadas, em ordem cronológica). Usada na implantação e após cancelar
+    movimentações já valorizadas. Meses compactados entram pelos resumos
+    mensais (`apps.stock.archive.summary_movements`), com o custo médio do mês.
+
+    Returns:
+        int: Quantidade de movimentações reprocessadas.
+    """
+    order = ('created_at', 'id')
+    ledger = heapq.merge(
+        summary_movements(),
+        StockMovementArchive.objects.filter(is_cancelled=False).order_by(*order).iterator(chunk_size=chunk_size),
+        StockMovement.objects.filter(is_cancelled=False).order_by(*order).iterator(chunk_size=chunk_size),
+        key=lambda movement: (movement.created_at, movement.pk or 0),
+    )
+
+    processed = 0
+    with transaction.atomic():
+        ValuationEntry.objects.all().delete()
+        CostLayer.objects.all().delete()
+        chunk = []
+        for movement in ledger:
+            chunk.append(movement)
+            if len(chunk) >= chunk_size:
+                value_movements(chunk)
+                processed += len(chunk)
+                chunk = []
+        value_movements(chunk)
+        processed += len(chunk)
+    return processed
@@ -1,3 +1,149 @@
-from django.shortcuts import render
+import json
+from datetime import timedelta
 
-# Create your views here.
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.exceptions import ValidationError
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.views import View
+from django.views.generic import ListView
+
+from apps.products.models import Product
+from .counting import record_scans
+from .ledger import day_start
+from .models import InventoryCount, Stock
+from .services import cached_availability
+
+
+class LowStockListView(LoginRequiredMixin, ListView):
+    """
+    Painel de reposição: produtos com estoque abaixo do mínimo.
+
+    Produto, categoria e subcategoria vêm na mesma consulta
+    (`Stock.objects.below_minimum()`), ordenados pelo maior déficit.
+    """
+
+    template_name = "stock/low_stock_list.html"
+    context_object_name = "stocks"
+
+    def get_queryset(self):
+        return Stock.objects.below_minimum()
+
+
+class LowStockJsonView(LoginRequiredMixin, View):
+    """Mesma lista do painel de reposição em JSON (uma consulta, sem paginação)."""
+
+    fields = {
+        "product_id": "product_id",
+        "internal_code": "product__internal_code",
+        "description": "product__description",
+        "category": "product__category__name",
+        "subcategory": "product__subcategory__name",
+        "quantity": "quantity",
+        "min_quantity": "min_quantity",
+        "shortage": "shortage",
+        "location": "location",
+    }
+
+    def get(self, request, *args, **kwargs):
+        results = [
+            {key: row[field] for key, field in self.fields.items()}
+            for row in Stock.objects.below_minimum().values(*self.fields.values())
+        ]
+        return JsonResponse({"count": len(results), "results": results})
+
+
+class StockAvailabilityView(LoginRequiredMixin, View):
+    """
+    Disponibilidade de vários produtos de uma vez (tela de pedidos, PDV).
+
+    Parâmetros: `ids` e/ou `gtins`, separados por vírgula ou repetidos
+    (`?ids=1,2&gtins=789...`). Os produtos vêm do cache de disponibilidade
+    ou de uma única consulta (`apps.stock.services.cached_availability`).
+    """
+
+    max_items = 500
+
+    @staticmethod
+    def _values(request, name):
+        return [value.strip() for raw in request.GET.getlist(name) for value in raw.split(",") if value.strip()]
+
+    def get(self, request, *args, **kwargs):
+        try:
+            product_ids = list(dict.fromkeys(int(value) for value in self._values(request, "ids")))
+        except ValueError:
+            return JsonResponse({"error": "IDs de produto inválidos."}, status=400)
+        gtins = list(dict.fromkeys(self._values(request, "gtins")))
+        if not product_ids and not gtins:
+            return JsonResponse({"error": "Informe `ids` ou `gtins`."}, status=400)
+        if len(product_ids) + len(gtins) > self.max_items:
+            return JsonResponse({"error": f"Máximo de {self.max_items} produtos por consulta."}, status=400)
+
+        results, missing_ids, missing_gtins = cached_availability(product_ids, gtins)
+        return JsonResponse({
+            "count": len(results),
+            "results": results,
+            "not_found": {"ids": missing_ids, "gtins": missing_gtins},
+        })
+
+
+class StockLevelHistoryView(LoginRequiredMixin, View):
+    """
+    Nível de estoque de um produto ao longo do tempo, para gráficos.
+
+    Parâmetros: `start` e `end` (datas ISO, inclusive; padrão: último ano),
+    `points` (orçamento de pontos) e `method` (`minmax` ou `lttb`). Devolve
+    arrays compactos já reduzidos (`apps.stock.history.stock_level_series`),
+    não as movimentações.
+    """
+
+    default_days = 365
+
+    def get(self, request, product_id, *args, **kwargs):
+        # numpy só é carregado quando um gráfico é pedido
+        from .history import DEFAULT_POINTS, METHOD_MINMAX, stock_level_series
+
+        product = get_object_or_404(Product.objects.only("pk"), pk=product_id)
+        try:
+            end = parse_date(request.GET["end"]) if "end" in request.GET else timezone.localdate()
+            start = (
+                parse_date(request.GET["start"]) if "start" in request.GET
+                else end - timedelta(days=self.default_days)
+            )
+            points = int(request.GET.get("points", DEFAULT_POINTS))
+            if start is None or end is None or start > end:
+                raise ValueError
+            series = stock_level_series(
+                product.pk,
+                day_start(start),
+                min(day_start(end + timedelta(days=1)), timezone.now()),
+                points=points,
+                method=request.GET.get("method", METHOD_MINMAX),
+            )
+        except ValueError:
+            return JsonResponse({"error": "Parâmetros inválidos."}, status=400)
+        return JsonResponse(series)
+
+
+class InventoryCountScanView(LoginRequiredMixin, View):
+    """
+    Recebe um lote de leituras do coletor para uma contagem aberta.
+
+    Corpo JSON: `{"scans": [{"gtin": "789...", "quantity": 1}, ...]}`
+    (`quantity` opcional, padrão 1). O lote é agregado em memória e gravado
+    de uma vez (`apps.stock.counting.record_scans`).
+    """
+
+    def post(self, request, pk, *args, **kwargs):
+        count = get_object_or_404(InventoryCount, pk=pk)
+        try:
+            payload = json.loads(request.body)
+            scans = [(scan["gtin"], int(scan.get("quantity", 1))) for scan in payload["scans"]]
+            result = record_scans(count, scans)
+        except (ValueError, KeyError, TypeError):
+            return JsonResponse({"error": "Lote de leituras inválido."}, status=400)
+        except ValidationError as e:
+            return JsonResponse({"error": "; ".join(e.messages)}, status=409)
+        return JsonResponse(result)
@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-19 07:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('suppliers', '0006_phone_pattern_and_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='supplier',
+            index=models.Index(fields=['tax_id'], name='supplier_tax_id_pattern_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
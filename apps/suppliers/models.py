@@ -131,7 +131,20 @@ class Supplier(models.Model):
         indexes = [
             models.Index(fields=['full_name']),
             models.Index(fields=['tax_id']),
+            # Buscas por prefixo (termos curtos) do CPF/CNPJ; ver `core.lookups.digits_lookup`
+            models.Index(
+                fields=['tax_id'],
+                name='supplier_tax_id_pattern_idx',
+                opclasses=['varchar_pattern_ops'],
+            ),
             models.Index(fields=['is_active']),
+            # Buscas por prefixo (termos curtos, ex: DDD) do telefone; as buscas
+            # por substring usam índices trigram criados na migração 0006.
+            models.Index(
+                fields=['phone'],
+                name='supplier_phone_pattern_idx',
+                opclasses=['varchar_pattern_ops'],
+            ),
         ]
 
     def __str__(self) -> str:
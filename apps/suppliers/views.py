@@ -11,6 +11,7 @@ from django.http import HttpResponseRedirect # Importado para form_valid
 # from apps.addresses.models import Address # Não é mais necessário aqui
 from .models import Supplier
 from .forms import SupplierForm
+from core.lookups import digits_lookup
 import logging
 
 logger = logging.getLogger(__name__)
@@ -50,7 +51,7 @@ class SupplierListView(ListView):
                 Q(contact_person__icontains=search_query)
             )
             if cleaned_search_query_for_tax_id:
-                query_conditions |= Q(tax_id__icontains=cleaned_search_query_for_tax_id)
+                query_conditions |= digits_lookup('tax_id', cleaned_search_query_for_tax_id, full_length=14)
             
             queryset = queryset.filter(query_conditions)
         
@@ -0,0 +1,16 @@
+## recursos do banco de dados que o Django não expõe em `connection.features`
+
+
+def supports_update_returning(connection):
+    """
+    Indica se o banco aceita `UPDATE ... RETURNING`.
+
+    `features.can_return_columns_from_insert` cobre só o `INSERT`: o MariaDB
+    10.5+ o informa, mas não tem `UPDATE ... RETURNING`. Por isso a decisão
+    é pelo fornecedor: PostgreSQL sempre, SQLite a partir da 3.35.
+    """
+    if connection.vendor == 'postgresql':
+        return True
+    if connection.vendor == 'sqlite':
+        return connection.Database.sqlite_version_info >= (3, 35)
+    return False
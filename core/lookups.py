@@ -0,0 +1,37 @@
+## estratégias de consulta compartilhadas entre os apps (ex: buscas por campos numéricos)
+from django.db.models import Q
+
+
+# Menor termo atendido pelos índices trigram (pg_trgm indexa trechos de 3 caracteres)
+TRIGRAM_MIN_LENGTH = 3
+
+
+def digits_lookup(field_name: str, digits: str, full_length: int | None = None) -> Q:
+    """
+    Monta o filtro mais barato para buscar um valor numérico (CPF/CNPJ, telefone).
+
+    Os campos são armazenados apenas com dígitos, então não há necessidade de
+    `icontains` (que aplica UPPER() na coluna e impede o uso de índices).
+    A estratégia é escolhida pelo tamanho do termo:
+
+    - Termo com `full_length` dígitos (tamanho máximo do valor): só pode casar
+      com o valor inteiro, então usa igualdade, atendida pelo índice B-tree/único.
+    - Termo menor que `TRIGRAM_MIN_LENGTH`: nenhum índice atende uma substring
+      tão curta, então a busca é por prefixo (`startswith` → LIKE 'x%'),
+      atendida pelos índices `varchar_pattern_ops` (ex: DDD do telefone).
+    - Demais casos: substring (`contains` → LIKE '%x%'), atendida pelo
+      índice GIN `gin_trgm_ops` no PostgreSQL.
+
+    Args:
+        field_name: Nome do campo (ou caminho de lookup) a ser filtrado.
+        digits: Termo de busca já limpo (apenas dígitos).
+        full_length: Maior tamanho possível do valor (14 para CPF/CNPJ, 11 para telefone).
+
+    Returns:
+        Um objeto `Q` com o lookup escolhido.
+    """
+    if full_length is not None and len(digits) == full_length:
+        return Q(**{field_name: digits})
+    if len(digits) < TRIGRAM_MIN_LENGTH:
+        return Q(**{f"{field_name}__startswith": digits})
+    return Q(**{f"{field_name}__contains": digits})
@@ -0,0 +1,23 @@
+from types import SimpleNamespace
+
+from django.test import SimpleTestCase
+
+from core.db import supports_update_returning
+
+
+class SupportsUpdateReturningTests(SimpleTestCase):
+    """Testa a detecção de `UPDATE ... RETURNING` por fornecedor."""
+
+    def connection(self, vendor, sqlite_version=None):
+        return SimpleNamespace(
+            vendor=vendor,
+            Database=SimpleNamespace(sqlite_version_info=sqlite_version),
+            features=SimpleNamespace(can_return_columns_from_insert=True),
+        )
+
+    def test_decides_by_vendor_not_by_insert_returning(self):
+        self.assertTrue(supports_update_returning(self.connection("postgresql")))
+        self.assertTrue(supports_update_returning(self.connection("sqlite", (3, 35, 0))))
+        self.assertFalse(supports_update_returning(self.connection("sqlite", (3, 34, 1))))
+        # MariaDB 10.5+ tem INSERT ... RETURNING, mas não UPDATE ... RETURNING
+        self.assertFalse(supports_update_returning(self.connection("mysql")))
@@ -0,0 +1,59 @@
+from django.db.models import Q
+from django.test import SimpleTestCase, TestCase
+
+from apps.customers.models import Customer
+from core.lookups import digits_lookup
+
+
+class DigitsLookupTests(SimpleTestCase):
+    """Testa a escolha do lookup para buscas por campos numéricos."""
+
+    def test_full_value_uses_exact_match(self):
+        self.assertEqual(
+            digits_lookup("tax_id", "12345678000195", full_length=14),
+            Q(tax_id="12345678000195"),
+        )
+
+    def test_short_term_uses_prefix(self):
+        self.assertEqual(digits_lookup("phone", "11"), Q(phone__startswith="11"))
+        self.assertEqual(digits_lookup("tax_id", "5", full_length=14), Q(tax_id__startswith="5"))
+
+    def test_partial_term_uses_substring(self):
+        self.assertEqual(digits_lookup("phone", "119"), Q(phone__contains="119"))
+        self.assertEqual(
+            digits_lookup("tax_id", "12345678901", full_length=14),
+            Q(tax_id__contains="12345678901"),
+        )
+
+
+class DigitsLookupMatchingTests(TestCase):
+    """Resultados das estratégias escolhidas pelo tamanho do termo."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.person = Customer.objects.create(
+            customer_type="IND", full_name="Ana Souza", tax_id="52998224725", phone="11987654321"
+        )
+        cls.other = Customer.objects.create(
+            customer_type="IND", full_name="Bruno Lima", tax_id="11144477735", phone="1133334444"
+        )
+
+    def search(self, field_name, digits, full_length):
+        return set(Customer.objects.filter(digits_lookup(field_name, digits, full_length)))
+
+    def test_partly_typed_mobile_still_matches(self):
+        self.assertEqual(self.search("phone", "1198765432", 11), {self.person})
+        self.assertEqual(self.search("phone", "11987654321", 11), {self.person})
+
+    def test_short_terms_match_the_start_of_the_value(self):
+        self.assertEqual(self.search("phone", "11", 11), {self.person, self.other})
+        self.assertEqual(self.search("tax_id", "52", 14), {self.person})
+        self.assertEqual(self.search("tax_id", "7", 14), set())
+
+    def test_longer_terms_match_anywhere_in_the_value(self):
+        self.assertEqual(self.search("phone", "444", 11), {self.other})
+        self.assertEqual(self.search("tax_id", "224", 14), {self.person})
+
+    def test_complete_values_match(self):
+        self.assertEqual(self.search("tax_id", "52998224725", 14), {self.person})
+        self.assertEqual(self.search("phone", "1133334444", 11), {self.other})
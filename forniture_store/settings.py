@@ -112,6 +112,7 @@ INSTALLED_APPS = [
     "apps.customers",
     "apps.docs",
     "apps.employees",
+    "apps.sequences",
     "apps.showroom",
     # 'apps.reports',
     # 'apps.orders',
@@ -173,6 +174,30 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# --- Configurações de Estoque ---
+# Validade (em minutos) das reservas de estoque feitas por pedidos em rascunho
+STOCK_RESERVATION_TTL_MINUTES = int(os.environ.get("STOCK_RESERVATION_TTL_MINUTES", "120"))
+# Meses de movimentações mantidos na tabela principal; os anteriores vão para o arquivo
+STOCK_MOVEMENT_RETENTION_MONTHS = int(os.environ.get("STOCK_MOVEMENT_RETENTION_MONTHS", "12"))
+# Meses mantidos como movimentações individuais; os anteriores viram resumos mensais
+STOCK_MOVEMENT_COMPACTION_MONTHS = int(os.environ.get("STOCK_MOVEMENT_COMPACTION_MONTHS", "36"))
+# Pasta dos arquivos NDJSON compactados com as movimentações resumidas
+STOCK_LEDGER_ARCHIVE_DIR = os.environ.get("STOCK_LEDGER_ARCHIVE_DIR") or os.path.join(BASE_DIR, "archive", "stock_movements")
+# Validade (em segundos) do cache por processo da API de disponibilidade; 0 desativa
+STOCK_AVAILABILITY_CACHE_SECONDS = int(os.environ.get("STOCK_AVAILABILITY_CACHE_SECONDS", "2"))
+
+
+# --- Configurações de Numeração ---
+# Valores reservados por processo a cada ida ao contador (códigos de produto e números de pedido).
+# 1 = numeração contínua; valores maiores reduzem a disputa entre workers, mas podem deixar lacunas.
+SEQUENCE_BLOCK_SIZE = int(os.environ.get("SEQUENCE_BLOCK_SIZE", "1"))
+
+
+# --- Operações Automáticas ---
+# Conta de serviço (sem login) registrada como responsável pelas movimentações automáticas
+SYSTEM_USERNAME = os.environ.get("SYSTEM_USERNAME", "sistema")
+
+
 # --- Configurações de Internacionalização ---
 LANGUAGE_CODE = "pt-br"
 TIME_ZONE = "America/Sao_Paulo"
@@ -12,6 +12,7 @@ urlpatterns = [
     # path('suppliers/', include('apps.suppliers.urls')),
     # path('products', include('apps.products.urls')),
     # path('reports/', include('apps.reports.urls')),
+    # path('stock/', include('apps.stock.urls')),
 ]
 
 # A configuração de servir MEDIA ainda pode ser útil em desenvolvimento,
@@ -0,0 +1,76 @@
+"""
+Benchmark de inicialização dos workers: tempo de importação e memória (RSS)
+do módulo de relatórios com os geradores carregados sob demanda (atual) e
+com todos os geradores importados na inicialização (como era antes, quando
+`apps/reports/views.py` importava pandas diretamente).
+
+Cada medição roda em um processo Python novo, como um worker do gunicorn.
+
+Uso:
+    python tests_folder/benchmark_report_imports.py [--runs 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Código executado no processo filho: configura o Django e mede só o import
+CHILD_SCRIPT = """
+import importlib, json, os, resource, sys, time
+sys.path.insert(0, {base_dir!r})
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'forniture_store.settings')
+import django
+django.setup()
+
+rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+import apps.reports.views
+if {eager!r}:
+    from apps.reports.backends import REPORT_BACKENDS
+    for backend_path in REPORT_BACKENDS.values():
+        importlib.import_module(backend_path.rsplit('.', 1)[0])
+elapsed = time.perf_counter() - start
+rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+print(json.dumps({{
+    'import_ms': elapsed * 1000,
+    'rss_mb': rss_after / 1024,
+    'rss_delta_mb': (rss_after - rss_before) / 1024,
+    'pandas_loaded': 'pandas' in sys.modules,
+}}))
+"""
+
+
+def measure(eager, runs):
+    results = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', CHILD_SCRIPT.format(base_dir=BASE_DIR, eager=eager)],
+            capture_output=True, text=True, check=True, cwd=BASE_DIR,
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return {
+        'import_ms': statistics.median(r['import_ms'] for r in results),
+        'rss_mb': statistics.median(r['rss_mb'] for r in results),
+        'rss_delta_mb': statistics.median(r['rss_delta_mb'] for r in results),
+        'pandas_loaded': results[0]['pandas_loaded'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=5, help='Processos por cenário (usa a mediana).')
+    args = parser.parse_args()
+
+    print(f"{'Cenário':<28}{'Import (ms)':>12}{'RSS (MB)':>10}{'Δ RSS (MB)':>12}{'pandas':>8}")
+    for label, eager in [('Antes (geradores na carga)', True), ('Depois (sob demanda)', False)]:
+        r = measure(eager, args.runs)
+        print(f"{label:<28}{r['import_ms']:>12.1f}{r['rss_mb']:>10.1f}{r['rss_delta_mb']:>12.1f}{str(r['pandas_loaded']):>8}")
+
+
+if __name__ == '__main__':
+    main()